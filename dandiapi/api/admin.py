@@ -181,20 +181,14 @@ class VersionAdmin(admin.ModelAdmin):
         'doi',
         'version',
         'status',
-        'number_of_assets',
+        'asset_count',
     ]
     list_display_links = ['name']
     list_filter = [VersionStatusFilter]
+    readonly_fields = ['asset_count', 'size']
 
     def get_queryset(self, request: HttpRequest) -> QuerySet:
-        qs = super().get_queryset(request).select_related('dandiset')
-
-        # Using the `asset_count` property here results in N queries being made
-        # for N versions. Instead, use annotation to make one query for N versions.
-        return qs.annotate(number_of_assets=Count('assets'))
-
-    def number_of_assets(self, obj):
-        return obj.number_of_assets
+        return super().get_queryset(request).select_related('dandiset')
 
 
 @admin.register(AssetBlob)
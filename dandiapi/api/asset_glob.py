@@ -0,0 +1,85 @@
+"""
+Glob matching of asset paths, which can make use of the asset path indexes.
+
+Glob syntax:
+
+* `*` matches any sequence of characters, *including* `/`. For example, `*.txt` matches both
+  `a.txt` and `a/b/c.txt`.
+* `**` as an entire path segment (e.g. `a/**/b.txt` or `**/b.txt`) matches zero or more whole
+  folders, so `a/**/b.txt` matches `a/b.txt`, `a/x/b.txt` and `a/x/y/b.txt`. Anywhere else, `**`
+  is the same as `*`.
+* Every other character is matched literally. Matching is case-insensitive.
+
+A glob is compiled into the literal prefix before its first wildcard, and a residual regular
+expression. The prefix is matched with a LIKE on the upper-cased path, which is served by the
+`asset-path-upper-pattern` btree index, so the residual is only evaluated on those candidates.
+Globs without a literal prefix (e.g. `*.txt`) are still served by the `asset-path-trgm` trigram
+index, which supports regular expression matches.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+    from dandiapi.api.models import Asset
+
+
+@dataclass(frozen=True)
+class CompiledGlob:
+    # The literal text that every matching path starts with
+    prefix: str
+    # A regex for the entire path, or None if matching the prefix is sufficient
+    regex: str | None
+    # Whether the glob has no wildcards, and so must match the path exactly
+    exact: bool = False
+
+    def filter(self, queryset: QuerySet[Asset]) -> QuerySet[Asset]:
+        if self.exact:
+            return queryset.filter(path__iexact=self.prefix)
+        if self.prefix:
+            queryset = queryset.filter(path__istartswith=self.prefix)
+        if self.regex is not None:
+            queryset = queryset.filter(path__iregex=self.regex)
+        return queryset
+
+
+def _glob_to_regex(pattern: str) -> str:
+    # Split into literal parts and runs of asterisks, e.g. ['a/', '**', '/b', '*', '.txt']
+    parts = [part for part in re.split(r'(\*+)', pattern) if part]
+
+    regex = []
+    for i, part in enumerate(parts):
+        if not part.startswith('*'):
+            # Escape any special characters, so that no user supplied regex is evaluated
+            regex.append(re.escape(part))
+            continue
+
+        previous = parts[i - 1] if i > 0 else ''
+        following = parts[i + 1] if i + 1 < len(parts) else ''
+        is_segment = (not previous or previous.endswith('/')) and following.startswith('/')
+        if part == '**' and is_segment:
+            # Match zero or more folders, consuming the slash that follows
+            regex.append('(.*/)?')
+            parts[i + 1] = following[1:]
+        else:
+            regex.append('.*')
+
+    return f'^{"".join(regex)}$'
+
+
+def compile_glob(pattern: str) -> CompiledGlob:
+    """Compile a glob pattern into a literal prefix and a residual regex."""
+    prefix, wildcard, rest = pattern.partition('*')
+    if not wildcard:
+        return CompiledGlob(prefix=pattern, regex=None, exact=True)
+
+    # A trailing run of asterisks matches anything, so only the prefix needs to be checked
+    if not rest.strip('*'):
+        return CompiledGlob(prefix=prefix, regex=None)
+
+    return CompiledGlob(prefix=prefix, regex=_glob_to_regex(pattern))
@@ -0,0 +1,108 @@
+"""
+Build the full metadata of many assets at once.
+
+`Asset.full_metadata` computes the URLs of a single asset, which includes a `reverse()` of the
+download URL. Here, the download URL is formatted from a single `reverse()` per batch.
+
+The full metadata of each asset is also materialized as an `AssetFullMetadata`, along with its
+fingerprint: a digest of every value that the full metadata is derived from. When the asset, its
+blob or zarr (e.g. its checksum or embargo status), or the relevant settings change, so does the
+fingerprint, so materialized metadata is never served stale, and needs no explicit invalidation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.urls import reverse
+from more_itertools import ichunked
+
+from dandiapi.api.models import AssetFullMetadata
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from django.db.models import QuerySet
+
+    from dandiapi.api.models import Asset
+
+# Any valid asset ID, which is substituted with the real one in the download URL
+_PLACEHOLDER_ASSET_ID = '00000000-0000-4000-8000-000000000000'
+
+
+def full_metadata_fingerprint(asset: Asset) -> str:
+    """Return a digest which changes whenever the full metadata of the asset would."""
+    parts = [
+        asset.id,
+        asset.asset_id,
+        asset.modified.isoformat(),
+        asset.path,
+        settings.DANDI_API_URL,
+        os.getenv('CLOUDFRONT_NEUROGLANCER_URL'),
+    ]
+    if asset.blob is not None:
+        blob = asset.blob
+        parts += ['blob', blob.blob_id, blob.blob.name, blob.etag, blob.sha256, blob.size]
+        parts += [blob.embargoed]
+    else:
+        zarr = asset.zarr
+        parts += ['zarr', zarr.zarr_id, zarr.checksum, zarr.size, zarr.embargoed]
+
+    return hashlib.sha256('\0'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def full_metadata_many(assets: Sequence[Asset]) -> list[dict]:
+    """
+    Return the full metadata of many assets, in the same order.
+
+    The materialized metadata of every asset whose fingerprint still matches is read with a
+    single query. The metadata of the other assets is built, and materialized with a single
+    upsert. The blob and zarr of each asset should already be loaded (e.g. with
+    `select_related`).
+    """
+    fingerprints = {asset.id: full_metadata_fingerprint(asset) for asset in assets}
+    # Fingerprints include the asset ID, so this only matches the current fingerprint of each asset
+    metadata = dict(
+        AssetFullMetadata.objects.filter(
+            asset_id__in=fingerprints, fingerprint__in=fingerprints.values()
+        ).values_list('asset_id', 'metadata')
+    )
+
+    missing = {asset.id: asset for asset in assets if asset.id not in metadata}
+    if missing:
+        download_url_template = settings.DANDI_API_URL + reverse(
+            'asset-download', kwargs={'asset_id': _PLACEHOLDER_ASSET_ID}
+        )
+        built = {
+            asset_id: asset.build_full_metadata(
+                download_url=download_url_template.replace(
+                    _PLACEHOLDER_ASSET_ID, str(asset.asset_id)
+                ),
+                s3_url=asset.s3_url,
+            )
+            for asset_id, asset in missing.items()
+        }
+        AssetFullMetadata.objects.bulk_create(
+            [
+                AssetFullMetadata(
+                    asset_id=asset_id, fingerprint=fingerprints[asset_id], metadata=asset_metadata
+                )
+                for asset_id, asset_metadata in built.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['asset'],
+            update_fields=['fingerprint', 'metadata'],
+        )
+        metadata.update(built)
+
+    return [metadata[asset.id] for asset in assets]
+
+
+def iter_full_metadata(queryset: QuerySet[Asset], *, chunk_size: int = 1_000) -> Iterator[dict]:
+    """Yield the full metadata of every asset in a queryset, in batches."""
+    assets = queryset.select_related('blob', 'zarr').iterator(chunk_size=chunk_size)
+    for chunk in ichunked(assets, chunk_size):
+        yield from full_metadata_many(list(chunk))
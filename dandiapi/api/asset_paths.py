@@ -1,21 +1,29 @@
 from __future__ import annotations
 
+from collections import defaultdict
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 from django.db.models import F, QuerySet, Sum
 from django.db.models.functions import Coalesce
-from tqdm import tqdm
+from more_itertools import ichunked
 
 # Import only the asset paths models
-from dandiapi.api.models.asset_paths import AssetPath, AssetPathRelation
+from dandiapi.api.models.asset_paths import AssetPath
 
 # Import models for type checking only (prevent cyclic imports)
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from dandiapi.api.models import Asset, Version
     from dandiapi.zarr.models import ZarrArchive
 
 
+# The most existing paths which are returned as conflicting with any one path
+CONFLICTING_PATHS_SAMPLE_SIZE = 10
+
+
 ####################################################################
 # Dandiset and version deletion will cascade to asset path deletion.
 # Thus, no explicit action is needed for these.
@@ -39,7 +47,7 @@ def get_root_paths_many(versions: QuerySet[Version], *, join_assets=False) -> Qu
     if join_assets:
         qs = qs.prefetch_related('asset', 'asset__blob', 'asset__zarr')
 
-    return qs.filter(version__in=versions).exclude(path__contains='/').order_by('path')
+    return qs.filter(version__in=versions, depth=0).order_by('path')
 
 
 def get_root_paths(version: Version) -> QuerySet[AssetPath]:
@@ -47,7 +55,7 @@ def get_root_paths(version: Version) -> QuerySet[AssetPath]:
     # Use prefetch_related here instead of select_related,
     # as otherwise the resulting join is very large
     qs = AssetPath.objects.prefetch_related('asset', 'asset__blob', 'asset__zarr')
-    return qs.filter(version=version).exclude(path__contains='/').order_by('path')
+    return qs.filter(version=version, depth=0).order_by('path')
 
 
 def get_path_children(path: AssetPath, depth: int | None = 1) -> QuerySet[AssetPath]:
@@ -57,39 +65,114 @@ def get_path_children(path: AssetPath, depth: int | None = 1) -> QuerySet[AssetP
     By default, returns only the direct children.
     If depth is `None`, all children will be returned, regardless of depth.
     """
-    relation_qs = AssetPathRelation.objects.filter(parent=path).exclude(child=path)
+    # Since path uses the C collation, this prefix match is a range scan over the
+    # (version, path) or (version, depth, path) indexes
+    qs = AssetPath.objects.filter(version_id=path.version_id, path__startswith=f'{path.path}/')
     if depth is not None:
-        relation_qs = relation_qs.filter(depth=depth)
+        qs = qs.filter(depth=path.depth + depth)
 
-    path_ids = relation_qs.values_list('child', flat=True).distinct()
-    return (
-        AssetPath.objects.select_related('asset', 'asset__blob', 'asset__zarr')
-        .filter(id__in=path_ids)
-        .order_by('path')
-    )
+    return qs.select_related('asset', 'asset__blob', 'asset__zarr').order_by('path')
 
 
-def get_conflicting_paths(path: str, version: Version) -> list[str]:
-    """Return a list of existing paths that conflict with the given path."""
-    # Check that this path isn't already occupied by a "folder"
-    # Database constraints ensure this queryset could return at most 1 result
-    folder = AssetPath.objects.filter(version=version, path=path, asset__isnull=True).first()
-    if folder:
-        return list(get_path_children(folder, depth=None).values_list('path', flat=True))
-
-    # Check that this path doesn't conflict with any existing "files"
-    nodepaths = extract_paths(path)[:-1]
-    return list(
-        AssetPath.objects.filter(
-            version=version, path__in=nodepaths, asset__isnull=False
-        ).values_list('path', flat=True)
-    )
+@dataclass(frozen=True)
+class PathConflict:
+    """A sample of the existing files that a path conflicts with, and the number of them."""
+
+    paths: list[str]
+    count: int
+
+
+def get_conflicting_paths_many(
+    paths: Iterable[str], version: Version, *, sample_size: int = CONFLICTING_PATHS_SAMPLE_SIZE
+) -> dict[str, PathConflict]:
+    """
+    Return the existing files that conflict with each of the given paths, in a single query.
+
+    A path conflicts with every file below it if it's already occupied by a "folder", and with
+    any file which is one of its ancestors. Only the given paths which conflict with an existing
+    file are included, and at most `sample_size` of the files are returned for each.
+    """
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return {}
+
+    ancestors = [(path, nodepath) for path in paths for nodepath in extract_paths(path)[:-1]]
+    table = AssetPath._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH candidates AS (
+                SELECT path COLLATE "C" AS path FROM unnest(%(paths)s::text[]) AS c (path)
+            ),
+            candidate_ancestors AS (
+                SELECT path COLLATE "C" AS path, ancestor COLLATE "C" AS ancestor
+                FROM unnest(%(candidates)s::text[], %(ancestors)s::text[]) AS a (path, ancestor)
+            )
+            -- Paths occupied by a folder, which conflict with all files below it. The range
+            -- condition is a prefix match, which (with the C collation) scans the path index.
+            SELECT c.path, f.aggregate_files, s.sample
+            FROM candidates c
+            JOIN {table} f ON f.version_id = %(version_id)s AND f.path = c.path
+            CROSS JOIN LATERAL (
+                SELECT array_agg(d.path ORDER BY d.path)
+                FROM (
+                    SELECT d.path
+                    FROM {table} d
+                    WHERE d.version_id = %(version_id)s
+                        AND d.path > c.path || '/'
+                        AND d.path < c.path || '0'
+                        AND d.asset_id IS NOT NULL
+                    ORDER BY d.path
+                    LIMIT %(sample_size)s
+                ) d
+            ) s (sample)
+            WHERE f.asset_id IS NULL
+            UNION ALL
+            -- Paths which have a file as one of their ancestors
+            SELECT a.path, count(*), (array_agg(f.path ORDER BY f.path))[1:%(sample_size)s]
+            FROM candidate_ancestors a
+            JOIN {table} f ON f.version_id = %(version_id)s AND f.path = a.ancestor
+            WHERE f.asset_id IS NOT NULL
+            GROUP BY a.path
+            """,  # noqa: S608
+            {
+                'paths': paths,
+                'candidates': [path for path, _ in ancestors],
+                'ancestors': [nodepath for _, nodepath in ancestors],
+                'version_id': version.id,
+                'sample_size': sample_size,
+            },
+        )
+        rows = cursor.fetchall()
+
+    return {
+        path: PathConflict(paths=list(sample or []), count=count) for path, count, sample in rows
+    }
+
+
+def get_conflicting_paths(path: str, version: Version) -> PathConflict | None:
+    """Return the existing files that conflict with the given path, if there are any."""
+    return get_conflicting_paths_many([path], version).get(path)
 
 
-def search_asset_paths(query: str, version: Version) -> QuerySet[AssetPath] | None:
-    """Return all direct children of this path, if there are any."""
+def search_asset_paths(
+    query: str, version: Version, *, depth: int | None = 1
+) -> QuerySet[AssetPath] | None:
+    """
+    Return all children of this path, if there are any.
+
+    By default, only the direct children are returned. Otherwise, all children up to `depth`
+    levels below this path are returned, or the entire subtree if depth is `None`.
+    """
     if not query:
-        return get_root_paths(version)
+        if depth == 1:
+            return get_root_paths(version)
+
+        # Root paths have a depth of zero
+        qs = AssetPath.objects.filter(version=version)
+        if depth is not None:
+            qs = qs.filter(depth__lt=depth)
+        return qs.select_related('asset', 'asset__blob', 'asset__zarr').order_by('path')
 
     # Ensure no trailing slash
     fixed_query = query.rstrip('/')
@@ -99,16 +182,33 @@ def search_asset_paths(query: str, version: Version) -> QuerySet[AssetPath] | No
     if path is None:
         return None
 
-    return get_path_children(path)
+    if depth == 1:
+        return get_path_children(path)
+
+    qs = get_path_children(path, depth=None)
+    if depth is not None:
+        qs = qs.filter(depth__lte=path.depth + depth)
+    return qs
 
 
-def insert_asset_paths(asset: Asset, version: Version):
-    """Add all intermediate paths from an asset and link them together."""
+def _insert_leaf_paths(assets: list[Asset], version: Version):
+    """Insert the leaf paths of the provided assets, with their aggregates already computed."""
     try:
-        # Get or create leaf path
-        leaf, created = AssetPath.objects.get_or_create(
-            path=asset.path, asset=asset, version=version
-        )
+        # Use a savepoint, so that the integrity error can be handled below
+        with transaction.atomic():
+            AssetPath.objects.bulk_create(
+                [
+                    AssetPath(
+                        path=asset.path,
+                        depth=AssetPath.path_depth(asset.path),
+                        asset=asset,
+                        version=version,
+                        aggregate_files=1,
+                        aggregate_size=asset.size,
+                    )
+                    for asset in assets
+                ]
+            )
     except IntegrityError as e:
         from dandiapi.api.services.asset.exceptions import AssetAlreadyExistsError
 
@@ -120,150 +220,269 @@ def insert_asset_paths(asset: Asset, version: Version):
         # Re-raise original exception otherwise
         raise
 
-    # If the asset was not created, return early, as the work is already done
-    if not created:
-        return leaf
 
-    # Create absolute paths (exclude leaf node)
-    nodepaths = extract_paths(asset.path)[:-1]
-
-    # Create nodes
+def _apply_path_deltas(version: Version, deltas: dict[str, tuple[int, int]]):
+    """Apply (files, size) deltas to the given paths of a version, in a single UPDATE per batch."""
+    table = AssetPath._meta.db_table
+    for batch in ichunked(deltas.items(), 5_000):
+        rows = [(path, files, size) for path, (files, size) in batch]
+        values = ', '.join(['(%s, %s::bigint, %s::bigint)'] * len(rows))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS p
+                SET
+                    aggregate_files = p.aggregate_files + v.files,
+                    aggregate_size = p.aggregate_size + v.size
+                FROM (VALUES {values}) AS v (path, files, size)
+                WHERE p.version_id = %s AND p.path = v.path
+                """,
+                [*(value for row in rows for value in row), version.id],
+            )
+
+
+def _remove_leaf_paths(
+    version: Version, removed: Iterable[Asset], deltas: defaultdict[str, list[int]]
+) -> tuple[int, int]:
+    """Remove the leaf paths of many assets, returning the change in total files and size."""
+    total_files = total_size = 0
+    removed_ids = {asset.id for asset in removed}
+    if not removed_ids:
+        return total_files, total_size
+
+    leaves = AssetPath.objects.filter(version=version, asset_id__in=removed_ids)
+    for leaf in leaves:
+        # Use the previously computed size of the leaf node, not the current asset size,
+        # in case the size of the AssetBlob/ZarrArchive that it points to has changed
+        for nodepath in extract_paths(leaf.path)[:-1]:
+            deltas[nodepath][0] -= 1
+            deltas[nodepath][1] -= leaf.aggregate_size
+        total_files -= 1
+        total_size -= leaf.aggregate_size
+
+    leaves.delete()
+    return total_files, total_size
+
+
+def _add_leaf_paths(
+    version: Version, added: Iterable[Asset], deltas: defaultdict[str, list[int]]
+) -> tuple[int, int]:
+    """Add the leaf paths of many assets, returning the change in total files and size."""
+    total_files = total_size = 0
+
+    # Skip any assets that already have a path in this version, as the work is already done
+    added_assets = {asset.id: asset for asset in added}
+    if added_assets:
+        existing = AssetPath.objects.filter(version=version, asset_id__in=added_assets)
+        for asset_id in existing.values_list('asset_id', flat=True):
+            del added_assets[asset_id]
+    if not added_assets:
+        return total_files, total_size
+
+    _insert_leaf_paths(list(added_assets.values()), version)
+    for asset in added_assets.values():
+        for nodepath in extract_paths(asset.path)[:-1]:
+            deltas[nodepath][0] += 1
+            deltas[nodepath][1] += asset.size
+        total_files += 1
+        total_size += asset.size
+
+    # Create any missing nodes, which the deltas are then applied to
     AssetPath.objects.bulk_create(
-        [AssetPath(path=path, version=version, asset=None) for path in nodepaths],
+        [
+            AssetPath(path=path, depth=AssetPath.path_depth(path), version=version)
+            for path, (files, _) in deltas.items()
+            if files > 0
+        ],
         ignore_conflicts=True,
     )
+    return total_files, total_size
 
-    # Retrieve all paths
-    paths = [*AssetPath.objects.filter(version=version, path__in=nodepaths).order_by('path'), leaf]
-
-    # Create relations between paths
-    links = []
-    for i in range(len(paths)):
-        links.extend(
-            [
-                AssetPathRelation(parent=paths[i], child=paths[j], depth=j - i)
-                for j in range(len(paths))[i:]
-            ]
-        )
-
-    # Create objects
-    AssetPathRelation.objects.bulk_create(links, ignore_conflicts=True)
-
-    return leaf
-
-
-def _add_asset_paths(asset: Asset, version: Version):
-    leaf = insert_asset_paths(asset, version)
-
-    # Only increment if it hasn't been performed yet
-    if leaf.aggregate_files == 1:
-        return
 
-    # Increment the size and file count of all parent paths.
-    # Get all relations (including leaf node)
-    parent_ids = (
-        AssetPathRelation.objects.filter(child=leaf)
-        .distinct('parent')
-        .values_list('parent', flat=True)
-    )
+def _update_asset_paths(
+    version: Version, *, added: Iterable[Asset] = (), removed: Iterable[Asset] = ()
+):
+    """
+    Remove and add the paths of many assets in one version at once.
 
-    # Update size + file count
-    AssetPath.objects.filter(id__in=parent_ids).update(
-        aggregate_size=F('aggregate_size') + leaf.asset.size,
-        aggregate_files=F('aggregate_files') + 1,
+    The net change in file count and size is computed once per ancestor path, and applied in bulk.
+    Afterwards, only the touched paths that no longer contain any files are removed.
+    """
+    # Map of path -> [files, size]
+    deltas: defaultdict[str, list[int]] = defaultdict(lambda: [0, 0])
+
+    # Remove leaves first, so that an asset can be replaced by another with the same path
+    removed_files, removed_size = _remove_leaf_paths(version, removed, deltas)
+    added_files, added_size = _add_leaf_paths(version, added, deltas)
+    total_files = removed_files + added_files
+    total_size = removed_size + added_size
+
+    _apply_path_deltas(
+        version,
+        {path: (files, size) for path, (files, size) in deltas.items() if files or size},
     )
 
+    # Delete any touched paths which no longer contain any files
+    for batch in ichunked(deltas, 5_000):
+        AssetPath.objects.filter(version=version, path__in=batch, aggregate_files=0).delete()
 
-def _delete_asset_paths(asset: Asset, version: Version):
-    leaf: AssetPath | None = AssetPath.objects.filter(asset=asset, version=version).first()
-    if leaf is None:
-        return
+    if total_files or total_size:
+        type(version).objects.filter(id=version.id).update(
+            asset_count=F('asset_count') + total_files, size=F('size') + total_size
+        )
+        version.refresh_from_db(fields=version.COUNTER_FIELDS)
 
-    # Fetch parents
-    parent_ids = (
-        AssetPathRelation.objects.filter(child=leaf)
-        .distinct('parent')
-        .values_list('parent', flat=True)
-    )
-    parent_paths = AssetPath.objects.filter(id__in=parent_ids)
 
-    # Get the previously computed size of the leaf node, not the current asset size,
-    # in case the size of the AssetBlob/ZarrArchive that it points to has changed
-    leaf_size = leaf.aggregate_size
+def refresh_version_totals(version: Version) -> tuple[int, int]:
+    """
+    Recompute the total files and size of a version from its root paths, and store them.
 
-    # Update parents
-    parent_paths.update(
-        aggregate_size=F('aggregate_size') - leaf_size,
-        aggregate_files=F('aggregate_files') - 1,
+    Returns the previously stored (asset_count, size), to allow detecting drift.
+    """
+    previous = (version.asset_count, version.size)
+    totals = AssetPath.objects.filter(version=version, depth=0).aggregate(
+        files=Coalesce(Sum('aggregate_files'), 0), size=Coalesce(Sum('aggregate_size'), 0)
+    )
+    type(version).objects.filter(id=version.id).update(
+        asset_count=totals['files'], size=totals['size']
     )
+    version.asset_count, version.size = totals['files'], totals['size']
+    return previous
 
-    # Ensure integrity
-    leaf.refresh_from_db()
-    if leaf.aggregate_size != 0:
-        raise RuntimeError('Remaining non-zero aggregate_size')
-    if leaf.aggregate_files != 0:
-        raise RuntimeError('Remaining non-zero aggregate_files')
 
-    # Delete leaf node and any other paths with no contained files
-    AssetPath.objects.filter(aggregate_files=0).delete()
+@transaction.atomic
+def update_version_asset_paths(
+    version: Version, *, added: Iterable[Asset] = (), removed: Iterable[Asset] = ()
+):
+    """Remove the paths of all `removed` assets, and add the paths of all `added` assets."""
+    _update_asset_paths(version, added=added, removed=removed)
 
 
 @transaction.atomic
 def add_asset_paths(asset: Asset, version: Version):
-    _add_asset_paths(asset, version)
+    _update_asset_paths(version, added=[asset])
 
 
 @transaction.atomic
 def delete_asset_paths(asset: Asset, version: Version):
-    _delete_asset_paths(asset, version)
+    _update_asset_paths(version, removed=[asset])
 
 
 @transaction.atomic
 def update_asset_paths(old_asset: Asset, new_asset: Asset, version: Version):
-    _delete_asset_paths(old_asset, version)
-    _add_asset_paths(new_asset, version)
+    _update_asset_paths(version, added=[new_asset], removed=[old_asset])
+
+
+def _compute_version_asset_paths(version: Version) -> dict[str, AssetPath]:
+    """Compute every path of a version, along with its aggregates, in memory."""
+    from dandiapi.api.services.asset.exceptions import AssetAlreadyExistsError
+
+    paths: dict[str, AssetPath] = {}
+    assets = version.assets.values_list('id', 'path', 'blob__size', 'zarr__size')
+    for asset_id, asset_path, blob_size, zarr_size in assets.iterator(chunk_size=5_000):
+        size = blob_size or zarr_size or 0
+
+        # Any path that is both a file and a folder, or two files with the same path,
+        # would violate the constraints of the paths table
+        leaf = paths.get(asset_path)
+        if leaf is not None:
+            raise AssetAlreadyExistsError
+        paths[asset_path] = AssetPath(
+            path=asset_path,
+            depth=AssetPath.path_depth(asset_path),
+            version=version,
+            asset_id=asset_id,
+            aggregate_files=1,
+            aggregate_size=size,
+        )
+
+        for nodepath in extract_paths(asset_path)[:-1]:
+            node = paths.get(nodepath)
+            if node is None:
+                node = paths[nodepath] = AssetPath(
+                    path=nodepath, depth=AssetPath.path_depth(nodepath), version=version
+                )
+            elif node.asset_id is not None:
+                raise AssetAlreadyExistsError
+
+            node.aggregate_files += 1
+            node.aggregate_size += size
+
+    return paths
 
 
 @transaction.atomic
 def add_version_asset_paths(version: Version):
-    """Add every asset from a version."""
-    # Leaves
-    for asset in tqdm(version.assets.all()):
-        insert_asset_paths(asset, version)
-
-    # Compute aggregate file size + count for each asset path, instead of when each asset
-    # is added. This is done because updating the same row many times within a transaction is slow.
-    # https://stackoverflow.com/a/60221875
-
-    # Get all nodes which haven't been computed yet
-    nodes = AssetPath.objects.filter(version=version, aggregate_files=0)
-    for node in tqdm(nodes):
-        child_link_ids = node.child_links.distinct('child_id').values_list('child_id', flat=True)
-        child_leaves = AssetPath.objects.filter(id__in=child_link_ids, asset__isnull=False)
-
-        # Get all aggregates
-        sizes = child_leaves.aggregate(
-            size=Coalesce(Sum('asset__blob__size'), 0), zsize=Coalesce(Sum('asset__zarr__size'), 0)
+    """
+    Add every asset from a version.
+
+    The entire tree, including the aggregate file size + count of each path, is computed up front
+    and written with a few bulk inserts, instead of inserting and updating paths per asset. This
+    is done because updating the same row many times within a transaction is slow.
+    https://stackoverflow.com/a/60221875
+
+    Any existing paths of this version are replaced.
+    """
+    paths = _compute_version_asset_paths(version)
+
+    # Replace any existing paths (this is a no-op for newly published versions)
+    AssetPath.objects.filter(version=version).delete()
+    for batch in ichunked(paths.values(), 5_000):
+        AssetPath.objects.bulk_create(batch)
+
+    refresh_version_totals(version)
+
+
+@transaction.atomic
+def copy_version_asset_paths(source: Version, target: Version):
+    """
+    Copy the entire path tree of one version to another, e.g. when publishing a draft.
+
+    The rows are copied server side with a single INSERT ... SELECT. Since the tree is implied
+    by the paths themselves, there are no ids which need to be remapped. Any existing paths of
+    the target version are replaced.
+    """
+    AssetPath.objects.filter(version=target).delete()
+
+    table = AssetPath._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table}
+                (path, depth, asset_id, version_id, aggregate_files, aggregate_size)
+            SELECT path, depth, asset_id, %s, aggregate_files, aggregate_size
+            FROM {table}
+            WHERE version_id = %s
+            """,  # noqa: S608
+            [target.id, source.id],
         )
 
-        node.aggregate_files += child_leaves.count()
-        node.aggregate_size += sizes['size'] + sizes['zsize']
-        node.save()
+    refresh_version_totals(target)
+
+
+def _zarr_draft_versions(zarr: ZarrArchive) -> dict[Version, list[Asset]]:
+    """Return the draft assets of a zarr, grouped by the draft versions they belong to."""
+    from dandiapi.api.models import Version
+
+    versions: dict[Version, list[Asset]] = {}
+    assets = zarr.assets.filter(published=False).select_related('zarr')
+    for version in Version.objects.filter(version='draft', assets__in=assets).distinct():
+        versions[version] = list(assets.filter(versions=version))
+
+    return versions
 
 
 @transaction.atomic
 def add_zarr_paths(zarr: ZarrArchive):
     """Add all asset paths that are associated with a zarr."""
     # Only act on draft assets/versions
-    for asset in zarr.assets.filter(published=False).iterator():
-        for version in asset.versions.filter(version='draft').iterator():
-            _add_asset_paths(asset, version)
+    for version, assets in _zarr_draft_versions(zarr).items():
+        _update_asset_paths(version, added=assets)
 
 
 @transaction.atomic
 def delete_zarr_paths(zarr: ZarrArchive):
     """Remove all asset paths that are associated with a zarr."""
     # Only act on draft assets/versions
-    for asset in zarr.assets.filter(published=False).iterator():
-        for version in asset.versions.filter(version='draft').iterator():
-            _delete_asset_paths(asset, version)
+    for version, assets in _zarr_draft_versions(zarr).items():
+        _update_asset_paths(version, removed=assets)
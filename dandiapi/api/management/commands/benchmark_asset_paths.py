@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+import djclick as click
+
+from dandiapi.api.asset_paths import add_asset_paths, extract_paths
+from dandiapi.api.models import Asset, AssetBlob, AssetPath, AssetPathRelation, Dandiset, Version
+
+
+def _create_version(assets: list[Asset]) -> Version:
+    dandiset = Dandiset.objects.create()
+    version = Version.objects.create(
+        dandiset=dandiset,
+        name='Asset paths benchmark',
+        metadata={'schemaVersion': settings.DANDI_SCHEMA_VERSION},
+        version='draft',
+    )
+    version.assets.add(*assets)
+    return version
+
+
+def _create_assets(count: int, depth: int, fanout: int) -> list[Asset]:
+    blobs = AssetBlob.objects.bulk_create(
+        [
+            AssetBlob(
+                blob_id=(blob_id := uuid4()),
+                blob=f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}blobs/benchmark/{blob_id}',
+                etag=f'{i:032x}',
+                size=100,
+            )
+            for i in range(count)
+        ]
+    )
+
+    def asset_path(i: int) -> str:
+        folders = [
+            f'level{d}-{(i // fanout ** (depth - d - 1)) % fanout}' for d in range(depth - 1)
+        ]
+        return '/'.join([*folders, f'file{i}.dat'])
+
+    return Asset.objects.bulk_create(
+        [
+            Asset(
+                path=asset_path(i),
+                blob=blob,
+                metadata={'schemaVersion': settings.DANDI_SCHEMA_VERSION},
+            )
+            for i, blob in enumerate(blobs)
+        ]
+    )
+
+
+def _legacy_add_asset_paths(asset: Asset, version: Version):
+    """Add asset paths the way the closure table implementation did, including its relations."""
+    nodepaths = extract_paths(asset.path)
+    AssetPath.objects.bulk_create(
+        [AssetPath(path=path, version=version, asset=None) for path in nodepaths[:-1]],
+        ignore_conflicts=True,
+    )
+    leaf = AssetPath.objects.create(path=asset.path, asset=asset, version=version)
+    paths = [*AssetPath.objects.filter(version=version, path__in=nodepaths[:-1]).order_by('path')]
+    paths.append(leaf)
+    AssetPathRelation.objects.bulk_create(
+        [
+            AssetPathRelation(parent=paths[i], child=paths[j], depth=j - i)
+            for i in range(len(paths))
+            for j in range(i, len(paths))
+        ],
+        ignore_conflicts=True,
+    )
+    AssetPath.objects.filter(id__in=[p.id for p in paths]).update(
+        aggregate_size=F('aggregate_size') + asset.blob.size,
+        aggregate_files=F('aggregate_files') + 1,
+    )
+
+
+def _table_usage(table: str, where: str, params: list) -> tuple[int, int]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT count(*), coalesce(sum(pg_column_size(t.*)), 0) FROM {table} t WHERE {where}',  # noqa: S608
+            params,
+        )
+        return cursor.fetchone()
+
+
+@click.command()
+@click.option('--assets', 'count', type=int, default=5_000, show_default=True)
+@click.option('--depth', type=int, default=12, show_default=True, help='Path components per asset')
+@click.option('--fanout', type=int, default=4, show_default=True, help='Sub-folders per folder')
+def benchmark_asset_paths(*, count: int, depth: int, fanout: int):
+    """
+    Compare the materialized path index against the legacy closure table.
+
+    All data is created in a transaction which is rolled back afterwards. Sizes are reported as
+    the sum of the stored tuple sizes, excluding indexes.
+    """
+    with transaction.atomic():
+        assets = _create_assets(count, depth, fanout)
+        index_version = _create_version(assets)
+        closure_version = _create_version(assets)
+
+        start = time.perf_counter()
+        for asset in assets:
+            add_asset_paths(asset, index_version)
+        index_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for asset in assets:
+            _legacy_add_asset_paths(asset, closure_version)
+        closure_elapsed = time.perf_counter() - start
+
+        index_rows, index_bytes = _table_usage(
+            'api_assetpath', 'version_id = %s', [index_version.id]
+        )
+        closure_path_rows, closure_path_bytes = _table_usage(
+            'api_assetpath', 'version_id = %s', [closure_version.id]
+        )
+        relation_rows, relation_bytes = _table_usage(
+            'api_assetpathrelation',
+            'child_id IN (SELECT id FROM api_assetpath WHERE version_id = %s)',
+            [closure_version.id],
+        )
+
+        # Leave no data behind
+        transaction.set_rollback(True)
+
+    click.echo(f'{count} assets, {depth} path components each, fanout of {fanout}')
+    click.echo('Materialized path index:')
+    click.echo(f'\t insert rate: {count / index_elapsed:.1f} assets/s')
+    click.echo(f'\t rows: {index_rows} paths')
+    click.echo(f'\t size: {index_bytes} bytes')
+    click.echo('Closure table:')
+    click.echo(f'\t insert rate: {count / closure_elapsed:.1f} assets/s')
+    click.echo(f'\t rows: {closure_path_rows} paths + {relation_rows} relations')
+    click.echo(f'\t size: {closure_path_bytes + relation_bytes} bytes')
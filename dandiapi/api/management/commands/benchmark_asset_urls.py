@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import time
+from urllib.parse import urlparse, urlunparse
+from uuid import uuid4
+
+from django.conf import settings
+import djclick as click
+
+from dandiapi.api.models import AssetBlob
+
+
+def _stripped_presigned_url(storage, key: str) -> str:
+    """Compute an object URL the way it was done before `unsigned_object_url` existed."""
+    parsed = urlparse(storage.url(key))
+    return urlunparse((parsed[0], parsed[1], parsed[2], '', '', ''))
+
+
+@click.command()
+@click.option('--assets', 'count', type=int, default=10_000, show_default=True)
+def benchmark_asset_urls(*, count: int):
+    """
+    Compare the per-asset cost of presigning and stripping a URL against building it unsigned.
+
+    No objects are created, as neither method contacts the storage backend.
+    """
+    storage = AssetBlob.blob.field.storage
+    keys = [
+        f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}blobs/{blob_id[:3]}/{blob_id[3:6]}/{blob_id}'
+        for blob_id in (str(uuid4()) for _ in range(count))
+    ]
+
+    mismatches = sum(
+        _stripped_presigned_url(storage, key) != storage.unsigned_object_url(key)
+        for key in keys[:100]
+    )
+
+    start = time.perf_counter()
+    for key in keys:
+        _stripped_presigned_url(storage, key)
+    presigned_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        storage.unsigned_object_url(key)
+    unsigned_elapsed = time.perf_counter() - start
+
+    click.echo(f'{count} asset URLs, using {type(storage).__name__}')
+    click.echo('Presigned and stripped:')
+    click.echo(f'\t per asset: {presigned_elapsed / count * 1e6:.2f} µs')
+    click.echo('Unsigned:')
+    click.echo(f'\t per asset: {unsigned_elapsed / count * 1e6:.2f} µs')
+    click.echo(f'\t speedup: {presigned_elapsed / unsigned_elapsed:.1f}x')
+    if mismatches:
+        click.echo(f'{mismatches} of the first 100 URLs differ between the methods', err=True)
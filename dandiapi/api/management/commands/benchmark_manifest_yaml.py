@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import io
+import time
+from uuid import uuid4
+
+from django.conf import settings
+import djclick as click
+import yaml
+
+from dandiapi.api.manifests import _yaml_dump_sequence_from_generator
+
+
+def _legacy_yaml_dump_sequence(stream, generator) -> None:
+    """Dump a sequence the way it was done before, by dumping and re-indenting every item."""
+    for obj in generator:
+        for i, line in enumerate(
+            yaml.dump(
+                obj, encoding='utf-8', Dumper=yaml.CSafeDumper, allow_unicode=True
+            ).splitlines()
+        ):
+            stream.write(b'- ' if i == 0 else b'  ')
+            stream.write(line)
+            stream.write(b'\n')
+
+
+def _synthetic_full_metadata(i: int) -> dict:
+    asset_id = str(uuid4())
+    path = f'sub-{i % 100:03}/ses-{i % 7}/sub-{i % 100:03}_ses-{i % 7}_run-{i}_image.ome.zarr'
+    return {
+        'id': f'dandiasset:{asset_id}',
+        'path': path,
+        'access': [{'schemaKey': 'AccessRequirements', 'status': 'dandi:OpenAccess'}],
+        'digest': {'dandi:dandi-etag': f'{i:032x}-1', 'dandi:sha2-256': f'{i:064x}'},
+        'schemaKey': 'Asset',
+        'identifier': asset_id,
+        'contentUrl': [
+            f'{settings.DANDI_API_URL}/api/assets/{asset_id}/download/',
+            f'https://example-bucket.s3.amazonaws.com/blobs/{asset_id[:3]}/{asset_id}',
+        ],
+        'contentSize': 1_000_000 + i,
+        'encodingFormat': 'application/x-zarr',
+        'schemaVersion': settings.DANDI_SCHEMA_VERSION,
+        'wasGeneratedBy': [
+            {
+                'name': 'Metadata generation',
+                'schemaKey': 'Activity',
+                'description': (
+                    'Metadata generated by the DANDI command line tool, which has a description '
+                    'that is long enough to be wrapped.\nIt also spans multiple lines.'
+                ),
+                'startDate': '2024-01-01T00:00:00.000000-05:00',
+            }
+        ],
+        'measurementTechnique': [{'name': 'two-photon microscopy technique', 'version': 1.5}],
+        'variableMeasured': [],
+        'blobDateModified': None,
+        'validated': True,
+    }
+
+
+def _time_dump(dump, records: list[dict]) -> tuple[float, bytes]:
+    stream = io.BytesIO()
+    start = time.perf_counter()
+    dump(stream, iter(records))
+    return time.perf_counter() - start, stream.getvalue()
+
+
+@click.command()
+@click.option('--records', 'count', type=int, default=100_000, show_default=True)
+def benchmark_manifest_yaml(*, count: int):
+    """Compare the YAML sequence emitter used for assets.yaml against dumping each item."""
+    records = [_synthetic_full_metadata(i) for i in range(count)]
+
+    legacy_elapsed, legacy_output = _time_dump(_legacy_yaml_dump_sequence, records)
+    elapsed, output = _time_dump(_yaml_dump_sequence_from_generator, records)
+
+    click.echo(f'{count} records, {len(output)} bytes of YAML')
+    click.echo('Dumping each item:')
+    click.echo(f'\t rate: {count / legacy_elapsed:.1f} records/s')
+    click.echo('Sequence emitter:')
+    click.echo(f'\t rate: {count / elapsed:.1f} records/s')
+    click.echo(f'\t speedup: {legacy_elapsed / elapsed:.1f}x')
+    click.echo(f'\t identical output: {output == legacy_output}')
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import djclick as click
+
+from dandiapi.api.models import Version
+from dandiapi.api.services.version.paths_snapshot import build_version_paths_snapshot
+
+
+@click.command()
+@click.option(
+    '--version-id',
+    'version_ids',
+    type=int,
+    multiple=True,
+    help='Only build snapshots of these versions (may be given multiple times)',
+)
+def build_asset_paths_snapshots(*, version_ids: tuple[int, ...]):
+    """
+    Build the asset path snapshots of published versions.
+
+    New versions are snapshotted when they are published, so this only needs to be run for
+    versions published before snapshots existed, or to rebuild existing snapshots.
+    """
+    versions = Version.objects.exclude(version='draft').select_related('dandiset').order_by('id')
+    if version_ids:
+        versions = versions.filter(id__in=version_ids)
+
+    for version in versions.iterator():
+        written = build_version_paths_snapshot(version)
+        click.echo(f'Version {version}: {written} chunks written')
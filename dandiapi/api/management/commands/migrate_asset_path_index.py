@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Length, Replace
+import djclick as click
+
+from dandiapi.api.models import AssetPath, AssetPathRelation, Version
+
+# The number of slashes in a path, computed in the database
+PATH_DEPTH = Length('path') - Length(Replace('path', Value('/'), Value('')))
+
+
+@click.command()
+@click.option(
+    '--version-id',
+    'version_ids',
+    type=int,
+    multiple=True,
+    help='Only convert these versions (may be given multiple times)',
+)
+@click.option(
+    '--batch-size',
+    type=int,
+    default=50_000,
+    show_default=True,
+    help='Number of closure table rows to delete per transaction',
+)
+def migrate_asset_path_index(*, version_ids: tuple[int, ...], batch_size: int):
+    """
+    Convert the asset paths of existing versions to the materialized path index.
+
+    This ensures that every path has a correct depth, and then removes all rows of the legacy
+    AssetPathRelation closure table which belong to that version. Each version is processed in
+    its own set of transactions, so this command can be safely interrupted and re-run.
+    """
+    versions = Version.objects.order_by('id')
+    if version_ids:
+        versions = versions.filter(id__in=version_ids)
+
+    for version in versions.iterator():
+        click.echo(f'Version: {version}')
+
+        # Fix the depth of any paths that weren't populated by the schema migration
+        with transaction.atomic():
+            fixed = (
+                AssetPath.objects.filter(version=version)
+                .exclude(depth=PATH_DEPTH)
+                .update(depth=PATH_DEPTH)
+            )
+        click.echo(f'\t {fixed} paths updated')
+
+        # Remove closure table rows in batches, to avoid one enormous transaction
+        deleted = 0
+        relations = AssetPathRelation.objects.filter(child__version=version)
+        while True:
+            batch = list(relations.values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                AssetPathRelation.objects.filter(id__in=batch).delete()
+            deleted += len(batch)
+
+        click.echo(f'\t {deleted} relations removed')
+
+    remaining = AssetPathRelation.objects.count()
+    click.echo(f'{remaining} relations remaining in total')
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import djclick as click
+
+from dandiapi.api.models import Version
+from dandiapi.api.services.metadata.assets_summary import (
+    aggregate_version_assets_summary,
+    assets_summaries_equal,
+    rebuild_version_assets_summary,
+    render_assets_summary,
+)
+
+
+@click.command()
+@click.option(
+    '--version-id',
+    'version_ids',
+    type=int,
+    multiple=True,
+    help='Only reconcile these versions (may be given multiple times)',
+)
+@click.option('--dry-run', is_flag=True, default=False)
+def reconcile_assets_summaries(*, version_ids: tuple[int, ...], dry_run: bool):
+    """
+    Compare the assetsSummary counters of draft versions against a summary computed from scratch.
+
+    The counters are normally kept up to date incrementally, so this is only needed to correct
+    drift. Any version whose counters render a different summary is reported, and its counters
+    are rebuilt, unless --dry-run is given.
+    """
+    versions = Version.objects.filter(version='draft', assets_summary__isnull=False)
+    versions = versions.select_related('dandiset', 'assets_summary').order_by('id')
+    if version_ids:
+        versions = versions.filter(id__in=version_ids)
+
+    fixed = 0
+    for version in versions.iterator():
+        expected = aggregate_version_assets_summary(version)
+        if assets_summaries_equal(render_assets_summary(version.assets_summary), expected):
+            continue
+
+        fixed += 1
+        click.echo(f'Version {version}: assetsSummary counters are out of date')
+        if not dry_run:
+            rebuild_version_assets_summary(version)
+
+    click.echo(f'{fixed} versions {"out of date" if dry_run else "reconciled"}')
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from django.db import transaction
+import djclick as click
+
+from dandiapi.api.asset_paths import refresh_version_totals
+from dandiapi.api.models import Version
+
+
+@click.command()
+@click.option(
+    '--version-id',
+    'version_ids',
+    type=int,
+    multiple=True,
+    help='Only reconcile these versions (may be given multiple times)',
+)
+def reconcile_version_totals(*, version_ids: tuple[int, ...]):
+    """
+    Recompute the stored asset count and size of versions from their asset paths.
+
+    These are normally kept up to date incrementally, so this is only needed to correct drift,
+    e.g. after asset paths have been modified by hand. Any version which was out of date is
+    reported.
+    """
+    versions = Version.objects.select_related('dandiset').order_by('id')
+    if version_ids:
+        versions = versions.filter(id__in=version_ids)
+
+    fixed = 0
+    for version in versions.iterator():
+        with transaction.atomic():
+            # Lock the row so that no concurrent increments are lost
+            version = Version.objects.select_for_update().get(id=version.id)  # noqa: PLW2901
+            previous = refresh_version_totals(version)
+
+        if previous != (version.asset_count, version.size):
+            fixed += 1
+            click.echo(
+                f'Version {version}: {previous[0]} -> {version.asset_count} assets, '
+                f'{previous[1]} -> {version.size} bytes'
+            )
+
+    click.echo(f'{fixed} versions reconciled')
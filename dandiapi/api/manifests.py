@@ -1,29 +1,44 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-import tempfile
-from typing import IO, TYPE_CHECKING, Any
-from urllib.parse import urlparse, urlunparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+import gzip
+import hashlib
+import io
+import math
+import mimetypes
+import re
+from typing import TYPE_CHECKING, Any, Protocol
 
 from django.conf import settings
-from django.core.files.base import File
+from django.db import transaction
+from django.utils import timezone
+from more_itertools import chunked
+import pyarrow as pa
+import pyarrow.parquet as pq
 from rest_framework.renderers import JSONRenderer
 import yaml
 
-from dandiapi.api.models import Asset, AssetBlob, Version
-from dandiapi.api.storage import create_s3_storage
+from dandiapi.api.asset_metadata import (
+    full_metadata_fingerprint,
+    full_metadata_many,
+    iter_full_metadata,
+)
+from dandiapi.api.models import Asset, AssetBlob, Version, VersionManifest
+from dandiapi.api.storage import create_s3_storage, get_boto_client
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Callable, Generator, Iterable, Iterator
+    from datetime import datetime
+
+    from django.db.models import QuerySet
 
 
 def _s3_url(path: str) -> str:
     """Turn an object path into a fully qualified S3 URL."""
     storage = create_s3_storage(settings.DANDI_DANDISETS_BUCKET_NAME)
-    signed_url = storage.url(path)
-    # Strip off the query parameters from the presigning, as they are different every time
-    parsed = urlparse(signed_url)
-    return urlunparse((parsed[0], parsed[1], parsed[2], '', '', ''))
+    return storage.unsigned_object_url(path)
 
 
 def _manifests_path(version: Version) -> str:
@@ -42,7 +57,11 @@ def manifest_location(version: Version) -> list[str]:
                 f'/versions/draft/assets/'
             )
         ]
-    return [_s3_url(_assets_yaml_path(version))]
+    return [
+        _s3_url(_assets_yaml_path(version)),
+        _s3_url(_assets_jsonl_gz_path(version)),
+        _s3_url(_assets_parquet_path(version)),
+    ]
 
 
 def _dandiset_jsonld_path(version: Version) -> str:
@@ -61,31 +80,389 @@ def _assets_yaml_path(version: Version) -> str:
     return f'{_manifests_path(version)}/assets.yaml'
 
 
+def _assets_jsonl_gz_path(version: Version) -> str:
+    return f'{_manifests_path(version)}/assets.jsonl.gz'
+
+
+def _assets_parquet_path(version: Version) -> str:
+    return f'{_manifests_path(version)}/assets.parquet'
+
+
 def _collection_jsonld_path(version: Version) -> str:
     return f'{_manifests_path(version)}/collection.jsonld'
 
 
+def _assets_index_path(version: Version) -> str:
+    return f'{_manifests_path(version)}/assets.index.json'
+
+
+def _assets_chunk_path(version: Version, digest: str, extension: str) -> str:
+    return f'{_manifests_path(version)}/{_assets_chunk_name(digest, extension)}'
+
+
+def _assets_chunk_name(digest: str, extension: str) -> str:
+    return f'assets/{digest}.{extension}'
+
+
+# Manifests are streamed to storage in parts of this size. Every part except the last must be at
+# least 5 MiB, which is the minimum part size of S3.
+MANIFEST_PART_SIZE = 8 * 1024 * 1024
+# The number of parts of one manifest which may be uploading at once. Together with the part being
+# filled, this bounds the memory used by each manifest.
+MANIFEST_PENDING_PARTS = 2
+
+
+class _WritableStream(Protocol):
+    """A binary stream which manifests are written to, such as a `_MultipartUploadStream`."""
+
+    def write(self, data: bytes, /) -> int: ...
+
+    def flush(self) -> None: ...
+
+
+class _MultipartUploadStream:
+    """
+    A write-only binary stream, which uploads its contents to storage as they are written.
+
+    Data is buffered until a full part is available, which is then uploaded in the background.
+    Objects smaller than a single part are uploaded with a single request on close.
+    """
+
+    def __init__(self, storage, key: str):
+        self._client = get_boto_client(storage)
+        self._bucket_name = storage.bucket_name
+        self._key = key
+        self._content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        self._buffer = bytearray()
+        self._position = 0
+        # Encoders (e.g. pyarrow) may close the stream themselves, so closing is idempotent
+        self.closed = False
+        self._upload_id: str | None = None
+        self._parts: list[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=MANIFEST_PENDING_PARTS)
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._position += len(data)
+        if len(self._buffer) >= MANIFEST_PART_SIZE:
+            self._upload_part()
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def _upload_part(self) -> None:
+        if self._upload_id is None:
+            self._upload_id = self._client.create_multipart_upload(
+                Bucket=self._bucket_name,
+                Key=self._key,
+                ACL='bucket-owner-full-control',
+                ContentType=self._content_type,
+            )['UploadId']
+
+        # Wait for the oldest part to finish, so only a bounded number of parts are held in memory
+        pending = [part for part in self._parts if not part.done()]
+        if len(pending) >= MANIFEST_PENDING_PARTS:
+            pending[0].result()
+
+        body = bytes(self._buffer)
+        self._buffer.clear()
+        self._parts.append(
+            self._executor.submit(
+                self._client.upload_part,
+                Bucket=self._bucket_name,
+                Key=self._key,
+                UploadId=self._upload_id,
+                PartNumber=len(self._parts) + 1,
+                Body=body,
+            )
+        )
+
+    def _complete(self) -> None:
+        if self._upload_id is None:
+            self._client.put_object(
+                Bucket=self._bucket_name,
+                Key=self._key,
+                Body=bytes(self._buffer),
+                ACL='bucket-owner-full-control',
+                ContentType=self._content_type,
+            )
+            return
+
+        if self._buffer:
+            self._upload_part()
+        parts = [
+            {'PartNumber': number, 'ETag': part.result()['ETag']}
+            for number, part in enumerate(self._parts, start=1)
+        ]
+        self._client.complete_multipart_upload(
+            Bucket=self._bucket_name,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={'Parts': parts},
+        )
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        try:
+            self._complete()
+        except BaseException:
+            # The parts of an incomplete upload are kept (and billed) until it is aborted
+            self.abort()
+            raise
+
+        self.closed = True
+        self._executor.shutdown()
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+
+        for part in self._parts:
+            part.cancel()
+        self._executor.shutdown()
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket_name, Key=self._key, UploadId=self._upload_id
+            )
+
+
 @contextmanager
-def _streaming_file_upload(path: str) -> Generator[IO[bytes], None, None]:
-    with tempfile.NamedTemporaryFile(mode='r+b') as outfile:
-        yield outfile
-        outfile.seek(0)
-
-        # Piggyback on the AssetBlob storage since we want to store manifests in the same bucket
-        storage = AssetBlob.blob.field.storage
-        storage._save(path, File(outfile))  # noqa: SLF001
-
-
-def _yaml_dump_sequence_from_generator(stream: IO[bytes], generator: Iterable[Any]) -> None:
-    for obj in generator:
-        for i, line in enumerate(
-            yaml.dump(
-                obj, encoding='utf-8', Dumper=yaml.CSafeDumper, allow_unicode=True
-            ).splitlines()
-        ):
-            stream.write(b'- ' if i == 0 else b'  ')
-            stream.write(line)
-            stream.write(b'\n')
+def _streaming_file_upload(path: str) -> Generator[_MultipartUploadStream, None, None]:
+    # Piggyback on the AssetBlob storage since we want to store manifests in the same bucket
+    stream = _MultipartUploadStream(AssetBlob.blob.field.storage, path)
+    try:
+        yield stream
+    except BaseException:
+        stream.abort()
+        raise
+    # This aborts the upload itself if it fails
+    stream.close()
+
+
+# The number of items which are dumped to YAML at once
+YAML_BATCH_SIZE = 1_000
+# Each item used to be dumped on its own (with the default width of 80), and then indented by two
+# columns, so the width is increased by two to wrap long scalars at the same places
+_YAML_SEQUENCE_WIDTH = 80 + 2
+# An empty line, which is not the last line
+_YAML_EMPTY_LINE_RE = re.compile(rb'\n(?=\n)')
+
+_YAML_STR_TAG = 'tag:yaml.org,2002:str'
+_YAML_FLOAT_TAG = 'tag:yaml.org,2002:float'
+_yaml_resolver = yaml.resolver.Resolver()
+
+
+class _YamlSequenceDumper(yaml.CSafeDumper):
+    # Objects shared between the items of a batch must not become anchors and aliases
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
+class _UnsupportedYamlTypeError(Exception):
+    pass
+
+
+def _yaml_plain_implicit(tag: str, value: str) -> bool:
+    # Whether the value can be written unquoted, i.e. it wouldn't be read back as another type.
+    # Implicit resolvers are looked up by first character, and most values don't have any.
+    resolvers = yaml.resolver.Resolver.yaml_implicit_resolvers
+    if value[:1] not in resolvers and None not in resolvers:
+        return tag == _YAML_STR_TAG
+    return _yaml_resolver.resolve(yaml.ScalarNode, value, (True, False)) == tag
+
+
+def _yaml_float_value(data: float) -> str:
+    # The same as SafeRepresenter.represent_float
+    if data != data:  # noqa: PLR0124
+        return '.nan'
+    if data == math.inf:
+        return '.inf'
+    if data == -math.inf:
+        return '-.inf'
+    value = repr(data).lower()
+    if '.' not in value and 'e' in value:
+        value = value.replace('e', '.0e', 1)
+    return value
+
+
+def _yaml_emit(obj: Any, emit: Callable[[yaml.Event], None]) -> None:
+    """
+    Emit the YAML events of a JSON-like object.
+
+    These are the same events that `yaml.dump` (with the SafeDumper and default options) would
+    emit, without constructing a node graph and resolving the tag of every scalar.
+    """
+    obj_type = type(obj)
+    if obj_type is dict:
+        emit(yaml.MappingStartEvent(None, 'tag:yaml.org,2002:map', implicit=True, flow_style=False))
+        for key in sorted(obj):
+            _yaml_emit(key, emit)
+            _yaml_emit(obj[key], emit)
+        emit(yaml.MappingEndEvent())
+    elif obj_type is list:
+        emit(
+            yaml.SequenceStartEvent(None, 'tag:yaml.org,2002:seq', implicit=True, flow_style=False)
+        )
+        for item in obj:
+            _yaml_emit(item, emit)
+        emit(yaml.SequenceEndEvent())
+    elif obj_type is str:
+        implicit = (_yaml_plain_implicit(_YAML_STR_TAG, obj), True)
+        emit(yaml.ScalarEvent(None, _YAML_STR_TAG, implicit, obj))
+    elif obj is None:
+        emit(yaml.ScalarEvent(None, 'tag:yaml.org,2002:null', (True, False), 'null'))
+    elif obj_type is bool:
+        emit(yaml.ScalarEvent(None, 'tag:yaml.org,2002:bool', (True, False), str(obj).lower()))
+    elif obj_type is int:
+        emit(yaml.ScalarEvent(None, 'tag:yaml.org,2002:int', (True, False), str(obj)))
+    elif obj_type is float:
+        value = _yaml_float_value(obj)
+        implicit = (_yaml_plain_implicit(_YAML_FLOAT_TAG, value), False)
+        emit(yaml.ScalarEvent(None, _YAML_FLOAT_TAG, implicit, value))
+    else:
+        raise _UnsupportedYamlTypeError(obj_type)
+
+
+def _yaml_dump_batch(objs: list[Any]) -> bytes:
+    buffer = io.BytesIO()
+    dumper = _YamlSequenceDumper(
+        buffer, encoding='utf-8', allow_unicode=True, width=_YAML_SEQUENCE_WIDTH
+    )
+    try:
+        dumper.emit(yaml.StreamStartEvent(encoding='utf-8'))
+        dumper.emit(yaml.DocumentStartEvent(explicit=False))
+        _yaml_emit(objs, dumper.emit)
+        dumper.emit(yaml.DocumentEndEvent(explicit=False))
+        dumper.emit(yaml.StreamEndEvent())
+    except _UnsupportedYamlTypeError:
+        # Fall back to representing the objects with the dumper itself
+        return yaml.dump(
+            objs,
+            encoding='utf-8',
+            Dumper=_YamlSequenceDumper,
+            allow_unicode=True,
+            width=_YAML_SEQUENCE_WIDTH,
+        )
+    return buffer.getvalue()
+
+
+def _yaml_dump_sequence(stream: _WritableStream, objs: list[Any]) -> None:
+    """
+    Write a batch of objects to a stream, as items of a top-level block sequence.
+
+    The output is identical to dumping each item on its own, and then prefixing its first line
+    with `- ` and every other line (including empty lines in multi-line scalars) with two spaces,
+    which is how each item used to be written. Emitting a batch of items as a single sequence
+    with one emitter is several times faster.
+    """
+    if objs:
+        stream.write(_YAML_EMPTY_LINE_RE.sub(b'\n  ', _yaml_dump_batch(objs)))
+
+
+def _yaml_dump_sequence_from_generator(stream: _WritableStream, generator: Iterable[Any]) -> None:
+    for batch in chunked(generator, YAML_BATCH_SIZE):
+        _yaml_dump_sequence(stream, batch)
+
+
+class _JSONArrayWriter:
+    """Write a JSON array to a stream one item at a time, enclosed by a prefix and suffix."""
+
+    def __init__(self, stream: _WritableStream, *, prefix: bytes = b'[', suffix: bytes = b']'):
+        self._stream = stream
+        self._suffix = suffix
+        self._empty = True
+        stream.write(prefix)
+
+    def write(self, obj: Any) -> None:
+        if not self._empty:
+            self._stream.write(b',')
+        self._empty = False
+        self._stream.write(JSONRenderer().render(obj))
+
+    def close(self) -> None:
+        self._stream.write(self._suffix)
+
+
+def _collection_jsonld_writer(stream: _WritableStream, version: Version) -> _JSONArrayWriter:
+    # Render everything except the members, and then open the hasMember array in place of the
+    # closing brace, so that the output is identical to rendering the entire object at once
+    header = JSONRenderer().render(
+        {
+            '@context': version.metadata['@context'],
+            'id': version.metadata['id'],
+            '@type': 'prov:Collection',
+        }
+    )
+    return _JSONArrayWriter(stream, prefix=header[:-1] + b',"hasMember":[', suffix=b']}')
+
+
+class _JSONLinesWriter:
+    """Write objects to a stream as gzip compressed JSON lines."""
+
+    def __init__(self, stream: _WritableStream):
+        # Don't store a modification time, so that the output only depends on its contents
+        self._file = gzip.GzipFile(fileobj=stream, mode='wb', mtime=0)
+
+    def write(self, obj: Any) -> None:
+        self._file.write(JSONRenderer().render(obj) + b'\n')
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# The number of assets in each row group of the Parquet manifest
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+
+class _ParquetAssetsWriter:
+    """Write the key fields of each asset to a stream, as a Parquet table."""
+
+    def __init__(self, stream: _WritableStream):
+        self._schema = pa.schema(
+            [
+                ('asset_id', pa.string()),
+                ('path', pa.string()),
+                ('size', pa.int64()),
+                ('encodingFormat', pa.string()),
+                ('dandi_etag', pa.string()),
+                ('sha2_256', pa.string()),
+                ('zarr_checksum', pa.string()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(stream, self._schema)
+        self._rows: list[dict] = []
+
+    def write(self, obj: dict) -> None:
+        digest = obj.get('digest', {})
+        self._rows.append(
+            {
+                'asset_id': obj['identifier'],
+                'path': obj['path'],
+                'size': obj['contentSize'],
+                'encodingFormat': obj.get('encodingFormat'),
+                'dandi_etag': digest.get('dandi:dandi-etag'),
+                'sha2_256': digest.get('dandi:sha2-256'),
+                'zarr_checksum': digest.get('dandi:dandi-zarr-checksum'),
+            }
+        )
+        if len(self._rows) >= PARQUET_ROW_GROUP_SIZE:
+            self._write_row_group()
+
+    def _write_row_group(self) -> None:
+        self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self._schema))
+        self._rows = []
+
+    def close(self) -> None:
+        if self._rows:
+            self._write_row_group()
+        self._writer.close()
 
 
 def write_dandiset_jsonld(version: Version) -> None:
@@ -95,17 +472,12 @@ def write_dandiset_jsonld(version: Version) -> None:
 
 def write_assets_jsonld(version: Version) -> None:
     # Use full metadata when writing externally
-    assets_metadata = (
-        asset.full_metadata for asset in version.assets.select_related('blob', 'zarr').iterator()
-    )
+    assets_metadata = iter_full_metadata(version.assets.all())
     with _streaming_file_upload(_assets_jsonld_path(version)) as stream:
-        stream.write(b'[')
-        for i, obj in enumerate(assets_metadata):
-            if i > 0:
-                stream.write(b',')
-            stream.write(JSONRenderer().render(obj))
-
-        stream.write(b']')
+        writer = _JSONArrayWriter(stream)
+        for obj in assets_metadata:
+            writer.write(obj)
+        writer.close()
 
 
 def write_dandiset_yaml(version: Version) -> None:
@@ -120,28 +492,215 @@ def write_assets_yaml(version: Version) -> None:
         _yaml_dump_sequence_from_generator(
             stream,
             # Use full metadata when writing externally
-            (
-                asset.full_metadata
-                for asset in version.assets.select_related('blob', 'zarr')
-                .order_by('created')
-                .iterator()
-            ),
+            iter_full_metadata(version.assets.order_by('created')),
         )
 
 
 def write_collection_jsonld(version: Version) -> None:
-    asset_ids = [
-        Asset.dandi_asset_id(asset_id)
-        for asset_id in version.assets.values_list('asset_id', flat=True)
-    ]
+    asset_ids = version.assets.values_list('asset_id', flat=True)
     with _streaming_file_upload(_collection_jsonld_path(version)) as stream:
+        writer = _collection_jsonld_writer(stream, version)
+        for asset_id in asset_ids.iterator():
+            writer.write(Asset.dandi_asset_id(asset_id))
+        writer.close()
+
+
+def write_manifests(version: Version) -> None:
+    """
+    Write every manifest of a version.
+
+    The assets of the version are only iterated once, and each asset's full metadata is written
+    to all of the asset manifests (assets.yaml, assets.jsonld, assets.jsonl.gz, assets.parquet and
+    collection.jsonld) as it is produced. All manifests are streamed to storage as they are
+    written.
+    """
+    write_dandiset_yaml(version)
+    write_dandiset_jsonld(version)
+
+    with ExitStack() as stack:
+
+        def open_stream(path: str) -> _MultipartUploadStream:
+            return stack.enter_context(_streaming_file_upload(path))
+
+        yaml_stream = open_stream(_assets_yaml_path(version))
+        writers = [
+            _JSONArrayWriter(open_stream(_assets_jsonld_path(version))),
+            _JSONLinesWriter(open_stream(_assets_jsonl_gz_path(version))),
+            _ParquetAssetsWriter(open_stream(_assets_parquet_path(version))),
+        ]
+        collection_writer = _collection_jsonld_writer(
+            open_stream(_collection_jsonld_path(version)), version
+        )
+
+        # Use full metadata when writing externally
+        assets_metadata = iter_full_metadata(version.assets.order_by('created'))
+        for batch in chunked(assets_metadata, YAML_BATCH_SIZE):
+            _yaml_dump_sequence(yaml_stream, batch)
+            for obj in batch:
+                for writer in writers:
+                    writer.write(obj)
+                collection_writer.write(obj['id'])
+
+        for writer in [*writers, collection_writer]:
+            writer.close()
+
+
+# The average number of assets in each chunk of the draft asset manifests
+DRAFT_MANIFEST_CHUNK_SIZE = 1_000
+# The maximum number of assets in a chunk, which bounds the size of the largest chunk
+DRAFT_MANIFEST_MAX_CHUNK_SIZE = 4 * DRAFT_MANIFEST_CHUNK_SIZE
+# How long a task's claim on writing the manifests lasts. This is longer than the time limit of
+# write_manifest_files, so that a claim is only taken over once its task must have stopped.
+DRAFT_MANIFEST_CLAIM = timedelta(minutes=10)
+
+
+def _iter_asset_chunks(assets: QuerySet[Asset]) -> Iterator[list[Asset]]:
+    """
+    Split the assets of a version into content-defined chunks.
+
+    A chunk ends after any asset whose asset_id is divisible by the chunk size. As asset IDs are
+    random, this gives chunks of the desired size on average, and adding or removing an asset only
+    ever changes the chunk which contains it, rather than shifting the boundaries of every chunk
+    after it.
+    """
+    chunk: list[Asset] = []
+    for asset in assets.iterator(chunk_size=DRAFT_MANIFEST_CHUNK_SIZE):
+        chunk.append(asset)
+        if (
+            asset.asset_id.int % DRAFT_MANIFEST_CHUNK_SIZE == 0
+            or len(chunk) >= DRAFT_MANIFEST_MAX_CHUNK_SIZE
+        ):
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_assets_chunk(version: Version, digest: str, assets: list[Asset]) -> None:
+    assets_metadata = full_metadata_many(assets)
+    with _streaming_file_upload(_assets_chunk_path(version, digest, 'yaml')) as stream:
+        _yaml_dump_sequence_from_generator(stream, assets_metadata)
+    with _streaming_file_upload(_assets_chunk_path(version, digest, 'jsonld')) as stream:
+        writer = _JSONArrayWriter(stream)
+        for obj in assets_metadata:
+            writer.write(obj)
+        writer.close()
+
+
+def _write_assets_index(version: Version, chunks: list[dict]) -> None:
+    with _streaming_file_upload(_assets_index_path(version)) as stream:
         stream.write(
             JSONRenderer().render(
                 {
-                    '@context': version.metadata['@context'],
-                    'id': version.metadata['id'],
-                    '@type': 'prov:Collection',
-                    'hasMember': asset_ids,
-                },
+                    'count': sum(chunk['count'] for chunk in chunks),
+                    'chunks': [
+                        {
+                            'count': chunk['count'],
+                            'assets.yaml': _assets_chunk_name(chunk['digest'], 'yaml'),
+                            'assets.jsonld': _assets_chunk_name(chunk['digest'], 'jsonld'),
+                        }
+                        for chunk in chunks
+                    ],
+                }
             )
         )
+
+
+def _claim_draft_manifests(version: Version) -> tuple[VersionManifest, datetime] | None:
+    """
+    Claim the writing of the manifests of a draft version, if they are out of date.
+
+    Returns the state of the manifests and the watermark to write them up to, or `None` if they
+    are up to date, or another task is currently writing them.
+    """
+    VersionManifest.objects.get_or_create(version=version)
+    with transaction.atomic():
+        state = VersionManifest.objects.select_for_update().get(version=version)
+        now = timezone.now()
+        if state.writing_since is not None and state.writing_since > now - DRAFT_MANIFEST_CLAIM:
+            return None
+
+        # Read the watermark before anything else, so that any concurrent change is picked up by
+        # the next run
+        watermark = Version.objects.values_list('modified', flat=True).get(id=version.id)
+        if state.watermark is not None and state.watermark >= watermark:
+            return None
+
+        state.writing_since = now
+        state.save(update_fields=['writing_since'])
+
+    return state, watermark
+
+
+def write_draft_manifests(version: Version) -> bool:
+    """
+    Incrementally write the manifests of a draft version.
+
+    Nothing is written if the version hasn't been modified since the manifests were last written.
+    Otherwise, the asset manifests are written as chunks, which are listed in order by an index
+    file (assets.index.json). Each chunk is named by a digest of the full metadata fingerprints of
+    its assets, so only chunks containing an added, removed or changed asset are written again.
+    Concatenating the YAML chunks in order gives the same output as a complete assets.yaml.
+
+    Every chunk is recorded as soon as it is written, and no lock is held while writing, so a write
+    which is interrupted (e.g. by the task time limit) resumes where it stopped on the next run.
+
+    Returns whether the manifests were written. If another task is currently writing the manifests
+    of this version, this returns immediately.
+    """
+    if version.version != 'draft':
+        raise ValueError('Only draft versions have incremental manifests.')
+
+    claim = _claim_draft_manifests(version)
+    if claim is None:
+        return False
+    state, watermark = claim
+
+    try:
+        metadata_digest = hashlib.sha256(JSONRenderer().render(version.metadata)).hexdigest()
+        if metadata_digest != state.metadata_digest:
+            write_dandiset_yaml(version)
+            write_dandiset_jsonld(version)
+
+        previous_digests = {chunk['digest'] for chunk in state.chunks}
+        chunks = []
+        assets = version.assets.select_related('blob', 'zarr').order_by('created', 'id')
+        for assets_chunk in _iter_asset_chunks(assets):
+            fingerprints = '\0'.join(full_metadata_fingerprint(asset) for asset in assets_chunk)
+            digest = hashlib.sha256(fingerprints.encode()).hexdigest()
+            if digest not in previous_digests and digest not in state.written_chunks:
+                _write_assets_chunk(version, digest, assets_chunk)
+                state.written_chunks.append(digest)
+                state.save(update_fields=['written_chunks'])
+            chunks.append({'digest': digest, 'count': len(assets_chunk)})
+
+        if chunks != state.chunks:
+            _write_assets_index(version, chunks)
+            write_collection_jsonld(version)
+
+            # Only remove the chunks which are no longer listed once the new index is in place
+            storage = AssetBlob.blob.field.storage
+            current_digests = {chunk['digest'] for chunk in chunks}
+            for digest in (previous_digests | set(state.written_chunks)) - current_digests:
+                storage.delete(_assets_chunk_path(version, digest, 'yaml'))
+                storage.delete(_assets_chunk_path(version, digest, 'jsonld'))
+
+        # Drafts used to get complete asset manifests, which the index replaces
+        if state.watermark is None:
+            storage = AssetBlob.blob.field.storage
+            storage.delete(_assets_yaml_path(version))
+            storage.delete(_assets_jsonld_path(version))
+    except BaseException:
+        # Release the claim, keeping the chunks which were written
+        state.writing_since = None
+        state.save(update_fields=['writing_since'])
+        raise
+
+    state.watermark = watermark
+    state.metadata_digest = metadata_digest
+    state.chunks = chunks
+    state.written_chunks = []
+    state.writing_since = None
+    state.save()
+
+    return True
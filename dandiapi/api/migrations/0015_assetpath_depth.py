@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0014_auditrecord_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assetpath',
+            name='path',
+            field=models.CharField(db_collation='C', max_length=512),
+        ),
+        migrations.AddField(
+            model_name='assetpath',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        # Populate depth for all existing paths. This is a single pass over the paths table, which
+        # is small compared to the relation table. Removing the (now unused) relation rows is
+        # handled separately by the `migrate_asset_path_index` management command.
+        migrations.RunSQL(
+            sql=(
+                'UPDATE api_assetpath '
+                "SET depth = length(path) - length(replace(path, '/', '')) "
+                "WHERE path LIKE '%/%'"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='assetpath',
+            index=models.Index(
+                fields=['version', 'depth', 'path'], name='asset-path-version-depth'
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0015_assetpath_depth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='asset_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        # Populate both from the root paths of each version, in a single pass
+        migrations.RunSQL(
+            sql=(
+                'UPDATE api_version AS v '
+                'SET asset_count = t.files, size = t.size '
+                'FROM ('
+                'SELECT version_id, sum(aggregate_files) AS files, sum(aggregate_size) AS size '
+                'FROM api_assetpath WHERE depth = 0 GROUP BY version_id'
+                ') AS t '
+                'WHERE v.id = t.version_id'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    # The asset table is large, so the indexes are built without locking it against writes
+    atomic = False
+
+    dependencies = [
+        ('api', '0016_version_asset_count_size'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='asset',
+            index=models.Index(
+                OpClass(Upper('path'), name='text_pattern_ops'), name='asset-path-upper-pattern'
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='asset',
+            index=GinIndex(fields=['path'], name='asset-path-trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
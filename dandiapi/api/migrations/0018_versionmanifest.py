@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0017_asset_path_glob_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionManifest',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('watermark', models.DateTimeField(blank=True, default=None, null=True)),
+                ('metadata_digest', models.CharField(blank=True, max_length=64)),
+                ('chunks', models.JSONField(blank=True, default=list)),
+                (
+                    'version',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='manifest',
+                        to='api.version',
+                    ),
+                ),
+            ],
+        ),
+    ]
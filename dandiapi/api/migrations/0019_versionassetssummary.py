@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0018_versionmanifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionAssetsSummary',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('number_of_files', models.PositiveBigIntegerField(default=0)),
+                ('number_of_bytes', models.PositiveBigIntegerField(default=0)),
+                (
+                    'version',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='assets_summary',
+                        to='api.version',
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VersionAssetsSummaryValue',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                (
+                    'key',
+                    models.CharField(
+                        choices=[
+                            ('approach', 'Approach'),
+                            ('measurementTechnique', 'Measurement Technique'),
+                            ('variableMeasured', 'Variable Measured'),
+                            ('species', 'Species'),
+                            ('dataStandard', 'Data Standard'),
+                            ('subject', 'Subject'),
+                            ('cell', 'Cell'),
+                            ('slice', 'Slice'),
+                            ('tissuesample', 'Tissue Sample'),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ('value', models.JSONField()),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                (
+                    'summary',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='values',
+                        to='api.versionassetssummary',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='versionassetssummaryvalue',
+            constraint=models.UniqueConstraint(
+                fields=('summary', 'key', 'value'), name='unique-assets-summary-value'
+            ),
+        ),
+    ]
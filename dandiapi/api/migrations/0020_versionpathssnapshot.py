@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+import rest_framework.utils.encoders
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0019_versionassetssummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionPathsSnapshot',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('has_webknossos', models.BooleanField(default=False)),
+                (
+                    'version',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='paths_snapshot',
+                        to='api.version',
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VersionPathsSnapshotChunk',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('folder', models.CharField(db_collation='C', max_length=512)),
+                ('index', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField()),
+                (
+                    'results',
+                    models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder),
+                ),
+                (
+                    'snapshot',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='chunks',
+                        to='api.versionpathssnapshot',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='versionpathssnapshotchunk',
+            constraint=models.UniqueConstraint(
+                fields=('snapshot', 'folder', 'index'), name='unique-paths-snapshot-chunk'
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0020_versionpathssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionmanifest',
+            name='written_chunks',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='versionmanifest',
+            name='writing_since',
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
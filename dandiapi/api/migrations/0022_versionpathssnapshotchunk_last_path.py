@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0021_versionmanifest_written_chunks_writing_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionpathssnapshotchunk',
+            name='last_path',
+            field=models.CharField(blank=True, db_collation='C', default='', max_length=512),
+            preserve_default=False,
+        ),
+        # The chunks of an empty folder keep an empty last path
+        migrations.RunSQL(
+            sql=(
+                'UPDATE api_versionpathssnapshotchunk '
+                "SET last_path = results->-1->>'path' "
+                'WHERE jsonb_array_length(results) > 0'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='versionpathssnapshotchunk',
+            index=models.Index(
+                fields=['snapshot', 'folder', 'last_path'], name='paths-snapshot-chunk-last-path'
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0022_versionpathssnapshotchunk_last_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetFullMetadata',
+            fields=[
+                (
+                    'asset',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='materialized_metadata',
+                        serialize=False,
+                        to='api.asset',
+                    ),
+                ),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('metadata', models.JSONField()),
+            ],
+        ),
+    ]
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from .asset import Asset, AssetBlob
+from .asset_metadata import AssetFullMetadata
 from .asset_paths import AssetPath, AssetPathRelation
+from .assets_summary import VersionAssetsSummary, VersionAssetsSummaryValue
 from .audit import AuditRecord
 from .dandiset import Dandiset
+from .manifest import VersionManifest
 from .oauth import StagingApplication
+from .paths_snapshot import VersionPathsSnapshot, VersionPathsSnapshotChunk
 from .upload import Upload
 from .user import UserMetadata
 from .version import Version
@@ -13,6 +17,7 @@ from .webknossos import WebKnossosAnnotation, WebKnossosDataset, WebKnossosDataL
 __all__ = [
     'Asset',
     'AssetBlob',
+    'AssetFullMetadata',
     'AssetPath',
     'AssetPathRelation',
     'AuditRecord',
@@ -21,6 +26,11 @@ __all__ = [
     'Upload',
     'UserMetadata',
     'Version',
+    'VersionAssetsSummary',
+    'VersionAssetsSummaryValue',
+    'VersionManifest',
+    'VersionPathsSnapshot',
+    'VersionPathsSnapshotChunk',
     'WebKnossosAnnotation',
     'WebKnossosDataset',
     'WebKnossosDataLayer'
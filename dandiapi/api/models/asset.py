@@ -5,16 +5,16 @@ import logging
 import os
 import re
 from typing import TYPE_CHECKING
-from urllib.parse import urlparse, urlunparse
 import uuid
 
 from dandischema.models import AccessType
 from django.conf import settings
-from django.contrib.postgres.indexes import HashIndex
+from django.contrib.postgres.indexes import GinIndex, HashIndex, OpClass
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Upper
 from django.urls import reverse
 from django_extensions.db.models import TimeStampedModel
 
@@ -108,10 +108,7 @@ class AssetBlob(TimeStampedModel):
 
     @property
     def s3_url(self) -> str:
-        signed_url = self.blob.url
-        # Strip off the query parameters from the presigning, as they are different every time
-        parsed = urlparse(signed_url)
-        return urlunparse((parsed[0], parsed[1], parsed[2], '', '', ''))
+        return self.blob.storage.unsigned_object_url(self.blob.name)
 
     def __str__(self) -> str:
         return self.blob.name
@@ -172,6 +169,14 @@ class Asset(PublishableMetadataMixin, TimeStampedModel):
                 ),
             ),
         ]
+        indexes = [
+            # Serve case-insensitive prefix matches of glob patterns (see `dandiapi.api.asset_glob`)
+            models.Index(
+                OpClass(Upper('path'), name='text_pattern_ops'), name='asset-path-upper-pattern'
+            ),
+            # Serve case-insensitive regex matches of glob patterns without a literal prefix
+            GinIndex(fields=['path'], opclasses=['gin_trgm_ops'], name='asset-path-trgm'),
+        ]
 
     @property
     def is_blob(self):
@@ -215,14 +220,18 @@ class Asset(PublishableMetadataMixin, TimeStampedModel):
 
     @property
     def s3_uri(self) -> str:
-        if self.s3_url is None:
+        return self.s3_uri_from_url(self.s3_url)
+
+    @staticmethod
+    def s3_uri_from_url(s3_url: str | None) -> str:
+        if s3_url is None:
             raise ValueError("s3_url cannot be None")
 
         s3_url_substring = None
-        if self.s3_url.startswith("https://"):
-            s3_url_substring = self.s3_url[len("https://"):]
-        elif self.s3_url.startswith("http://"):
-            s3_url_substring = self.s3_url[len("http://"):]
+        if s3_url.startswith("https://"):
+            s3_url_substring = s3_url[len("https://"):]
+        elif s3_url.startswith("http://"):
+            s3_url_substring = s3_url[len("http://"):]
 
         if s3_url_substring is None:
             raise ValueError("s3_url must start with 'https://' or 'http://'")
@@ -236,7 +245,6 @@ class Asset(PublishableMetadataMixin, TimeStampedModel):
 
         return f"s3://{bucket_name}{path}"
 
-
     def is_different_from(
         self,
         *,
@@ -272,10 +280,18 @@ class Asset(PublishableMetadataMixin, TimeStampedModel):
             'asset-download',
             kwargs={'asset_id': str(self.asset_id)},
         )
+        return self.build_full_metadata(download_url=download_url, s3_url=self.s3_url)
+
+    def build_full_metadata(self, *, download_url: str, s3_url: str) -> dict:
+        """
+        Build the full metadata of this asset, given its (already computed) URLs.
 
+        This is split out from `full_metadata` so that the URLs of many assets can be computed
+        at once; see `dandiapi.api.asset_metadata`.
+        """
         neuroglancer_url = "Neuroglancer not supported for asset"
         try:
-            neuroglancer_url = construct_neuroglancer_url(self.s3_url)
+            neuroglancer_url = construct_neuroglancer_url(s3_url)
         except Exception:  # Catching all exceptions, but logging them
             logging.exception("Error constructing neuroglancer URL")
 
@@ -292,8 +308,8 @@ class Asset(PublishableMetadataMixin, TimeStampedModel):
             ],
             'path': self.path,
             'identifier': str(self.asset_id),
-            'contentUrl': [download_url, self.s3_url],
-            's3_uri': self.s3_uri,
+            'contentUrl': [download_url, s3_url],
+            's3_uri': self.s3_uri_from_url(s3_url),
             'contentSize': self.size,
             'digest': self.digest,
             'neuroglancerUrl': neuroglancer_url,
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .asset import Asset
+
+
+class AssetFullMetadata(models.Model):
+    """
+    The full metadata of an asset, materialized along with the fingerprint it was built from.
+
+    It's only served as long as the fingerprint of the asset still matches; see
+    `dandiapi.api.asset_metadata`.
+    """
+
+    asset = models.OneToOneField(
+        Asset, primary_key=True, related_name='materialized_metadata', on_delete=models.CASCADE
+    )
+    fingerprint = models.CharField(max_length=64)
+    metadata = models.JSONField()
+
+    def __str__(self) -> str:
+        return f'{self.asset}'
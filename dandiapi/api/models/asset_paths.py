@@ -4,7 +4,13 @@ from django.db import models
 
 
 class AssetPath(models.Model):
-    path = models.CharField(max_length=512)
+    # Use the C collation, so that prefix (LIKE 'foo/%') queries can be served by a btree index,
+    # and so that ordering by path is bytewise and consistent with `Asset.path`
+    path = models.CharField(max_length=512, db_collation='C')
+
+    # The number of slashes in `path`, i.e. zero for root paths. Together with a prefix match on
+    # `path`, this acts as a materialized path index for the tree of paths in a version.
+    depth = models.PositiveSmallIntegerField(default=0)
 
     # Protect deletion, since otherwise aggregate fields would become out of sync
     asset = models.ForeignKey(
@@ -37,11 +43,26 @@ class AssetPath(models.Model):
                 name='consistent-leaf-paths',
             ),
         ]
+        indexes = [
+            # Serves direct children (version, depth + 1, prefix) and root path lookups
+            models.Index(fields=['version', 'depth', 'path'], name='asset-path-version-depth'),
+        ]
 
     def __str__(self) -> str:
         return self.path
 
+    def save(self, *args, **kwargs):
+        self.depth = self.path_depth(self.path)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def path_depth(path: str) -> int:
+        return path.count('/')
+
 
+# DEPRECATED: This closure table is no longer written to or read from, as the tree is now
+# derived from `AssetPath.path` and `AssetPath.depth`. Existing rows are removed by the
+# `migrate_asset_path_index` management command, after which this table can be dropped.
 class AssetPathRelation(models.Model):
     # Give related name of child_links, because for any entry with parent=node,
     # all links from node.child_links have the form (parent=node, child=child_node)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .version import Version
+
+
+class VersionAssetsSummary(models.Model):
+    """The running totals of the valid assets of a draft version, rendered into assetsSummary."""
+
+    version = models.OneToOneField(Version, related_name='assets_summary', on_delete=models.CASCADE)
+    number_of_files = models.PositiveBigIntegerField(default=0)
+    number_of_bytes = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.version}'
+
+
+class VersionAssetsSummaryValue(models.Model):
+    """The number of valid assets of a draft version which contribute a value to assetsSummary."""
+
+    class Key(models.TextChoices):
+        APPROACH = 'approach'
+        MEASUREMENT_TECHNIQUE = 'measurementTechnique'
+        VARIABLE_MEASURED = 'variableMeasured'
+        SPECIES = 'species'
+        DATA_STANDARD = 'dataStandard'
+        SUBJECT = 'subject'
+        CELL = 'cell'
+        SLICE = 'slice'
+        TISSUE_SAMPLE = 'tissuesample'
+
+    summary = models.ForeignKey(
+        VersionAssetsSummary, related_name='values', on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=32, choices=Key.choices)
+    value = models.JSONField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['summary', 'key', 'value'], name='unique-assets-summary-value'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.summary}: {self.key}={self.value}'
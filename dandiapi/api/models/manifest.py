@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .version import Version
+
+
+class VersionManifest(models.Model):
+    """The state of the incrementally written manifests of a draft version."""
+
+    version = models.OneToOneField(Version, related_name='manifest', on_delete=models.CASCADE)
+    # The `modified` time of the version which the manifests are up to date with
+    watermark = models.DateTimeField(null=True, default=None, blank=True)
+    # A digest of the rendered version metadata, in dandiset.yaml and dandiset.jsonld
+    metadata_digest = models.CharField(max_length=64, blank=True)
+    # The digest and number of assets of each chunk of the asset manifests, in order
+    chunks = models.JSONField(default=list, blank=True)
+    # The digests of the chunks written since the index was last written, so that an interrupted
+    # write resumes where it stopped, and chunks which never made it into the index are deleted
+    written_chunks = models.JSONField(default=list, blank=True)
+    # When a task started writing the manifests, which keeps any other task from writing them
+    writing_since = models.DateTimeField(null=True, default=None, blank=True)
+
+    def __str__(self) -> str:
+        return f'{self.version}'
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
+
+from .version import Version
+
+
+class VersionPathsSnapshot(models.Model):
+    """The precomputed folder listings of a published version."""
+
+    version = models.OneToOneField(Version, related_name='paths_snapshot', on_delete=models.CASCADE)
+    # Whether any of the listed assets had webknossos info when the snapshot was built
+    has_webknossos = models.BooleanField(default=False)
+
+    def __str__(self) -> str:
+        return f'{self.version}'
+
+
+class VersionPathsSnapshotChunk(models.Model):
+    """A contiguous chunk of the serialized children of a folder in a paths snapshot."""
+
+    snapshot = models.ForeignKey(
+        VersionPathsSnapshot, related_name='chunks', on_delete=models.CASCADE
+    )
+    folder = models.CharField(max_length=512, db_collation='C')
+    index = models.PositiveIntegerField()
+    # The total number of children of the folder, across all of its chunks
+    count = models.PositiveIntegerField()
+    # The path of the last child in this chunk, so that the chunk which a cursor points into can
+    # be looked up
+    last_path = models.CharField(max_length=512, blank=True, db_collation='C')
+    # Serialized with the same encoder as API responses, as that is what these are served as
+    results = models.JSONField(encoder=JSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['snapshot', 'folder', 'index'], name='unique-paths-snapshot-chunk'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['snapshot', 'folder', 'last_path'], name='paths-snapshot-chunk-last-path'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.snapshot}: {self.folder}/ [{self.index}]'
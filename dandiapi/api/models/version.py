@@ -11,7 +11,6 @@ from django.db import models
 from django.db.models.query_utils import Q
 from django_extensions.db.models import TimeStampedModel
 
-from dandiapi.api.asset_paths import get_root_paths
 from dandiapi.api.models.metadata import PublishableMetadataMixin
 
 from .dandiset import Dandiset
@@ -46,6 +45,15 @@ class Version(PublishableMetadataMixin, TimeStampedModel):
     )
     validation_errors = models.JSONField(default=list, blank=True, null=True)
 
+    # The total number of files and bytes in this version. These are kept up to date by the
+    # asset path maintenance code (see `dandiapi.api.asset_paths`), and can be recomputed with
+    # the `reconcile_version_totals` management command.
+    asset_count = models.PositiveBigIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)
+
+    # Fields which are only ever changed with atomic updates, and so are never written by `save`
+    COUNTER_FIELDS = ('asset_count', 'size')
+
     class Meta:
         ordering = ['version']
         unique_together = ['dandiset', 'version']
@@ -60,17 +68,6 @@ class Version(PublishableMetadataMixin, TimeStampedModel):
             HashIndex(fields=['name']),
         ]
 
-    @property
-    def asset_count(self):
-        return get_root_paths(self).aggregate(nfiles=models.Sum('aggregate_files'))['nfiles'] or 0
-
-    @property
-    def size(self):
-        return (
-            get_root_paths(self).aggregate(total_size=models.Sum('aggregate_size'))['total_size']
-            or 0
-        )
-
     @property
     def active_uploads(self):
         return self.dandiset.uploads.count() if self.version == 'draft' else 0
@@ -244,6 +241,16 @@ class Version(PublishableMetadataMixin, TimeStampedModel):
 
     def save(self, *args, **kwargs):
         self.metadata = self._populate_metadata()
+
+        # The counters of an existing version may have been changed since this instance was
+        # loaded, so they must not be overwritten with the values it holds
+        if not self._state.adding and self.pk is not None and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
-from dandiapi.api.asset_paths import add_asset_paths, delete_asset_paths, get_conflicting_paths
+from dandiapi.api.asset_paths import (
+    CONFLICTING_PATHS_SAMPLE_SIZE,
+    add_asset_paths,
+    delete_asset_paths,
+    extract_paths,
+    get_conflicting_paths,
+    get_conflicting_paths_many,
+    update_version_asset_paths,
+)
 from dandiapi.api.models.asset import Asset, AssetBlob
 from dandiapi.api.models.dandiset import Dandiset
 from dandiapi.api.models.version import Version
@@ -17,19 +27,71 @@ from dandiapi.api.services.asset.exceptions import (
     DraftDandisetNotModifiableError,
     ZarrArchiveBelongsToDifferentDandisetError,
 )
+from dandiapi.api.services.metadata.assets_summary import update_version_assets_summary
 from dandiapi.api.tasks import remove_asset_blob_embargoed_tag_task
 
 if TYPE_CHECKING:
+    from dandiapi.api.asset_paths import PathConflict
     from dandiapi.zarr.models import ZarrArchive
 
 
-def _create_asset(
+@dataclass
+class NewAsset:
+    """The metadata, and the blob or zarr archive, of an asset to be created."""
+
+    metadata: dict
+    asset_blob: AssetBlob | None = None
+    zarr_archive: ZarrArchive | None = None
+
+
+@dataclass
+class _BatchPaths:
+    """The paths which the assets of a batch may not be created at, as the batch is processed."""
+
+    existing_paths: set[str]
+    conflicts: dict[str, PathConflict]
+    # The paths of the assets which will be created, and all of their ancestors
+    batch_paths: set[str] = field(default_factory=set)
+    batch_folders: set[str] = field(default_factory=set)
+
+    def error(self, path: str, nodepaths: list[str]) -> Exception | None:
+        """Return the error that creating an asset at this path would raise, if any."""
+        if path in self.existing_paths or path in self.batch_paths:
+            return AssetAlreadyExistsError()
+        if path in self.conflicts:
+            return AssetPathConflictError(
+                new_path=path,
+                existing_paths=self.conflicts[path].paths,
+                count=self.conflicts[path].count,
+            )
+        if path in self.batch_folders or any(
+            nodepath in self.batch_paths for nodepath in nodepaths
+        ):
+            batch_conflicts = sorted(
+                other
+                for other in self.batch_paths
+                if other.startswith(f'{path}/') or other in nodepaths
+            )
+            return AssetPathConflictError(
+                new_path=path,
+                existing_paths=batch_conflicts[:CONFLICTING_PATHS_SAMPLE_SIZE],
+                count=len(batch_conflicts),
+            )
+        return None
+
+    def add(self, path: str, nodepaths: list[str]):
+        self.batch_paths.add(path)
+        self.batch_folders.update(nodepaths)
+
+
+def _build_asset(
     *,
     path: str,
     asset_blob: AssetBlob | None = None,
     zarr_archive: ZarrArchive | None = None,
     metadata: dict,
-):
+    validate_unique: bool = True,
+) -> Asset:
     metadata = Asset.strip_metadata(metadata)
 
     asset = Asset(
@@ -39,7 +101,21 @@ def _create_asset(
         metadata=metadata,
         status=Asset.Status.PENDING,
     )
-    asset.full_clean(validate_constraints=False)
+    asset.full_clean(validate_unique=validate_unique, validate_constraints=False)
+
+    return asset
+
+
+def _create_asset(
+    *,
+    path: str,
+    asset_blob: AssetBlob | None = None,
+    zarr_archive: ZarrArchive | None = None,
+    metadata: dict,
+):
+    asset = _build_asset(
+        path=path, asset_blob=asset_blob, zarr_archive=zarr_archive, metadata=metadata
+    )
     asset.save()
 
     return asset
@@ -63,6 +139,7 @@ def _add_asset_to_version(
     Version.objects.filter(id=version.id).update(
         status=Version.Status.PENDING, modified=timezone.now()
     )
+    update_version_assets_summary(version, added=[asset])
 
     return asset
 
@@ -76,6 +153,7 @@ def _remove_asset_from_version(*, asset: Asset, version: Version):
     Version.objects.filter(id=version.id).update(
         status=Version.Status.PENDING, modified=timezone.now()
     )
+    update_version_assets_summary(version, removed=[asset])
 
 
 def change_asset(  # noqa: PLR0913
@@ -159,28 +237,19 @@ def add_asset_to_version(
         raise AssetAlreadyExistsError
 
     # Check if there are any assets that conflict with this path
-    conflicts = get_conflicting_paths(path, version)
-    if conflicts:
-        raise AssetPathConflictError(new_path=path, existing_paths=conflicts)
+    conflict = get_conflicting_paths(path, version)
+    if conflict is not None:
+        raise AssetPathConflictError(
+            new_path=path, existing_paths=conflict.paths, count=conflict.count
+        )
 
     # Ensure zarr archive doesn't already belong to a dandiset
     if zarr_archive and zarr_archive.dandiset != version.dandiset:
         raise ZarrArchiveBelongsToDifferentDandisetError
 
     with transaction.atomic():
-        # Creating an asset in an OPEN dandiset that points to an
-        # embargoed blob results in that blob being unembargoed.
-        # NOTE: This only applies to asset blobs, as zarrs cannot belong to
-        # multiple dandisets at once.
-        if (
-            asset_blob is not None
-            and asset_blob.embargoed
-            and version.dandiset.embargo_status == Dandiset.EmbargoStatus.OPEN
-        ):
-            AssetBlob.objects.filter(blob_id=asset_blob.blob_id).update(embargoed=False)
-            transaction.on_commit(
-                lambda: remove_asset_blob_embargoed_tag_task.delay(blob_id=asset_blob.blob_id)
-            )
+        if asset_blob is not None:
+            _unembargo_asset_blobs([asset_blob], version=version)
 
         asset = _add_asset_to_version(
             version=version,
@@ -193,6 +262,112 @@ def add_asset_to_version(
     return asset
 
 
+def _unembargo_asset_blobs(asset_blobs: list[AssetBlob], version: Version):
+    # Creating an asset in an OPEN dandiset that points to an
+    # embargoed blob results in that blob being unembargoed.
+    # NOTE: This only applies to asset blobs, as zarrs cannot belong to
+    # multiple dandisets at once.
+    if version.dandiset.embargo_status != Dandiset.EmbargoStatus.OPEN:
+        return
+
+    blob_ids = {asset_blob.blob_id for asset_blob in asset_blobs if asset_blob.embargoed}
+    if not blob_ids:
+        return
+
+    AssetBlob.objects.filter(blob_id__in=blob_ids).update(embargoed=False)
+    for blob_id in blob_ids:
+        transaction.on_commit(
+            lambda blob_id=blob_id: remove_asset_blob_embargoed_tag_task.delay(blob_id=blob_id)
+        )
+
+
+def _check_new_asset(new_asset: NewAsset):
+    if not new_asset.asset_blob and not new_asset.zarr_archive:
+        raise RuntimeError(
+            'One of zarr_archive or asset_blob must be given to add_assets_to_version'
+        )
+    if 'path' not in new_asset.metadata:
+        raise RuntimeError('Path must be present in metadata')
+
+
+def add_assets_to_version(
+    *, user, version: Version, new_assets: list[NewAsset]
+) -> list[Asset | Exception]:
+    """
+    Create many assets at once, adding them to a version.
+
+    Returns, for each new asset in order, either the created asset, or the error that
+    `add_asset_to_version` would have raised for it. Paths are checked against the version and
+    against each other set-wise, and all assets that can be created are inserted, along with
+    their paths and audit records, in bulk within a single transaction.
+    """
+    for new_asset in new_assets:
+        _check_new_asset(new_asset)
+
+    if not user.has_perm('owner', version.dandiset):
+        raise DandisetOwnerRequiredError
+    if version.version != 'draft':
+        raise DraftDandisetNotModifiableError
+
+    paths = [new_asset.metadata['path'] for new_asset in new_assets]
+    batch = _BatchPaths(
+        existing_paths=set(version.assets.filter(path__in=paths).values_list('path', flat=True)),
+        conflicts=get_conflicting_paths_many(paths, version),
+    )
+
+    results: list[Asset | Exception] = []
+    assets: list[Asset] = []
+    for new_asset, path in zip(new_assets, paths, strict=True):
+        nodepaths = extract_paths(path)[:-1]
+        error = batch.error(path, nodepaths)
+        if error is None and (
+            new_asset.zarr_archive and new_asset.zarr_archive.dandiset != version.dandiset
+        ):
+            error = ZarrArchiveBelongsToDifferentDandisetError()
+        if error is not None:
+            results.append(error)
+            continue
+
+        try:
+            # The asset ID is a random UUID, so uniqueness is left to the database
+            asset = _build_asset(
+                path=path,
+                asset_blob=new_asset.asset_blob,
+                zarr_archive=new_asset.zarr_archive,
+                metadata=new_asset.metadata,
+                validate_unique=False,
+            )
+        except ValidationError as e:
+            results.append(e)
+            continue
+
+        results.append(asset)
+        assets.append(asset)
+        batch.add(path, nodepaths)
+
+    if not assets:
+        return results
+
+    with transaction.atomic():
+        _unembargo_asset_blobs(
+            [asset.blob for asset in assets if asset.blob is not None], version=version
+        )
+
+        Asset.objects.bulk_create(assets)
+        version.assets.add(*assets)
+        update_version_asset_paths(version, added=assets)
+
+        # Trigger a version metadata validation, as saving the version might change the metadata
+        Version.objects.filter(id=version.id).update(
+            status=Version.Status.PENDING, modified=timezone.now()
+        )
+        update_version_assets_summary(version, added=assets)
+
+        audit.add_assets(dandiset=version.dandiset, user=user, assets=assets)
+
+    return results
+
+
 def remove_asset_from_version(*, user, asset: Asset, version: Version) -> Version:
     if not user.has_perm('owner', version.dandiset):
         raise DandisetOwnerRequiredError
@@ -22,8 +22,11 @@ class AssetAlreadyExistsError(DandiError):
 class AssetPathConflictError(DandiError):
     http_status_code = status.HTTP_409_CONFLICT
 
-    def __init__(self, new_path: str, existing_paths: list[str]) -> None:
+    def __init__(self, new_path: str, existing_paths: list[str], count: int | None = None) -> None:
         message = f'Path of new asset "{new_path}" conflicts with existing assets: {existing_paths}'
+        # Only a sample of the existing paths may be given
+        if count is not None and count > len(existing_paths):
+            message += f' (and {count - len(existing_paths)} more)'
         super().__init__(message)
 
 
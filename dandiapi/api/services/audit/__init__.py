@@ -13,10 +13,10 @@ if TYPE_CHECKING:
     from dandiapi.zarr.models import ZarrArchive
 
 
-def _make_audit_record(
+def _build_audit_record(
     *, dandiset: Dandiset, user: User, record_type: AuditRecordType, details: dict
 ) -> AuditRecord:
-    audit_record = AuditRecord(
+    return AuditRecord(
         dandiset_id=dandiset.id,
         username=user.username,
         user_email=user.email,
@@ -24,6 +24,14 @@ def _make_audit_record(
         record_type=record_type,
         details=details,
     )
+
+
+def _make_audit_record(
+    *, dandiset: Dandiset, user: User, record_type: AuditRecordType, details: dict
+) -> AuditRecord:
+    audit_record = _build_audit_record(
+        dandiset=dandiset, user=user, record_type=record_type, details=details
+    )
     audit_record.save()
 
     return audit_record
@@ -85,6 +93,21 @@ def add_asset(*, dandiset: Dandiset, user: User, asset: Asset) -> AuditRecord:
     )
 
 
+def add_assets(*, dandiset: Dandiset, user: User, assets: list[Asset]) -> list[AuditRecord]:
+    """Record the addition of many assets at once, with one `add_asset` record per asset."""
+    return AuditRecord.objects.bulk_create(
+        [
+            _build_audit_record(
+                dandiset=dandiset,
+                user=user,
+                record_type='add_asset',
+                details=_asset_details(asset),
+            )
+            for asset in assets
+        ]
+    )
+
+
 def update_asset(*, dandiset: Dandiset, user: User, asset: Asset) -> AuditRecord:
     details = _asset_details(asset)
     return _make_audit_record(
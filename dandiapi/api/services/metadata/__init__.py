@@ -4,13 +4,17 @@ from typing import TYPE_CHECKING
 
 from celery.utils.log import get_task_logger
 import dandischema.exceptions
-from dandischema.metadata import aggregate_assets_summary, validate
+from dandischema.metadata import validate
 from django.conf import settings
 from django.db import transaction
 from django.db.models.query_utils import Q
 from django.utils import timezone
 
 from dandiapi.api.models import Asset, Version
+from dandiapi.api.services.metadata.assets_summary import (
+    update_asset_status_assets_summaries,
+    version_assets_summary,
+)
 from dandiapi.api.services.metadata.exceptions import (
     AssetHasBeenPublishedError,
     VersionHasBeenPublishedError,
@@ -79,6 +83,7 @@ def validate_asset_metadata(*, asset: Asset) -> bool:
         if updated_asset:
             # Update modified timestamps on all draft versions this asset belongs to
             asset.versions.filter(version='draft').update(modified=timezone.now())
+            update_asset_status_assets_summaries(asset, previous_status=asset_state)
         else:
             logger.info('Asset %s was modified while validating', asset.id)
 
@@ -89,12 +94,7 @@ def version_aggregate_assets_summary(version: Version) -> None:
     if version.version != 'draft':
         raise VersionHasBeenPublishedError
 
-    assets_summary = aggregate_assets_summary(
-        asset.full_metadata
-        for asset in version.assets.filter(status=Asset.Status.VALID)
-        .select_related('blob', 'zarr')
-        .iterator()
-    )
+    assets_summary = version_assets_summary(version)
 
     updated_metadata = {**version.metadata, 'assetsSummary': assets_summary}
 
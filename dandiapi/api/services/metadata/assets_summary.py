@@ -0,0 +1,505 @@
+"""
+Compute the assetsSummary of a version.
+
+The assetsSummary of a draft version is rendered from `VersionAssetsSummary`, a set of counters
+which are updated as valid assets are added to and removed from the version: for each value that
+an asset contributes (e.g. a species, or a subject identifier), the number of valid assets which
+contribute it is stored, and the value is rendered as long as that number is positive. Values are
+rendered in the order in which they were first counted. That is only the order of first appearance
+as long as no asset is removed: a value keeps its place after the asset which first contributed it
+is removed, even if the assets which still contribute it come after other values. So the lists of
+values of a summary are compared regardless of their order (see `assets_summaries_equal`).
+
+`aggregate_version_assets_summary` computes the same summary from scratch. It is equivalent to
+dandischema's `aggregate_assets_summary` over the full metadata of every valid asset of a
+version, but the metadata of each asset never leaves the database: a single query returns the
+totals, and the distinct values of each list field in order of first appearance, which is the
+order in which `aggregate_assets_summary` would have appended them.
+
+Only the values which dandischema transforms with Python-specific logic (the sanitization of
+subject and sample identifiers) are finished in Python, and the result is passed through the
+same `AssetsSummary` model, so that it's normalized in exactly the same way.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from itertools import chain
+import json
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Any
+
+from dandischema import models as dandischema_models
+from dandischema.utils import sanitize_value
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from more_itertools import ichunked
+
+from dandiapi.api.models import (
+    Asset,
+    AssetBlob,
+    Version,
+    VersionAssetsSummary,
+    VersionAssetsSummaryValue,
+)
+from dandiapi.zarr.models import ZarrArchive
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from django.db.models import QuerySet
+
+ASSET_TABLE = Asset._meta.db_table
+ASSET_BLOB_TABLE = AssetBlob._meta.db_table
+ZARR_TABLE = ZarrArchive._meta.db_table
+VERSION_ASSET_TABLE = Asset.versions.through._meta.db_table
+SUMMARY_VALUE_TABLE = VersionAssetsSummaryValue._meta.db_table
+
+SAMPLE_TYPES = ['cell', 'slice', 'tissuesample']
+
+
+def _array(expression: str) -> str:
+    # dandischema skips any missing (or null) list, so treat any non-array value as empty
+    return f"CASE WHEN jsonb_typeof({expression}) = 'array' THEN {expression} ELSE '[]' END"
+
+
+def _first_biosample(expression: str) -> str:
+    # dandischema only follows the first BioSample that an entity was derived from
+    return f"""
+        SELECT e.value FROM jsonb_array_elements({_array(expression)}) WITH ORDINALITY e
+        WHERE e.value->>'schemaKey' = 'BioSample'
+        ORDER BY e.ordinality
+        LIMIT 1
+    """  # noqa: S608
+
+
+ASSETS_SUMMARY_SQL = f"""
+WITH RECURSIVE assets AS (
+    SELECT
+        row_number() OVER (ORDER BY a.created, a.id) AS position,
+        a.metadata,
+        regexp_replace(a.path, '^.*/', '') AS name,
+        COALESCE(b.size, z.size, 0) AS size,
+        CASE
+            WHEN a.zarr_id IS NOT NULL THEN 'application/x-zarr'
+            ELSE COALESCE(a.metadata->>'encodingFormat', '')
+        END AS encoding_format
+    FROM {ASSET_TABLE} a
+    JOIN {VERSION_ASSET_TABLE} va ON va.asset_id = a.id
+    LEFT JOIN {ASSET_BLOB_TABLE} b ON b.id = a.blob_id
+    LEFT JOIN {ZARR_TABLE} z ON z.id = a.zarr_id
+    WHERE va.version_id = %(version_id)s AND a.status = %(status)s
+),
+participants AS (
+    SELECT a.position, p.ordinality, p.value
+    FROM assets a,
+        jsonb_array_elements({_array("a.metadata->'wasAttributedTo'")}) WITH ORDINALITY p
+    WHERE p.value->>'schemaKey' = 'Participant'
+),
+listed AS (
+    SELECT 'approach' AS key, a.position, e.ordinality, e.value
+    FROM assets a, jsonb_array_elements({_array("a.metadata->'approach'")}) WITH ORDINALITY e
+    UNION ALL
+    SELECT 'measurementTechnique', a.position, e.ordinality, e.value
+    FROM assets a,
+        jsonb_array_elements({_array("a.metadata->'measurementTechnique'")}) WITH ORDINALITY e
+    UNION ALL
+    SELECT 'variableMeasured', a.position, e.ordinality, e.value->'value'
+    FROM assets a,
+        jsonb_array_elements({_array("a.metadata->'variableMeasured'")}) WITH ORDINALITY e
+    WHERE jsonb_typeof(e.value) = 'object' AND e.value ? 'value'
+    UNION ALL
+    SELECT 'species', p.position, p.ordinality, p.value->'species'
+    FROM participants p
+    WHERE p.value ? 'species'
+    UNION ALL
+    SELECT 'dataStandard', a.position, 1, %(nwb_standard)s::jsonb
+    FROM assets a
+    WHERE strpos(a.encoding_format, 'nwb') > 0
+    UNION ALL
+    SELECT 'dataStandard', a.position, 2, %(bids_standard)s::jsonb
+    FROM assets a
+    WHERE a.name = 'dataset_description.json'
+    UNION ALL
+    -- The suffixes of the name are exactly .ome and .zarr (ignoring any leading dots)
+    SELECT 'dataStandard', a.position, 3, %(ome_ngff_standard)s::jsonb
+    FROM assets a
+    WHERE a.name ~ '^\\.*[^.]+\\.ome\\.zarr$'
+),
+first_listed AS (
+    SELECT DISTINCT ON (key, value) key, value, position, ordinality
+    FROM listed
+    ORDER BY key, value, position, ordinality
+),
+biosamples AS (
+    SELECT s.value AS sample
+    FROM assets a, LATERAL ({_first_biosample("a.metadata->'wasDerivedFrom'")}) s
+    UNION ALL
+    SELECT s.value
+    FROM biosamples b, LATERAL ({_first_biosample("b.sample->'wasDerivedFrom'")}) s
+),
+name_parts AS (
+    SELECT part
+    FROM assets a, regexp_split_to_table(split_part(a.name, '.', 1), '_') part
+)
+SELECT
+    (SELECT count(*) FROM assets),
+    (SELECT COALESCE(sum(size), 0)::bigint FROM assets),
+    (
+        SELECT COALESCE(jsonb_object_agg(key, items), '{{}}')::text
+        FROM (
+            SELECT key, jsonb_agg(value ORDER BY position, ordinality) AS items
+            FROM first_listed
+            GROUP BY key
+        ) t
+    ),
+    (
+        SELECT COALESCE(jsonb_agg(DISTINCT p.value->>'identifier'), '[]')::text
+        FROM participants p
+        WHERE COALESCE(p.value->>'identifier', '') != ''
+    ),
+    (
+        SELECT COALESCE(jsonb_agg(DISTINCT replace(part, 'sub-', '')), '[]')::text
+        FROM name_parts
+        WHERE starts_with(part, 'sub-')
+    ),
+    (
+        SELECT COALESCE(jsonb_agg(DISTINCT jsonb_build_array(sample_type, identifier)), '[]')
+        FROM (
+            SELECT
+                sample->'sampleType'->>'name' AS sample_type,
+                sample->>'identifier' AS identifier
+            FROM biosamples
+        ) s
+        WHERE sample_type IS NOT NULL AND identifier IS NOT NULL
+    )::text,
+    (
+        SELECT COALESCE(jsonb_agg(DISTINCT replace(part, 'sample-', '')), '[]')::text
+        FROM name_parts
+        WHERE starts_with(part, 'sample-')
+    )
+"""  # noqa: S608
+
+
+def _assets_summary_query_params(version: Version) -> dict:
+    return {
+        'version_id': version.id,
+        'status': Asset.Status.VALID.value,
+        'nwb_standard': json.dumps(dandischema_models.nwb_standard),
+        'bids_standard': json.dumps(dandischema_models.bids_standard),
+        'ome_ngff_standard': json.dumps(dandischema_models.ome_ngff_standard),
+    }
+
+
+def aggregate_version_assets_summary(version: Version) -> dict:
+    """Return the assetsSummary of the valid assets of a version, computed in the database."""
+    with connection.cursor() as cursor:
+        cursor.execute(ASSETS_SUMMARY_SQL, _assets_summary_query_params(version))
+        row = cursor.fetchone()
+
+    number_of_files, number_of_bytes = row[0], row[1]
+    listed, participants, name_subjects, samples, name_samples = (json.loads(v) for v in row[2:])
+
+    stats: dict = {'numberOfBytes': number_of_bytes, 'numberOfFiles': number_of_files}
+    if number_of_files:
+        # dandischema initializes each of these lists when adding the first asset
+        for key in ['approach', 'measurementTechnique', 'variableMeasured', 'species']:
+            stats[key] = listed.get(key, [])
+        stats['dataStandard'] = listed.get('dataStandard', [])
+
+    subjects = {sanitize_value(identifier) for identifier in participants} | set(name_subjects)
+    samples_by_type: dict[str, set[str]] = {sample_type: set() for sample_type in SAMPLE_TYPES}
+    for sample_type, identifier in samples:
+        if sample_type in samples_by_type:
+            samples_by_type[sample_type].add(sanitize_value(identifier))
+    samples_by_type['tissuesample'].update(name_samples)
+
+    stats['numberOfSubjects'] = len(subjects) or None
+    stats['numberOfSamples'] = (
+        len(samples_by_type['tissuesample']) + len(samples_by_type['slice'])
+    ) or None
+    stats['numberOfCells'] = len(samples_by_type['cell']) or None
+
+    return dandischema_models.AssetsSummary(**stats).model_dump(mode='json', exclude_none=True)
+
+
+def _unordered(assets_summary: dict) -> dict:
+    return {
+        key: sorted(json.dumps(item, sort_keys=True) for item in value)
+        if isinstance(value, list)
+        else value
+        for key, value in assets_summary.items()
+    }
+
+
+def assets_summaries_equal(first: dict, second: dict) -> bool:
+    """Return whether two assetsSummaries are equal, regardless of the order of their lists."""
+    return _unordered(first) == _unordered(second)
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else []
+
+
+def _first_biosample_of(entity: dict) -> dict | None:
+    for value in _as_list(entity.get('wasDerivedFrom')):
+        if isinstance(value, dict) and value.get('schemaKey') == 'BioSample':
+            return value
+    return None
+
+
+def _listed_values(metadata: dict) -> Iterator[tuple[str, Any]]:
+    for key in ['approach', 'measurementTechnique']:
+        for value in _as_list(metadata.get(key)):
+            yield key, value
+    for value in _as_list(metadata.get('variableMeasured')):
+        if isinstance(value, dict) and 'value' in value:
+            yield 'variableMeasured', value['value']
+
+
+def _participant_values(metadata: dict) -> Iterator[tuple[str, Any]]:
+    for value in _as_list(metadata.get('wasAttributedTo')):
+        if isinstance(value, dict) and value.get('schemaKey') == 'Participant':
+            if 'species' in value:
+                yield 'species', value['species']
+            if value.get('identifier'):
+                yield 'subject', sanitize_value(value['identifier'])
+
+
+def _biosample_values(metadata: dict) -> Iterator[tuple[str, Any]]:
+    sample = _first_biosample_of(metadata)
+    while sample is not None:
+        sample_type = (sample.get('sampleType') or {}).get('name')
+        if sample_type in SAMPLE_TYPES and sample.get('identifier') is not None:
+            yield sample_type, sanitize_value(sample['identifier'])
+        sample = _first_biosample_of(sample)
+
+
+def _name_values(name: str) -> Iterator[tuple[str, Any]]:
+    for part in name.split('.')[0].split('_'):
+        if part.startswith('sub-'):
+            yield 'subject', part.replace('sub-', '')
+        if part.startswith('sample-'):
+            yield 'tissuesample', part.replace('sample-', '')
+
+
+def _data_standard_values(asset: Asset, name: str) -> Iterator[tuple[str, Any]]:
+    encoding_format = (
+        'application/x-zarr' if asset.is_zarr else asset.metadata.get('encodingFormat') or ''
+    )
+    if 'nwb' in encoding_format:
+        yield 'dataStandard', dandischema_models.nwb_standard
+    if name == 'dataset_description.json':
+        yield 'dataStandard', dandischema_models.bids_standard
+    if PurePosixPath(name).suffixes == ['.ome', '.zarr']:
+        yield 'dataStandard', dandischema_models.ome_ngff_standard
+
+
+def asset_summary_values(asset: Asset) -> list[tuple[str, Any]]:
+    """
+    Return the distinct (key, value) pairs which a valid asset contributes to assetsSummary.
+
+    This mirrors dandischema's `_add_asset_to_stats`, with the same leniency towards malformed
+    metadata as `ASSETS_SUMMARY_SQL`.
+    """
+    name = PurePosixPath(asset.path).name
+    values: list[tuple[str, Any]] = []
+    for item in chain(
+        _listed_values(asset.metadata),
+        _participant_values(asset.metadata),
+        _biosample_values(asset.metadata),
+        _name_values(name),
+        _data_standard_values(asset, name),
+    ):
+        # Values aren't necessarily hashable, so they are compared one by one
+        if item not in values:
+            values.append(item)
+
+    return values
+
+
+def _apply_assets_summary_deltas(
+    summary: VersionAssetsSummary, assets: Iterable[Asset], *, sign: int
+):
+    """Add (sign=1) or subtract (sign=-1) the contributions of valid assets to a summary."""
+    files = size = 0
+    # Map of (key, serialized value) -> number of assets, in order of first appearance
+    deltas: defaultdict[tuple[str, str], int] = defaultdict(int)
+    for asset in assets:
+        files += 1
+        size += asset.size
+        for key, value in asset_summary_values(asset):
+            deltas[key, json.dumps(value, sort_keys=True)] += 1
+
+    if not files:
+        return
+
+    VersionAssetsSummary.objects.filter(id=summary.id).update(
+        number_of_files=Greatest(F('number_of_files') + sign * files, 0),
+        number_of_bytes=Greatest(F('number_of_bytes') + sign * size, 0),
+    )
+
+    for batch in ichunked(deltas.items(), 5_000):
+        rows = [(summary.id, key, value, count) for (key, value), count in batch]
+        values = ', '.join(['(%s::bigint, %s, %s::jsonb, %s::bigint)'] * len(rows))
+        params = [param for row in rows for param in row]
+        with connection.cursor() as cursor:
+            if sign > 0:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {SUMMARY_VALUE_TABLE} AS t (summary_id, key, value, count)
+                    VALUES {values}
+                    ON CONFLICT (summary_id, key, value)
+                    DO UPDATE SET count = t.count + EXCLUDED.count
+                    """,  # noqa: S608
+                    params,
+                )
+            else:
+                cursor.execute(
+                    f"""
+                    UPDATE {SUMMARY_VALUE_TABLE} AS t
+                    SET count = GREATEST(t.count - v.count, 0)
+                    FROM (VALUES {values}) AS v (summary_id, key, value, count)
+                    WHERE t.summary_id = v.summary_id AND t.key = v.key AND t.value = v.value
+                    """,  # noqa: S608
+                    params,
+                )
+
+    if sign < 0:
+        VersionAssetsSummaryValue.objects.filter(summary=summary, count=0).delete()
+
+
+def _lock_version(version: Version):
+    # Adding and removing assets updates the version row first, so holding its lock serializes
+    # any changes to the counters with rebuilding them
+    Version.objects.select_for_update().filter(id=version.id).values_list('id').get()
+
+
+def _update_version_assets_summary(
+    version: Version, *, added: QuerySet[Asset], removed: QuerySet[Asset]
+):
+    _lock_version(version)
+    summary = VersionAssetsSummary.objects.filter(version=version).first()
+    if summary is None:
+        # The counters will be built from the assets of the version when first rendered
+        return
+
+    _apply_assets_summary_deltas(summary, removed.select_related('blob', 'zarr'), sign=-1)
+    _apply_assets_summary_deltas(
+        summary, added.select_related('blob', 'zarr').order_by('created', 'id'), sign=1
+    )
+
+
+@transaction.atomic
+def update_version_assets_summary(
+    version: Version, *, added: Iterable[Asset] = (), removed: Iterable[Asset] = ()
+):
+    """
+    Count the valid assets among `added`, and stop counting the valid assets among `removed`.
+
+    The status of each asset is read again, since it may have changed since it was loaded.
+    """
+    added_ids = [asset.id for asset in added]
+    removed_ids = [asset.id for asset in removed]
+    if not added_ids and not removed_ids:
+        return
+
+    valid_assets = Asset.objects.filter(status=Asset.Status.VALID)
+    _update_version_assets_summary(
+        version,
+        added=valid_assets.filter(id__in=added_ids),
+        removed=valid_assets.filter(id__in=removed_ids),
+    )
+
+
+@transaction.atomic
+def update_asset_status_assets_summaries(asset: Asset, *, previous_status: str):
+    """Start or stop counting an asset in its draft versions, after its status has changed."""
+    was_valid = previous_status == Asset.Status.VALID
+    if was_valid == (asset.status == Asset.Status.VALID):
+        return
+
+    assets = Asset.objects.filter(id=asset.id)
+    for version in asset.versions.filter(version='draft'):
+        _update_version_assets_summary(
+            version,
+            added=assets.none() if was_valid else assets,
+            removed=assets if was_valid else assets.none(),
+        )
+
+
+@transaction.atomic
+def update_zarr_assets_summaries(zarr: ZarrArchive, *, previous_size: int):
+    """Account for a change in the size of a zarr, in the draft versions of its valid assets."""
+    delta = zarr.size - previous_size
+    if not delta:
+        return
+
+    version_assets = (
+        Asset.versions.through.objects.filter(
+            asset__zarr=zarr, asset__status=Asset.Status.VALID, version__version='draft'
+        )
+        .values('version_id')
+        .annotate(assets=Count('asset_id'))
+    )
+    for row in version_assets:
+        _lock_version(Version(id=row['version_id']))
+        VersionAssetsSummary.objects.filter(version_id=row['version_id']).update(
+            number_of_bytes=Greatest(F('number_of_bytes') + delta * row['assets'], 0)
+        )
+
+
+@transaction.atomic
+def rebuild_version_assets_summary(version: Version) -> VersionAssetsSummary:
+    """Build the assetsSummary counters of a version from scratch."""
+    _lock_version(version)
+    VersionAssetsSummary.objects.filter(version=version).delete()
+    summary = VersionAssetsSummary.objects.create(version=version)
+
+    assets = (
+        version.assets.filter(status=Asset.Status.VALID)
+        .select_related('blob', 'zarr')
+        .order_by('created', 'id')
+    )
+    _apply_assets_summary_deltas(summary, assets.iterator(chunk_size=1_000), sign=1)
+
+    summary.refresh_from_db()
+    return summary
+
+
+def render_assets_summary(summary: VersionAssetsSummary) -> dict:
+    """Render the counters of a version as its assetsSummary."""
+    values: defaultdict[str, list] = defaultdict(list)
+    counted_values = VersionAssetsSummaryValue.objects.filter(summary=summary, count__gt=0)
+    for key, value in counted_values.order_by('id').values_list('key', 'value'):
+        values[key].append(value)
+
+    stats: dict = {
+        'numberOfBytes': summary.number_of_bytes,
+        'numberOfFiles': summary.number_of_files,
+    }
+    if summary.number_of_files:
+        for key in [
+            'approach',
+            'measurementTechnique',
+            'variableMeasured',
+            'species',
+            'dataStandard',
+        ]:
+            stats[key] = values[key]
+
+    stats['numberOfSubjects'] = len(values['subject']) or None
+    stats['numberOfSamples'] = (len(values['tissuesample']) + len(values['slice'])) or None
+    stats['numberOfCells'] = len(values['cell']) or None
+
+    return dandischema_models.AssetsSummary(**stats).model_dump(mode='json', exclude_none=True)
+
+
+def version_assets_summary(version: Version) -> dict:
+    """Render the assetsSummary of a draft version, building its counters if necessary."""
+    summary = VersionAssetsSummary.objects.filter(version=version).first()
+    if summary is None:
+        summary = rebuild_version_assets_summary(version)
+
+    return render_assets_summary(summary)
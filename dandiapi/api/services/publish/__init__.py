@@ -9,7 +9,7 @@ from django.db import transaction
 from more_itertools import ichunked
 
 from dandiapi.api import doi
-from dandiapi.api.asset_paths import add_version_asset_paths
+from dandiapi.api.asset_paths import add_version_asset_paths, copy_version_asset_paths
 from dandiapi.api.models import Asset, Dandiset, Version
 from dandiapi.api.services import audit
 from dandiapi.api.services.exceptions import NotAllowedError
@@ -21,7 +21,7 @@ from dandiapi.api.services.publish.exceptions import (
     DandisetNotLockedError,
     DandisetValidationPendingError,
 )
-from dandiapi.api.tasks import write_manifest_files
+from dandiapi.api.tasks import build_version_paths_snapshot_task, write_manifest_files
 
 if TYPE_CHECKING:
     from django.db.models import QuerySet
@@ -167,8 +167,14 @@ def _publish_dandiset(dandiset_id: int, user_id: int) -> None:
         )
         new_version.save()
 
-        # Add asset paths with new version
-        add_version_asset_paths(version=new_version)
+        # Copy asset paths from the draft, as the new version contains the exact same assets.
+        # If the draft's paths are somehow out of sync with its assets, rebuild them instead.
+        copy_version_asset_paths(source=old_version, target=new_version)
+        if (
+            new_version.asset_paths.filter(asset__isnull=False).count()
+            != new_version.assets.count()
+        ):
+            add_version_asset_paths(version=new_version)
 
         # Set the version of the draft to PUBLISHED so that it cannot be published again without
         # being modified and revalidated
@@ -183,6 +189,7 @@ def _publish_dandiset(dandiset_id: int, user_id: int) -> None:
         # Write updated manifest files and create DOI after
         # published version has been committed to DB.
         transaction.on_commit(lambda: write_manifest_files.delay(new_version.id))
+        transaction.on_commit(lambda: build_version_paths_snapshot_task.delay(new_version.id))
 
         def _create_doi(version_id: int):
             version = Version.objects.get(id=version_id)
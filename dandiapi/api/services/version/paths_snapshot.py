@@ -0,0 +1,204 @@
+"""
+Precomputed directory listings of published versions.
+
+A published version's asset paths never change, so the response of every folder listing can be
+rendered once and stored in a `VersionPathsSnapshot`. Each folder's direct children are stored in
+chunks of `SNAPSHOT_CHUNK_SIZE` serialized paths, so that any page can be served with a single
+indexed query, without listing or serializing any asset paths.
+
+Chunks are looked up by dandiset ID and version string (rather than version ID), as those are
+what the request URL contains. A page is looked up either by its offset, for page number
+pagination, or by the path it starts after, for the cursor pagination of the asset paths. Any
+missing chunk simply causes the caller to fall back to the asset paths.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+import logging
+from operator import itemgetter
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+
+from dandiapi.api.models import AssetPath, VersionPathsSnapshot, VersionPathsSnapshotChunk
+
+if TYPE_CHECKING:
+    from dandiapi.api.models import Version
+
+logger = logging.getLogger(__name__)
+
+# This is equal to the maximum page size, so no page ever spans more than two chunks
+SNAPSHOT_CHUNK_SIZE = 1_000
+# The number of chunks which are held in memory before they are inserted
+SNAPSHOT_BATCH_SIZE = 20
+
+
+def _parent_folder(path: str) -> str:
+    return path.rsplit('/', 1)[0] if '/' in path else ''
+
+
+def _folder_chunks(
+    snapshot: VersionPathsSnapshot, folder: str, results: list[dict]
+) -> list[VersionPathsSnapshotChunk]:
+    count = len(results)
+    return [
+        VersionPathsSnapshotChunk(
+            snapshot=snapshot,
+            folder=folder,
+            index=i // SNAPSHOT_CHUNK_SIZE,
+            count=count,
+            last_path=results[i : i + SNAPSHOT_CHUNK_SIZE][-1]['path'] if results else '',
+            results=results[i : i + SNAPSHOT_CHUNK_SIZE],
+        )
+        for i in range(0, max(count, 1), SNAPSHOT_CHUNK_SIZE)
+    ]
+
+
+def _has_webknossos(result: dict) -> bool:
+    return bool(result['asset'] and result['asset']['webknossos_info'])
+
+
+@transaction.atomic
+def build_version_paths_snapshot(version: Version) -> int:
+    """
+    Render and store the listing of every folder in a published version.
+
+    Any existing snapshot of the version is replaced in the same transaction, so readers never
+    see a partial snapshot. Paths are read in (depth, path) order, in which the children of each
+    folder are contiguous, so only a few chunks are held in memory at a time. Returns the number
+    of chunks written.
+    """
+    # Imported here to avoid a circular import, as the serializers import the models
+    from dandiapi.api.views.serializers import AssetPathsSerializer
+
+    if version.version == 'draft':
+        raise ValueError('Only published versions can be snapshotted.')
+
+    VersionPathsSnapshot.objects.filter(version=version).delete()
+    snapshot = VersionPathsSnapshot.objects.create(version=version)
+
+    paths = (
+        AssetPath.objects.filter(version=version)
+        .select_related('asset', 'asset__blob', 'asset__zarr')
+        .prefetch_related('asset__webknossos_datasets__webknossos_dataset__webknossos_annotations')
+        .order_by('depth', 'path')
+    )
+
+    written = 0
+    pending: list[VersionPathsSnapshotChunk] = []
+
+    def add_folder(folder: str, results: list[dict]):
+        nonlocal written
+        pending.extend(_folder_chunks(snapshot, folder, results))
+        if len(pending) >= SNAPSHOT_BATCH_SIZE:
+            VersionPathsSnapshotChunk.objects.bulk_create(pending)
+            written += len(pending)
+            pending.clear()
+
+    folder: str | None = None
+    results: list[dict] = []
+    for path in paths.iterator(chunk_size=SNAPSHOT_CHUNK_SIZE):
+        parent = _parent_folder(path.path)
+        if parent != folder:
+            if folder is not None:
+                add_folder(folder, results)
+            folder, results = parent, []
+        result = AssetPathsSerializer(path).data
+        snapshot.has_webknossos = snapshot.has_webknossos or _has_webknossos(result)
+        results.append(result)
+
+    # An empty version still has an (empty) root folder
+    add_folder(folder if folder is not None else '', results)
+    VersionPathsSnapshotChunk.objects.bulk_create(pending)
+    written += len(pending)
+
+    if snapshot.has_webknossos:
+        snapshot.save(update_fields=['has_webknossos'])
+
+    logger.info(
+        'Wrote %d asset path snapshot chunks for %s/%s',
+        written,
+        version.dandiset.identifier,
+        version.version,
+    )
+    return written
+
+
+def _snapshot_chunks(dandiset_id: int, version: str, folder: str):
+    return VersionPathsSnapshotChunk.objects.filter(
+        snapshot__version__dandiset_id=dandiset_id,
+        snapshot__version__version=version,
+        folder=folder.rstrip('/'),
+    )
+
+
+def get_version_paths_snapshot(
+    dandiset_id: int, version: str, folder: str, *, offset: int, limit: int
+) -> tuple[int, list[dict]] | None:
+    """
+    Return the total number of children of a folder, and the requested slice of them.
+
+    `None` is returned if the snapshot doesn't (fully) cover the requested slice, in which case
+    the listing must be computed from the asset paths instead.
+    """
+    if version == 'draft' or offset < 0 or limit < 1:
+        return None
+
+    first = offset // SNAPSHOT_CHUNK_SIZE
+    last = (offset + limit - 1) // SNAPSHOT_CHUNK_SIZE
+    chunks = list(
+        _snapshot_chunks(dandiset_id, version, folder)
+        .filter(index__range=(first, last))
+        .order_by('index')
+        .values_list('index', 'count', 'results')
+    )
+
+    # The first chunk must always be present. Later chunks may be past the end of the listing.
+    if not chunks or chunks[0][0] != first:
+        return None
+
+    count = chunks[0][1]
+    if offset >= count and offset > 0:
+        return None
+    if len(chunks) < last - first + 1 and (last * SNAPSHOT_CHUNK_SIZE) < count:
+        return None
+
+    start = offset - first * SNAPSHOT_CHUNK_SIZE
+    results = [result for (_, _, chunk_results) in chunks for result in chunk_results]
+    return count, results[start : start + limit]
+
+
+def get_version_paths_snapshot_after(
+    dandiset_id: int, version: str, folder: str, *, after: str | None, limit: int
+) -> tuple[int, list[dict], bool] | None:
+    """
+    Return the total number of children of a folder, a page of them, and whether there are more.
+
+    The page holds up to `limit` children, in path order, after the path `after` (or from the
+    first child if it's `None`). `None` is returned if the snapshot doesn't (fully) cover the
+    requested page.
+    """
+    if version == 'draft' or not 0 < limit <= SNAPSHOT_CHUNK_SIZE:
+        return None
+
+    chunks = _snapshot_chunks(dandiset_id, version, folder)
+    if after is not None:
+        # The last paths of chunks increase with their index, so this starts at the chunk which
+        # contains the first child after the path
+        chunks = chunks.filter(last_path__gt=after)
+    # A page never spans more than two chunks
+    chunks = list(chunks.order_by('index').values_list('index', 'count', 'results')[:2])
+    if not chunks or (after is None and chunks[0][0] != 0):
+        return None
+
+    first, count, results = chunks[0]
+    start = 0 if after is None else bisect_right(results, after, key=itemgetter('path'))
+    offset = first * SNAPSHOT_CHUNK_SIZE + start
+    end = min(offset + limit, count)
+    if end > (first + 1) * SNAPSHOT_CHUNK_SIZE:
+        if len(chunks) == 1:
+            return None
+        results = results + chunks[1][2]
+
+    return count, results[start : start + end - offset], end < count
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from functools import cached_property
 import hashlib
 from typing import TYPE_CHECKING, Any
-from urllib.parse import urlsplit, urlunsplit
+from urllib.parse import quote, urlsplit, urlunsplit
 
 import boto3
 from botocore.config import Config
@@ -11,6 +12,7 @@ from botocore.exceptions import ClientError
 from dandischema.digests.dandietag import PartGenerator
 from django.conf import settings
 from django.core.files.storage import Storage, get_storage_class
+from django.utils.encoding import filepath_to_uri
 from minio import S3Error
 from minio_storage.policy import Policy
 from minio_storage.storage import MinioStorage, create_minio_client_from_settings
@@ -18,6 +20,7 @@ from s3_file_field._multipart import PresignedPartTransfer, PresignedTransfer, U
 from s3_file_field._multipart_minio import MinioMultipartManager
 from s3_file_field._multipart_s3 import S3MultipartManager
 from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -148,6 +151,20 @@ class VerbatimNameStorageMixin:
     def generate_filename(self, filename: str) -> str:
         return filename
 
+    @property
+    def _unsigned_url_base(self) -> str:
+        """Return the URL which keys are appended to, from the bucket and endpoint configuration."""
+        raise NotImplementedError
+
+    def unsigned_object_url(self, key: str) -> str:
+        """
+        Return the canonical (unsigned) URL of an object.
+
+        This is equal to the URL returned by `url()` with its query string removed, but doesn't
+        presign anything, so it's cheap enough to compute for every asset of a version.
+        """
+        return f'{self._unsigned_url_base}{quote(key, safe="/~")}'
+
 
 class TimeoutS3Storage(S3Storage):
     """Override boto3 default timeout values."""
@@ -165,6 +182,27 @@ class VerbatimNameS3Storage(VerbatimNameStorageMixin, TimeoutS3Storage):
     def multipart_manager(self):
         return DandiS3MultipartManager(self)
 
+    @cached_property
+    def _unsigned_url_base(self) -> str:
+        # This follows the URL that boto would generate for a presigned get_object request
+        if self.endpoint_url:
+            endpoint = urlsplit(self.endpoint_url)
+            scheme, netloc, path = endpoint.scheme, endpoint.netloc, endpoint.path.rstrip('/')
+        else:
+            scheme, netloc, path = 'https', 's3.amazonaws.com', ''
+
+        if self.addressing_style == 'virtual' or (
+            self.addressing_style != 'path' and not self.endpoint_url
+        ):
+            return f'{scheme}://{self.bucket_name}.{netloc}{path}/'
+        return f'{scheme}://{netloc}{path}/{self.bucket_name}/'
+
+    def unsigned_object_url(self, key: str) -> str:
+        name = self._normalize_name(clean_name(key))
+        if self.custom_domain:
+            return f'{self.url_protocol}//{self.custom_domain}/{filepath_to_uri(name)}'
+        return super().unsigned_object_url(name)
+
     def etag_from_blob_name(self, blob_name) -> str | None:
         client = self.connection.meta.client
 
@@ -233,6 +271,16 @@ class VerbatimNameMinioStorage(VerbatimNameStorageMixin, DeconstructableMinioSto
     def multipart_manager(self):
         return DandiMinioMultipartManager(self)
 
+    @cached_property
+    def _unsigned_url_base(self) -> str:
+        # URLs are presigned by base_url_client if there's a base_url, which always uses path-style
+        # addressing on the base_url's host. Otherwise, the internal client is used.
+        if self.base_url is not None:
+            endpoint = urlsplit(self.base_url)
+        else:
+            endpoint = self.client._base_url._url  # noqa: SLF001
+        return f'{endpoint.scheme}://{endpoint.netloc}/{self.bucket_name}/'
+
     def etag_from_blob_name(self, blob_name) -> str | None:
         try:
             response = self.client.stat_object(self.bucket_name, blob_name)
@@ -10,13 +10,7 @@ from django.contrib.auth.models import User
 
 from dandiapi.api.doi import delete_doi
 from dandiapi.api.mail import send_dandiset_unembargo_failed_message
-from dandiapi.api.manifests import (
-    write_assets_jsonld,
-    write_assets_yaml,
-    write_collection_jsonld,
-    write_dandiset_jsonld,
-    write_dandiset_yaml,
-)
+from dandiapi.api.manifests import write_draft_manifests, write_manifests
 from dandiapi.api.models import Asset, AssetBlob, Version
 from dandiapi.api.models.dandiset import Dandiset
 
@@ -56,11 +50,18 @@ def write_manifest_files(version_id: int) -> None:
     version: Version = Version.objects.get(id=version_id)
     logger.info('Writing manifests for version %s:%s', version.dandiset.identifier, version.version)
 
-    write_dandiset_yaml(version)
-    write_assets_yaml(version)
-    write_dandiset_jsonld(version)
-    write_assets_jsonld(version)
-    write_collection_jsonld(version)
+    if version.version == 'draft':
+        write_draft_manifests(version)
+    else:
+        write_manifests(version)
+
+
+@shared_task(soft_time_limit=600)
+def build_version_paths_snapshot_task(version_id: int) -> None:
+    from dandiapi.api.services.version.paths_snapshot import build_version_paths_snapshot
+
+    version: Version = Version.objects.select_related('dandiset').get(id=version_id)
+    build_version_paths_snapshot(version)
 
 
 @shared_task(soft_time_limit=10)
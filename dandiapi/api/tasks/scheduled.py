@@ -27,6 +27,7 @@ from dandiapi.api.models.dandiset import Dandiset
 from dandiapi.api.services.metadata import version_aggregate_assets_summary
 from dandiapi.api.services.metadata.exceptions import VersionMetadataConcurrentlyModifiedError
 from dandiapi.api.tasks import (
+    build_version_paths_snapshot_task,
     validate_asset_metadata_task,
     validate_version_metadata_task,
     write_manifest_files,
@@ -137,6 +138,20 @@ def refresh_materialized_view_search() -> None:
 def populate_webknossos_datasets_and_annotations_task() -> None:
     populate_webknossos_datasets_and_annotations({}, 'webknossos')
 
+    # Published path snapshots include webknossos info, so they must be rebuilt to reflect it.
+    # This includes snapshots which had webknossos info, in case it has since been removed.
+    versions = (
+        Version.objects.exclude(version='draft')
+        .filter(
+            Q(assets__webknossos_datasets__isnull=False) | Q(paths_snapshot__has_webknossos=True)
+        )
+        .values_list('id', flat=True)
+        .distinct()
+    )
+    for version_id in versions:
+        build_version_paths_snapshot_task.delay(version_id)
+
+
 def register_scheduled_tasks(sender: Celery, **kwargs):
     """Register tasks with a celery beat schedule."""
     # Check for any draft versions that need validation every minute
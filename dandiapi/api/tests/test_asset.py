@@ -10,13 +10,29 @@ from guardian.shortcuts import assign_perm
 import pytest
 import requests
 
-from dandiapi.api.asset_paths import add_asset_paths, extract_paths
-from dandiapi.api.models import Asset, AssetBlob, Version
+from dandiapi.api.asset_glob import compile_glob
+from dandiapi.api.asset_metadata import full_metadata_fingerprint, full_metadata_many
+from dandiapi.api.asset_paths import (
+    CONFLICTING_PATHS_SAMPLE_SIZE,
+    add_asset_paths,
+    extract_paths,
+)
+from dandiapi.api.models import (
+    Asset,
+    AssetBlob,
+    AssetFullMetadata,
+    AuditRecord,
+    Version,
+    WebKnossosAnnotation,
+    WebKnossosDataLayer,
+    WebKnossosDataset,
+)
 from dandiapi.api.models.asset_paths import AssetPath
 from dandiapi.api.models.dandiset import Dandiset
 from dandiapi.api.services.asset import add_asset_to_version
 from dandiapi.api.services.asset.exceptions import AssetPathConflictError
 from dandiapi.api.services.publish import publish_asset
+from dandiapi.api.services.version.paths_snapshot import build_version_paths_snapshot
 from dandiapi.api.tasks.scheduled import validate_pending_asset_metadata
 from dandiapi.zarr.models import ZarrArchive, ZarrArchiveStatus
 from dandiapi.zarr.tasks import ingest_zarr_archive
@@ -70,6 +86,132 @@ def test_asset_rest_path(api_client, user, draft_version_factory, asset_factory)
     assert val['aggregate_files'] == 1
 
 
+@pytest.mark.django_db()
+def test_asset_rest_path_cursor_pagination(api_client, user, draft_version_factory, asset_factory):
+    api_client.force_authenticate(user=user)
+    version: Version = draft_version_factory()
+    paths = [f'foo/{i}.txt' for i in range(5)]
+    for path in paths:
+        asset = asset_factory(path=path)
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+    url = f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/assets/paths/'
+    resp = api_client.get(url, {'path_prefix': 'foo', 'page_size': 2}).json()
+    assert resp['count'] == 5
+    results = resp['results']
+
+    # Follow the cursor links, which shouldn't include a count
+    while resp['next'] is not None:
+        resp = api_client.get(resp['next']).json()
+        assert resp['count'] is None
+        results.extend(resp['results'])
+
+    assert [result['path'] for result in results] == paths
+
+    # Page numbers are still supported
+    resp = api_client.get(url, {'path_prefix': 'foo', 'page_size': 2, 'page': 3}).json()
+    assert resp['count'] == 5
+    assert [result['path'] for result in resp['results']] == paths[4:]
+
+
+@pytest.mark.django_db()
+def test_asset_rest_path_recursive(api_client, user, draft_version_factory, asset_factory):
+    api_client.force_authenticate(user=user)
+    version: Version = draft_version_factory()
+    for path in ['a/b/c.txt', 'a/d.txt', 'e.txt']:
+        asset = asset_factory(path=path)
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+    url = f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/assets/paths/'
+    resp = api_client.get(url, {'path_prefix': 'a/', 'recursive': True}).json()
+    assert [(r['path'], r['aggregate_files']) for r in resp['results']] == [
+        ('a/b', 1),
+        ('a/b/c.txt', 1),
+        ('a/d.txt', 1),
+    ]
+
+    resp = api_client.get(url, {'depth': 2}).json()
+    assert [r['path'] for r in resp['results']] == ['a', 'a/b', 'a/d.txt', 'e.txt']
+
+    resp = api_client.get(url, {'depth': 2, 'recursive': True})
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db()
+def test_asset_rest_path_snapshot(
+    api_client, user, published_version_factory, asset_factory, django_assert_num_queries
+):
+    api_client.force_authenticate(user=user)
+    version: Version = published_version_factory()
+    for path in ['a/b.txt', 'a/c.txt', 'd.txt']:
+        asset = asset_factory(path=path)
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+    url = f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/assets/paths/'
+    requests = [
+        (url, {'path_prefix': 'a/'}),
+        (url, {'page_size': 1}),
+        (url, {'page_size': 1, 'page': 2}),
+    ]
+    from_db = [api_client.get(*request).json() for request in requests]
+    # The cursor of the second page
+    requests.append((from_db[1]['next'], {}))
+    from_db.append(api_client.get(from_db[1]['next']).json())
+
+    # The snapshot serves the same responses, with the same links, each with a single query
+    build_version_paths_snapshot(version)
+    for request, expected in zip(requests, from_db, strict=True):
+        with django_assert_num_queries(1):
+            assert api_client.get(*request).json() == expected
+
+    assert from_db[0]['count'] == 2
+    assert [r['path'] for r in from_db[3]['results']] == ['d.txt']
+    assert from_db[3]['count'] is None
+    assert from_db[3]['next'] is None
+    assert from_db[3]['previous'] is not None
+
+    # Folders which aren't in the snapshot are looked up in the database
+    resp = api_client.get(url, {'path_prefix': 'missing/'})
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize('num_assets', [1, 10])
+def test_asset_rest_path_webknossos_num_queries(
+    api_client, user, draft_version_factory, asset_factory, django_assert_num_queries, num_assets
+):
+    api_client.force_authenticate(user=user)
+    version: Version = draft_version_factory()
+    for i in range(num_assets):
+        asset = asset_factory(path=f'{i}.txt')
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+        dataset = WebKnossosDataset.objects.create(webknossos_dataset_name=f'dataset {i}')
+        WebKnossosDataLayer.objects.create(webknossos_dataset=dataset, asset=asset)
+        WebKnossosAnnotation.objects.create(
+            webknossos_dataset=dataset, webknossos_annotation_name=f'annotation {i}'
+        )
+
+    url = f'/api/dandisets/{version.dandiset.identifier}/versions/{version.version}/assets/paths/'
+
+    # Permission check, version, count, page, assets, blobs, webknossos datasets and annotations,
+    # however many assets are listed
+    with django_assert_num_queries(8):
+        resp = api_client.get(url).json()
+
+    assert resp['count'] == num_assets
+    for result in resp['results']:
+        (info,) = result['asset']['webknossos_info']
+        assert info['webknossos_name'] == f'dataset {result["path"][:-4]}'
+        assert [a['webknossos_annotation_name'] for a in info['webknossos_annotations']] == [
+            f'annotation {result["path"][:-4]}'
+        ]
+
+
 @pytest.mark.django_db()
 def test_asset_rest_path_not_found(api_client, user, draft_version_factory, asset_factory):
     api_client.force_authenticate(user=user)
@@ -99,6 +241,11 @@ def test_asset_s3_url(asset_blob):
     assert signed_url.split('?')[0] == s3_url
 
 
+@pytest.mark.parametrize('key', ['blobs/abc/def/abcdef', 'zarr/abc/a b/c~d+e%f/0.0'])
+def test_storage_unsigned_object_url(storage, key):
+    assert storage.unsigned_object_url(key) == storage.url(key).split('?')[0]
+
+
 @pytest.mark.django_db()
 def test_publish_asset(draft_asset: Asset):
     draft_asset_id = draft_asset.asset_id
@@ -238,6 +385,32 @@ def test_asset_full_metadata_zarr(draft_asset_factory, zarr_archive):
     }
 
 
+@pytest.mark.django_db()
+def test_asset_full_metadata_many(draft_asset_factory, zarr_archive, django_assert_num_queries):
+    assets = [
+        draft_asset_factory(),
+        draft_asset_factory(blob=None, zarr=zarr_archive),
+        draft_asset_factory(),
+    ]
+
+    # The batch builder must produce exactly the same metadata as each asset on its own
+    expected = [asset.full_metadata for asset in assets]
+    assert full_metadata_many(assets) == expected
+    assert AssetFullMetadata.objects.count() == len(assets)
+
+    # Materialized metadata is read with a single query
+    with django_assert_num_queries(1):
+        assert full_metadata_many(assets) == expected
+
+    # Any change to the inputs of the metadata changes the fingerprint, so it is built again
+    fingerprint = full_metadata_fingerprint(assets[0])
+    assets[0].blob.sha256 = '0' * 64
+    assert full_metadata_fingerprint(assets[0]) != fingerprint
+    assert full_metadata_many(assets[:1])[0]['digest']['dandi:sha2-256'] == '0' * 64
+    materialized = AssetFullMetadata.objects.get(asset=assets[0])
+    assert materialized.fingerprint == full_metadata_fingerprint(assets[0])
+
+
 # API Tests
 
 
@@ -622,6 +795,30 @@ def test_asset_create_conflicting_path(api_client, user, draft_version, asset_bl
         )
 
 
+@pytest.mark.django_db()
+def test_asset_create_conflicting_path_sample(user, draft_version, asset_blob):
+    assign_perm('owner', user, draft_version.dandiset)
+    for i in range(CONFLICTING_PATHS_SAMPLE_SIZE + 2):
+        add_asset_to_version(
+            user=user,
+            version=draft_version,
+            asset_blob=asset_blob,
+            metadata={'path': f'foo/{i:02}.txt', 'schemaVersion': settings.DANDI_SCHEMA_VERSION},
+        )
+
+    # Only a sample of the conflicting paths is reported, along with the total
+    with pytest.raises(AssetPathConflictError) as excinfo:
+        add_asset_to_version(
+            user=user,
+            version=draft_version,
+            asset_blob=asset_blob,
+            metadata={'path': 'foo', 'schemaVersion': settings.DANDI_SCHEMA_VERSION},
+        )
+    assert "'foo/00.txt'" in excinfo.value.message
+    assert f"'foo/{CONFLICTING_PATHS_SAMPLE_SIZE:02}.txt'" not in excinfo.value.message
+    assert excinfo.value.message.endswith('(and 2 more)')
+
+
 @pytest.mark.django_db()
 def test_asset_create_embargo(
     api_client, user, draft_version_factory, dandiset_factory, embargoed_asset_blob
@@ -999,6 +1196,128 @@ def test_asset_create_existing_path(api_client, user, draft_version, asset_blob,
     assert resp.status_code == 409
 
 
+@pytest.mark.django_db()
+def test_asset_create_batch(api_client, user, draft_version, asset_blob):
+    assign_perm('owner', user, draft_version.dandiset)
+    api_client.force_authenticate(user=user)
+
+    # An existing asset, which some of the new assets conflict with
+    add_asset_to_version(
+        user=user,
+        version=draft_version,
+        asset_blob=asset_blob,
+        metadata={'path': 'foo/bar.txt', 'schemaVersion': settings.DANDI_SCHEMA_VERSION},
+    )
+
+    def spec(path, blob_id=asset_blob.blob_id):
+        return {'metadata': {'path': path, 'encodingFormat': 'text/plain'}, 'blob_id': blob_id}
+
+    resp = api_client.post(
+        f'/api/dandisets/{draft_version.dandiset.identifier}'
+        f'/versions/{draft_version.version}/assets/batch/',
+        {
+            'assets': [
+                spec('a/b.txt'),
+                spec('a/c.txt'),
+                # Already exists, in the version and earlier in the batch
+                spec('foo/bar.txt'),
+                spec('a/b.txt'),
+                # Conflicts with the version, and with earlier assets in the batch
+                spec('foo/bar.txt/baz.txt'),
+                spec('a'),
+                spec('a/c.txt/d.txt'),
+                # Invalid
+                spec('/a/e.txt'),
+                spec('a/f.txt', blob_id=str(uuid4())),
+                {'metadata': {'path': 'a/g.txt'}},
+            ]
+        },
+        format='json',
+    )
+    assert resp.status_code == 200
+    results = resp.json()['results']
+    assert [result['status'] for result in results] == [
+        200,
+        200,
+        409,
+        409,
+        409,
+        409,
+        409,
+        400,
+        404,
+        400,
+    ]
+    assert results[0]['asset'] == {
+        'asset_id': UUID_RE,
+        'path': 'a/b.txt',
+        'size': asset_blob.size,
+        'blob': str(asset_blob.blob_id),
+        'zarr': None,
+        'created': TIMESTAMP_RE,
+        'modified': TIMESTAMP_RE,
+    }
+    assert results[4]['detail'] == (
+        'Path of new asset "foo/bar.txt/baz.txt" conflicts with existing assets: [\'foo/bar.txt\']'
+    )
+    assert results[6]['detail'] == (
+        'Path of new asset "a/c.txt/d.txt" conflicts with existing assets: [\'a/c.txt\']'
+    )
+
+    # Only the valid assets are created, along with their paths and audit records
+    assert sorted(draft_version.assets.values_list('path', flat=True)) == [
+        'a/b.txt',
+        'a/c.txt',
+        'foo/bar.txt',
+    ]
+    for path in ['a', 'a/b.txt', 'a/c.txt']:
+        assert AssetPath.objects.filter(version=draft_version, path=path).exists()
+    assert AssetPath.objects.get(version=draft_version, path='a').aggregate_files == 2
+    assert (
+        AuditRecord.objects.filter(
+            dandiset_id=draft_version.dandiset.id, record_type='add_asset'
+        ).count()
+        == 3
+    )
+
+    draft_version.refresh_from_db()
+    assert draft_version.status == Version.Status.PENDING
+    assert draft_version.asset_count == 3
+
+
+@pytest.mark.django_db()
+def test_asset_create_batch_too_large(api_client, user, draft_version, asset_blob):
+    assign_perm('owner', user, draft_version.dandiset)
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(
+        f'/api/dandisets/{draft_version.dandiset.identifier}'
+        f'/versions/{draft_version.version}/assets/batch/',
+        {
+            'assets': [
+                {'metadata': {'path': f'{i}.txt'}, 'blob_id': asset_blob.blob_id}
+                for i in range(settings.DANDI_ASSET_BATCH_MAX_SIZE + 1)
+            ]
+        },
+        format='json',
+    )
+    assert resp.status_code == 400
+    assert not draft_version.assets.exists()
+
+
+@pytest.mark.django_db()
+def test_asset_create_batch_not_an_owner(api_client, user, draft_version, asset_blob):
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.post(
+        f'/api/dandisets/{draft_version.dandiset.identifier}'
+        f'/versions/{draft_version.version}/assets/batch/',
+        {'assets': [{'metadata': {'path': 'a.txt'}, 'blob_id': asset_blob.blob_id}]},
+        format='json',
+    )
+    assert resp.status_code == 403
+
+
 @pytest.mark.django_db()
 def test_asset_rest_rename(api_client, user, draft_version, asset_blob):
     assign_perm('owner', user, draft_version.dandiset)
@@ -1651,6 +1970,72 @@ def test_asset_direct_info(api_client, user, asset):
     }
 
 
+@pytest.mark.django_db()
+def test_asset_rest_list_after(api_client, user, draft_version, asset_factory):
+    api_client.force_authenticate(user=user)
+    paths = ['a/b.txt', 'a/c.txt', 'b.txt', 'c/d.txt', 'e.txt']
+    assets = {}
+    for path in reversed(paths):
+        asset = assets[path] = asset_factory(path=path)
+        draft_version.assets.add(asset)
+        add_asset_paths(asset, draft_version)
+
+    url = f'/api/dandisets/{draft_version.dandiset.identifier}/versions/draft/assets/'
+    resp = api_client.get(url, {'after': '', 'page_size': 2}).json()
+    assert [asset['path'] for asset in resp['results']] == paths[:2]
+
+    # Follow the next links until the end
+    listed = [asset['path'] for asset in resp['results']]
+    while resp['next'] is not None:
+        resp = api_client.get(resp['next']).json()
+        listed.extend(asset['path'] for asset in resp['results'])
+    assert listed == paths
+
+    # An asset ID may be used instead of a path
+    resp = api_client.get(url, {'after': str(assets['b.txt'].asset_id)}).json()
+    assert [asset['path'] for asset in resp['results']] == ['c/d.txt', 'e.txt']
+
+    resp = api_client.get(url, {'after': '', 'order': 'created'})
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db()
+def test_asset_rest_list_ndjson(api_client, user, draft_version, asset_factory):
+    api_client.force_authenticate(user=user)
+    paths = ['a/b.txt', 'a/c.txt', 'b.txt']
+    for path in paths:
+        asset = asset_factory(path=path)
+        draft_version.assets.add(asset)
+        add_asset_paths(asset, draft_version)
+
+    url = f'/api/dandisets/{draft_version.dandiset.identifier}/versions/draft/assets/'
+    resp = api_client.get(url, {'format': 'ndjson', 'metadata': True, 'after': 'a/b.txt'})
+    assert resp.status_code == 200
+    assert resp['Content-Type'] == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in b''.join(resp.streaming_content).splitlines()]
+    assert [line['path'] for line in lines] == ['a/c.txt', 'b.txt']
+    assert all(line['metadata']['path'] == line['path'] for line in lines)
+
+
+@pytest.mark.parametrize(
+    ('glob_pattern', 'prefix', 'regex'),
+    [
+        ('a/b.txt', 'a/b.txt', None),
+        ('a/b/*', 'a/b/', None),
+        ('*', '', None),
+        ('a/*.txt', 'a/', r'^a/.*\.txt$'),
+        ('*.txt', '', r'^.*\.txt$'),
+        ('a/**/b.txt', 'a/', r'^a/(.*/)?b\.txt$'),
+        ('a**b', 'a', r'^a.*b$'),
+    ],
+)
+def test_compile_glob(glob_pattern, prefix, regex):
+    compiled = compile_glob(glob_pattern)
+    assert compiled.prefix == prefix
+    assert compiled.regex == regex
+
+
 @pytest.mark.django_db()
 @pytest.mark.parametrize(
     ('glob_pattern', 'expected_paths'),
@@ -1669,6 +2054,12 @@ def test_asset_direct_info(api_client, user, asset):
         ('a/b/c', []),
         ('a/b/c*', ['a/b/c.txt', 'a/b/c/d.txt', 'a/b/c/e.txt']),
         ('a/b/c.txt', ['a/b/c.txt']),
+        ('A/B/C*', ['a/b/c.txt', 'a/b/c/d.txt', 'a/b/c/e.txt']),  # case-insensitive
+        # A `**` segment matches zero or more folders
+        ('a/**/e.txt', ['a/b/c/e.txt', 'a/b/d/e.txt']),
+        ('a/b/**/c.txt', ['a/b/c.txt']),
+        ('**/b.txt', ['a/b.txt']),
+        ('a/b/c/**', ['a/b/c/d.txt', 'a/b/c/e.txt']),
     ],
 )
 def test_asset_rest_glob(api_client, user, asset_factory, version, glob_pattern, expected_paths):
@@ -4,14 +4,20 @@ from django.db.models import Q, QuerySet
 import pytest
 
 from dandiapi.api.asset_paths import (
+    PathConflict,
     add_asset_paths,
     add_version_asset_paths,
+    copy_version_asset_paths,
     delete_asset_paths,
     extract_paths,
+    get_conflicting_paths,
+    get_conflicting_paths_many,
+    get_path_children,
     get_root_paths,
     get_root_paths_many,
     search_asset_paths,
     update_asset_paths,
+    update_version_asset_paths,
 )
 from dandiapi.api.models import Asset, AssetPath, Version
 from dandiapi.api.models.asset_paths import AssetPathRelation
@@ -56,32 +62,22 @@ def test_asset_path_add_asset(draft_version_factory, asset_factory):
     # Get asset path
     path: AssetPath = AssetPath.objects.get(asset=asset, version=version)
 
-    # Get parent paths
+    # Get parent paths (including leaf)
     parent_paths: QuerySet[AssetPath] = AssetPath.objects.filter(
-        version=version, child_links__child=path
+        version=version, path__in=extract_paths(path.path)
     )
 
     # Assert not empty
     assert parent_paths.exists()
 
-    # Check parent paths and relations
+    # Check parent paths and their depth
     for path in parent_paths:
         assert path.aggregate_size == asset.size
         assert path.aggregate_files == 1
+        assert path.depth == path.path.count('/')
 
-        # Assert self referencing link
-        assert AssetPathRelation.objects.filter(parent=path, child=path).exists()
-
-        # Get child paths
-        child_paths = AssetPath.objects.filter(version=version, path__startswith=path.path).exclude(
-            id=path.id
-        )
-
-        # Assert relation to all of these child paths exists
-        assert (
-            AssetPathRelation.objects.filter(parent=path, child__in=child_paths).count()
-            == child_paths.count()
-        )
+    # Assert no closure table rows are written
+    assert not AssetPathRelation.objects.exists()
 
 
 @pytest.mark.django_db()
@@ -178,6 +174,31 @@ def test_asset_path_add_version_asset_paths_idempotent(draft_version_factory, as
         assert path.aggregate_size == path.asset.size
 
 
+@pytest.mark.django_db()
+def test_asset_path_add_version_asset_paths_replaces_existing(draft_version_factory, asset_factory):
+    version: Version = draft_version_factory()
+    stale_asset = asset_factory(path='old/file.txt')
+    version.assets.add(stale_asset)
+    add_asset_paths(stale_asset, version)
+
+    # Remove asset from version without updating paths
+    version.assets.remove(stale_asset)
+    version.assets.add(asset_factory(path='new/file.txt'))
+    add_version_asset_paths(version)
+
+    assert sorted(version.asset_paths.values_list('path', flat=True)) == ['new', 'new/file.txt']
+
+
+@pytest.mark.django_db()
+def test_asset_path_add_version_asset_paths_conflict(draft_version_factory, asset_factory):
+    version: Version = draft_version_factory()
+    version.assets.add(asset_factory(path='foo/bar.txt'))
+    version.assets.add(asset_factory(path='foo'))
+
+    with pytest.raises(AssetAlreadyExistsError):
+        add_version_asset_paths(version)
+
+
 @pytest.mark.django_db()
 def test_asset_path_add_asset_shared_paths(draft_version_factory, asset_factory):
     # Create asset with version
@@ -272,6 +293,41 @@ def test_asset_path_delete_asset_shared_paths(
     assert path.aggregate_files == 1
 
 
+@pytest.mark.django_db()
+def test_asset_path_update_version_asset_paths(
+    draft_version_factory, asset_factory, asset_blob_factory
+):
+    version: Version = draft_version_factory()
+    other_version: Version = draft_version_factory()
+    old_assets = [
+        asset_factory(path=path, blob=asset_blob_factory(size=10))
+        for path in ['a/b/c.txt', 'a/b/d.txt', 'x/y.txt']
+    ]
+    update_version_asset_paths(version, added=old_assets)
+    update_version_asset_paths(other_version, added=old_assets)
+
+    # Replace one asset with the same path, remove another, and add a new one
+    new_assets = [
+        asset_factory(path='a/b/c.txt', blob=asset_blob_factory(size=25)),
+        asset_factory(path='a/e.txt', blob=asset_blob_factory(size=5)),
+    ]
+    update_version_asset_paths(version, added=new_assets, removed=old_assets[:2])
+
+    assert sorted(version.asset_paths.values_list('path', 'aggregate_files', 'aggregate_size')) == [
+        ('a', 2, 30),
+        ('a/b', 1, 25),
+        ('a/b/c.txt', 1, 25),
+        ('a/e.txt', 1, 5),
+        ('x', 1, 10),
+        ('x/y.txt', 1, 10),
+    ]
+    assert version.asset_paths.get(path='a/b/c.txt').asset == new_assets[0]
+
+    # Other versions are untouched
+    assert other_version.asset_paths.get(path='a').aggregate_files == 2
+    assert other_version.asset_paths.get(path='a/b').aggregate_size == 20
+
+
 @pytest.mark.django_db()
 def test_asset_path_search_asset_paths(draft_version_factory, asset_factory):
     version: Version = draft_version_factory()
@@ -294,6 +350,72 @@ def test_asset_path_search_asset_paths(draft_version_factory, asset_factory):
     assert all(x.asset is not None for x in qs)
 
 
+@pytest.mark.django_db()
+def test_asset_path_search_asset_paths_depth(draft_version_factory, asset_factory):
+    version: Version = draft_version_factory()
+    for path in ['foo/bar/baz.txt', 'foo/qux.txt', 'top.txt']:
+        asset = asset_factory(path=path)
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+    def search(query, depth):
+        return [x.path for x in search_asset_paths(query, version, depth=depth)]
+
+    assert search('', 2) == ['foo', 'foo/bar', 'foo/qux.txt', 'top.txt']
+    assert search('', None) == ['foo', 'foo/bar', 'foo/bar/baz.txt', 'foo/qux.txt', 'top.txt']
+    assert search('foo/', 2) == ['foo/bar', 'foo/bar/baz.txt', 'foo/qux.txt']
+    assert search('foo/bar', None) == ['foo/bar/baz.txt']
+
+
+@pytest.mark.django_db()
+def test_asset_path_get_path_children(draft_version_factory, asset_factory):
+    version: Version = draft_version_factory()
+    paths = ['a/b/c.txt', 'a/b/d/e.txt', 'a/f.txt', 'ab/g.txt', 'a.txt']
+    for path in paths:
+        asset = asset_factory(path=path)
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+    folder = AssetPath.objects.get(version=version, path='a')
+
+    # Direct children only, not including similarly prefixed siblings like `ab`
+    assert [p.path for p in get_path_children(folder)] == ['a/b', 'a/f.txt']
+    assert [p.path for p in get_path_children(folder, depth=2)] == ['a/b/c.txt', 'a/b/d']
+    assert [p.path for p in get_path_children(folder, depth=None)] == [
+        'a/b',
+        'a/b/c.txt',
+        'a/b/d',
+        'a/b/d/e.txt',
+        'a/f.txt',
+    ]
+
+
+@pytest.mark.django_db()
+def test_asset_path_get_conflicting_paths_many(draft_version_factory, asset_factory):
+    version: Version = draft_version_factory()
+    paths = ['a/b/c.txt', 'a/b/d/e.txt', 'a/f.txt', 'ab/g.txt', 'h.txt']
+    for path in paths:
+        asset = asset_factory(path=path)
+        version.assets.add(asset)
+        add_asset_paths(asset, version)
+
+    conflicts = get_conflicting_paths_many(
+        ['a', 'a/b', 'a/f.txt/i.txt', 'h.txt/j/k.txt', 'ab/l.txt', 'm.txt'], version, sample_size=2
+    )
+    assert conflicts == {
+        # Folders conflict with a sample of the files below them, not including `ab`
+        'a': PathConflict(paths=['a/b/c.txt', 'a/b/d/e.txt'], count=3),
+        'a/b': PathConflict(paths=['a/b/c.txt', 'a/b/d/e.txt'], count=2),
+        # Files conflict with any paths below them
+        'a/f.txt/i.txt': PathConflict(paths=['a/f.txt'], count=1),
+        'h.txt/j/k.txt': PathConflict(paths=['h.txt'], count=1),
+    }
+
+    assert get_conflicting_paths('a/b/d', version) == PathConflict(paths=['a/b/d/e.txt'], count=1)
+    assert get_conflicting_paths('a/b/x.txt', version) is None
+    assert get_conflicting_paths_many([], version) == {}
+
+
 @pytest.mark.django_db()
 def test_asset_path_publish_version(draft_version_factory, asset_factory):
     version: Version = draft_version_factory()
@@ -325,6 +447,22 @@ def test_asset_path_publish_version(draft_version_factory, asset_factory):
         AssetPath.objects.get(path=path, version=published_version)
 
 
+@pytest.mark.django_db()
+def test_asset_path_copy_version_asset_paths(draft_version_factory, asset_factory):
+    source: Version = draft_version_factory()
+    for path in ['a/b/c.txt', 'a/d.txt', 'e.txt']:
+        source.assets.add(asset_factory(path=path))
+    add_version_asset_paths(source)
+
+    target: Version = draft_version_factory()
+    copy_version_asset_paths(source=source, target=target)
+
+    fields = ('path', 'depth', 'asset', 'aggregate_files', 'aggregate_size')
+    assert list(source.asset_paths.order_by('path').values_list(*fields)) == list(
+        target.asset_paths.order_by('path').values_list(*fields)
+    )
+
+
 @pytest.mark.django_db()
 def test_asset_path_get_root_paths(draft_version_factory, asset_factory):
     version = draft_version_factory()
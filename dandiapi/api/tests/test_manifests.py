@@ -1,21 +1,33 @@
 from __future__ import annotations
 
+import gzip
+import io
+import json
 from typing import TYPE_CHECKING
 
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.utils import timezone
+import pyarrow.parquet as pq
 import pytest
 from rest_framework.renderers import JSONRenderer
 from rest_framework_yaml.renderers import YAMLRenderer
+import yaml
 
+from dandiapi.api import manifests
 from dandiapi.api.manifests import (
+    _streaming_file_upload,
+    _yaml_dump_sequence_from_generator,
     write_assets_jsonld,
     write_assets_yaml,
     write_collection_jsonld,
     write_dandiset_jsonld,
     write_dandiset_yaml,
+    write_draft_manifests,
+    write_manifests,
 )
-from dandiapi.api.models import AssetBlob, Version
+from dandiapi.api.models import AssetBlob, Version, VersionManifest
+from dandiapi.api.storage import get_boto_client
 
 if TYPE_CHECKING:
     from django.core.files.storage import Storage
@@ -163,3 +175,217 @@ def test_write_assets_yaml_already_exists(storage: Storage, version: Version, as
 
     with storage.open(assets_yaml_path) as f:
         assert f.read() == expected
+
+
+@pytest.mark.django_db()
+def test_write_manifests(storage: Storage, version: Version, asset_factory):
+    # Pretend like AssetBlob was defined with the given storage
+    # The task piggybacks off of the AssetBlob storage to write the yamls
+    AssetBlob.blob.field.storage = storage
+
+    version.assets.add(asset_factory(), asset_factory())
+    manifests_path = (
+        f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}'
+        f'dandisets/{version.dandiset.identifier}/{version.version}'
+    )
+
+    write_manifests(version)
+    assets = version.assets.order_by('created')
+
+    with storage.open(f'{manifests_path}/assets.yaml') as f:
+        assert f.read() == YAMLRenderer().render([asset.full_metadata for asset in assets])
+    with storage.open(f'{manifests_path}/assets.jsonld') as f:
+        assert f.read() == JSONRenderer().render([asset.full_metadata for asset in assets])
+    with storage.open(f'{manifests_path}/collection.jsonld') as f:
+        assert f.read() == JSONRenderer().render(
+            {
+                '@context': version.metadata['@context'],
+                'id': version.metadata['id'],
+                '@type': 'prov:Collection',
+                'hasMember': [asset.full_metadata['id'] for asset in assets],
+            }
+        )
+    with storage.open(f'{manifests_path}/assets.jsonl.gz') as f:
+        assert gzip.decompress(f.read()).splitlines() == [
+            JSONRenderer().render(asset.full_metadata) for asset in assets
+        ]
+    with storage.open(f'{manifests_path}/assets.parquet') as f:
+        table = pq.read_table(io.BytesIO(f.read()))
+    assert table.column('asset_id').to_pylist() == [str(asset.asset_id) for asset in assets]
+    assert table.column('path').to_pylist() == [asset.path for asset in assets]
+    assert table.column('size').to_pylist() == [asset.size for asset in assets]
+    assert table.column('sha2_256').to_pylist() == [asset.blob.sha256 for asset in assets]
+    assert storage.exists(f'{manifests_path}/dandiset.yaml')
+    assert storage.exists(f'{manifests_path}/dandiset.jsonld')
+
+
+@pytest.mark.django_db()
+def test_streaming_file_upload_multipart(storage: Storage, monkeypatch):
+    AssetBlob.blob.field.storage = storage
+    # Use the smallest part size that S3 allows
+    monkeypatch.setattr(manifests, 'MANIFEST_PART_SIZE', 5 * 1024 * 1024)
+    path = f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}test/multipart.txt'
+    chunk = b'0123456789abcdef' * 64 * 1024
+
+    with _streaming_file_upload(path) as stream:
+        for _ in range(11):
+            stream.write(chunk)
+
+    with storage.open(path) as f:
+        assert f.read() == chunk * 11
+
+
+@pytest.mark.django_db()
+def test_streaming_file_upload_multipart_aborted(storage: Storage, monkeypatch):
+    AssetBlob.blob.field.storage = storage
+    monkeypatch.setattr(manifests, 'MANIFEST_PART_SIZE', 5 * 1024 * 1024)
+    path = f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}test/aborted.txt'
+    chunk = b'0123456789abcdef' * 64 * 1024
+
+    def fail(**kwargs):
+        raise RuntimeError('Upload failed')
+
+    def upload():
+        with _streaming_file_upload(path) as stream:
+            for _ in range(6):
+                stream.write(chunk)
+            monkeypatch.setattr(stream._client, 'complete_multipart_upload', fail)
+
+    with pytest.raises(RuntimeError, match='Upload failed'):
+        upload()
+
+    # The failed upload is aborted rather than left incomplete
+    client = get_boto_client(storage)
+    assert 'Uploads' not in client.list_multipart_uploads(Bucket=storage.bucket_name, Prefix=path)
+    assert not storage.exists(path)
+
+
+@pytest.mark.django_db()
+def test_write_draft_manifests(
+    storage: Storage, draft_version: Version, asset_factory, monkeypatch
+):
+    AssetBlob.blob.field.storage = storage
+    # Put every asset in its own chunk
+    monkeypatch.setattr(manifests, 'DRAFT_MANIFEST_MAX_CHUNK_SIZE', 1)
+
+    assets = [asset_factory(), asset_factory(), asset_factory()]
+    draft_version.assets.add(*assets)
+    manifests_path = (
+        f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}'
+        f'dandisets/{draft_version.dandiset.identifier}/draft'
+    )
+
+    assert write_draft_manifests(draft_version)
+
+    with storage.open(f'{manifests_path}/assets.index.json') as f:
+        index = json.load(f)
+    assert index['count'] == 3
+    assert [chunk['count'] for chunk in index['chunks']] == [1, 1, 1]
+
+    # Concatenating the chunks gives the complete manifest
+    yaml_manifest = b''
+    for chunk in index['chunks']:
+        with storage.open(f'{manifests_path}/{chunk["assets.yaml"]}') as f:
+            yaml_manifest += f.read()
+    assert yaml_manifest == YAMLRenderer().render(
+        [asset.full_metadata for asset in draft_version.assets.order_by('created', 'id')]
+    )
+
+    # Nothing is written if the version is unchanged
+    assert not write_draft_manifests(draft_version)
+
+    # Only the index is rewritten after removing an asset, and the removed chunk is deleted
+    removed_chunk = index['chunks'][1]
+    draft_version.assets.remove(assets[1])
+    Version.objects.filter(id=draft_version.id).update(modified=timezone.now())
+    assert write_draft_manifests(draft_version)
+
+    with storage.open(f'{manifests_path}/assets.index.json') as f:
+        assert json.load(f)['chunks'] == [index['chunks'][0], index['chunks'][2]]
+    assert not storage.exists(f'{manifests_path}/{removed_chunk["assets.yaml"]}')
+
+
+@pytest.mark.django_db()
+def test_write_draft_manifests_resume(
+    storage: Storage, draft_version: Version, asset_factory, monkeypatch
+):
+    AssetBlob.blob.field.storage = storage
+    monkeypatch.setattr(manifests, 'DRAFT_MANIFEST_MAX_CHUNK_SIZE', 1)
+
+    draft_version.assets.add(asset_factory(), asset_factory())
+    manifests_path = (
+        f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}'
+        f'dandisets/{draft_version.dandiset.identifier}/draft'
+    )
+    # Drafts used to have complete asset manifests
+    write_assets_yaml(draft_version)
+    write_assets_jsonld(draft_version)
+
+    # Interrupt the write after the first chunk
+    write_assets_chunk = manifests._write_assets_chunk
+    written = []
+
+    def interrupted_write_assets_chunk(version, digest, assets):
+        if written:
+            raise RuntimeError('Interrupted')
+        write_assets_chunk(version, digest, assets)
+        written.append(digest)
+
+    monkeypatch.setattr(manifests, '_write_assets_chunk', interrupted_write_assets_chunk)
+    with pytest.raises(RuntimeError, match='Interrupted'):
+        write_draft_manifests(draft_version)
+
+    # The written chunk is recorded, and the claim is released
+    state = VersionManifest.objects.get(version=draft_version)
+    assert state.written_chunks == written
+    assert state.writing_since is None
+
+    # The next write only writes the remaining chunk
+    monkeypatch.setattr(manifests, '_write_assets_chunk', write_assets_chunk)
+    assert write_draft_manifests(draft_version)
+    state.refresh_from_db()
+    assert state.chunks[0]['digest'] == written[0]
+    assert state.written_chunks == []
+
+    # The complete asset manifests are replaced by the index
+    assert storage.exists(f'{manifests_path}/assets.index.json')
+    assert not storage.exists(f'{manifests_path}/assets.yaml')
+    assert not storage.exists(f'{manifests_path}/assets.jsonld')
+
+
+@pytest.mark.django_db()
+def test_write_draft_manifests_claimed(draft_version: Version, asset_factory):
+    draft_version.assets.add(asset_factory())
+    VersionManifest.objects.create(version=draft_version, writing_since=timezone.now())
+
+    # Another task is writing the manifests
+    assert not write_draft_manifests(draft_version)
+
+
+@pytest.mark.parametrize(
+    'obj',
+    [
+        {},
+        {'a': [], 'b': {}, 'c': [{'d': [1, 2]}, None, True, 1.5, float('inf'), 1e20]},
+        {'strings': ['', 'null', 'yes', '1.0', '~', '<<', '2020-01-01', '0x1F', '- a', ': b']},
+        {'multiline': 'first\n\nthird\n', 'unicode': 'µm ✓', 'quote': "it's"},
+        {'long': ' '.join(['word'] * 40), 'nested': {'long': ' '.join(['word'] * 40)}},
+        {'tuple': (1, 2)},
+    ],
+    ids=['empty', 'types', 'implicit', 'multiline', 'wrapped', 'fallback'],
+)
+def test_yaml_dump_sequence_from_generator(obj):
+    # Each item used to be dumped on its own, and then indented
+    expected = b''
+    for item in [obj, obj]:
+        lines = yaml.dump(
+            item, encoding='utf-8', Dumper=yaml.CSafeDumper, allow_unicode=True
+        ).splitlines()
+        expected += b''.join(
+            (b'- ' if i == 0 else b'  ') + line + b'\n' for i, line in enumerate(lines)
+        )
+
+    stream = io.BytesIO()
+    _yaml_dump_sequence_from_generator(stream, [obj, obj])
+
+    assert stream.getvalue() == expected
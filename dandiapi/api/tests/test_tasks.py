@@ -91,13 +91,22 @@ def test_write_manifest_files(storage: Storage, version: Version, asset_factory)
         f'dandisets/{version.dandiset.identifier}/{version.version}/collection.jsonld'
     )
 
+    assets_index_path = (
+        f'{settings.DANDI_DANDISETS_BUCKET_PREFIX}'
+        f'dandisets/{version.dandiset.identifier}/{version.version}/assets.index.json'
+    )
+
     tasks.write_manifest_files(version.id)
 
-    assert storage.exists(assets_yaml_path)
     assert storage.exists(dandiset_yaml_path)
-    assert storage.exists(assets_jsonld_path)
     assert storage.exists(dandiset_jsonld_path)
     assert storage.exists(collection_jsonld_path)
+    if version.version == 'draft':
+        # Draft asset manifests are written in chunks, listed by an index
+        assert storage.exists(assets_index_path)
+    else:
+        assert storage.exists(assets_yaml_path)
+        assert storage.exists(assets_jsonld_path)
 
 
 @pytest.mark.django_db()
@@ -357,7 +366,8 @@ def test_publish_task(
         },
         'datePublished': UTC_ISO_TIMESTAMP_RE,
         'manifestLocation': [
-            f'http://{settings.MINIO_STORAGE_ENDPOINT}/test-dandiapi-dandisets/test-prefix/dandisets/{draft_version.dandiset.identifier}/{published_version.version}/assets.yaml',
+            f'http://{settings.MINIO_STORAGE_ENDPOINT}/test-dandiapi-dandisets/test-prefix/dandisets/{draft_version.dandiset.identifier}/{published_version.version}/{manifest}'
+            for manifest in ['assets.yaml', 'assets.jsonl.gz', 'assets.parquet']
         ],
         'identifier': f'DANDI:{draft_version.dandiset.identifier}',
         'version': published_version.version,
@@ -4,6 +4,7 @@ import datetime
 from time import sleep
 from typing import TYPE_CHECKING
 
+from dandischema.metadata import aggregate_assets_summary
 from dandischema.models import AccessType
 from django.conf import settings
 from freezegun import freeze_time
@@ -12,6 +13,13 @@ import pytest
 
 from dandiapi.api.models.dandiset import Dandiset
 from dandiapi.api.services.metadata import version_aggregate_assets_summary
+from dandiapi.api.services.metadata.assets_summary import (
+    aggregate_version_assets_summary,
+    assets_summaries_equal,
+    update_asset_status_assets_summaries,
+    update_version_assets_summary,
+    version_assets_summary,
+)
 from dandiapi.api.services.metadata.exceptions import VersionMetadataConcurrentlyModifiedError
 
 if TYPE_CHECKING:
@@ -19,8 +27,14 @@ if TYPE_CHECKING:
     from rest_framework.test import APIClient
 
 from dandiapi.api import tasks
-from dandiapi.api.asset_paths import add_version_asset_paths
-from dandiapi.api.models import Asset, Version
+from dandiapi.api.asset_metadata import iter_full_metadata
+from dandiapi.api.asset_paths import (
+    add_version_asset_paths,
+    delete_asset_paths,
+    refresh_version_totals,
+    update_version_asset_paths,
+)
+from dandiapi.api.models import Asset, Version, VersionAssetsSummary
 from dandiapi.api.services.publish import _build_publishable_version_from_draft
 from dandiapi.zarr.tasks import ingest_zarr_archive
 
@@ -113,8 +127,9 @@ def test_published_version_metadata_computed(published_version: Version):
             (
                 f'http://{settings.MINIO_STORAGE_ENDPOINT}/test-dandiapi-dandisets'
                 f'/test-prefix/dandisets/{published_version.dandiset.identifier}'
-                f'/{published_version.version}/assets.yaml'
+                f'/{published_version.version}/{manifest}'
             )
+            for manifest in ['assets.yaml', 'assets.jsonl.gz', 'assets.parquet']
         ],
         'name': published_version.name,
         'identifier': f'DANDI:{published_version.dandiset.identifier}',
@@ -335,7 +350,8 @@ def test_version_publish_version(draft_version, asset):
         'dateCreated': UTC_ISO_TIMESTAMP_RE,
         'datePublished': UTC_ISO_TIMESTAMP_RE,
         'manifestLocation': [
-            f'http://{settings.MINIO_STORAGE_ENDPOINT}/test-dandiapi-dandisets/test-prefix/dandisets/{publish_version.dandiset.identifier}/{publish_version.version}/assets.yaml',
+            f'http://{settings.MINIO_STORAGE_ENDPOINT}/test-dandiapi-dandisets/test-prefix/dandisets/{publish_version.dandiset.identifier}/{publish_version.version}/{manifest}'
+            for manifest in ['assets.yaml', 'assets.jsonl.gz', 'assets.parquet']
         ],
         'identifier': f'DANDI:{publish_version.dandiset.identifier}',
         'version': publish_version.version,
@@ -384,6 +400,250 @@ def test_version_aggregate_assets_summary_metadata_modified(
         version_aggregate_assets_summary(version)
 
 
+def _participant(identifier: str, species: str | None = None) -> dict:
+    participant = {'schemaKey': 'Participant', 'identifier': identifier}
+    if species is not None:
+        participant['species'] = {
+            'schemaKey': 'SpeciesType',
+            'identifier': f'http://purl.obolibrary.org/obo/NCBITaxon_{species}',
+            'name': species,
+        }
+    return participant
+
+
+def _biosample(identifier: str, sample_type: str, *derived_from: dict) -> dict:
+    biosample = {
+        'schemaKey': 'BioSample',
+        'identifier': identifier,
+        'sampleType': {'schemaKey': 'SampleType', 'name': sample_type},
+    }
+    if derived_from:
+        biosample['wasDerivedFrom'] = list(derived_from)
+    return biosample
+
+
+_TWO_PHOTON = {'schemaKey': 'MeasurementTechniqueType', 'name': 'two-photon microscopy technique'}
+_SPIKE_SORTING = {'schemaKey': 'MeasurementTechniqueType', 'name': 'spike sorting technique'}
+_ELECTROPHYSIOLOGY = {'schemaKey': 'ApproachType', 'name': 'electrophysiological approach'}
+_IMAGING = {'schemaKey': 'ApproachType', 'name': 'microscopy approach; cell population imaging'}
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    'assets',
+    [
+        pytest.param([], id='empty'),
+        pytest.param(
+            [
+                ('a/b.nwb', {'approach': [_IMAGING, _ELECTROPHYSIOLOGY]}),
+                ('a/c.nwb', {'approach': [_ELECTROPHYSIOLOGY], 'measurementTechnique': None}),
+                ('a/d.nwb', {'measurementTechnique': [_SPIKE_SORTING, _TWO_PHOTON]}),
+                ('a/e.nwb', {'measurementTechnique': [_TWO_PHOTON, _SPIKE_SORTING]}),
+            ],
+            id='approach-technique',
+        ),
+        pytest.param(
+            [
+                (
+                    'a/b.nwb',
+                    {
+                        'variableMeasured': [
+                            {'schemaKey': 'PropertyValue', 'value': 'ElectricalSeries'},
+                            {'schemaKey': 'PropertyValue', 'value': 'Units'},
+                        ]
+                    },
+                ),
+                (
+                    'a/c.nwb',
+                    {'variableMeasured': [{'schemaKey': 'PropertyValue', 'value': 'Units'}]},
+                ),
+            ],
+            id='variable-measured',
+        ),
+        pytest.param(
+            [
+                (
+                    'a/b.nwb',
+                    {'wasAttributedTo': [_participant('mouse 1', '10090'), _participant('m/2')]},
+                ),
+                (
+                    'a/c.nwb',
+                    {'wasAttributedTo': [_participant('rat_1', '10116'), _participant('mouse 1')]},
+                ),
+                ('a/d.nwb', {'wasAttributedTo': [{'schemaKey': 'Person', 'name': 'Doe, Jane'}]}),
+            ],
+            id='participants',
+        ),
+        pytest.param(
+            [
+                (
+                    'a/b.nwb',
+                    {
+                        'wasDerivedFrom': [
+                            _biosample(
+                                'cell 1',
+                                'cell',
+                                _biosample(
+                                    'slice-1', 'slice', _biosample('tissue/1', 'tissuesample')
+                                ),
+                            ),
+                            _biosample('ignored', 'cell'),
+                        ]
+                    },
+                ),
+                (
+                    'a/c.nwb',
+                    {
+                        'wasDerivedFrom': [
+                            {'schemaKey': 'Person', 'name': 'Doe, Jane'},
+                            _biosample('cell_2', 'cell', _biosample('slice-1', 'slice')),
+                        ]
+                    },
+                ),
+            ],
+            id='biosamples',
+        ),
+        pytest.param(
+            [
+                ('sub-1/sub-1_sample-a_ses-1.nwb', {}),
+                ('sub-1/sub-1_sample-b.image.nwb', {}),
+                ('sub-2/sub-2_ses-1_sample-a.nwb', {'wasAttributedTo': [_participant('2')]}),
+                ('sub-3/anat.nwb', {}),
+            ],
+            id='path-parts',
+        ),
+        pytest.param(
+            [
+                ('dataset_description.json', {'encodingFormat': 'application/json'}),
+                ('sub-1/dataset_description.json', {'encodingFormat': 'application/json'}),
+                ('sub-1/sub-1_sample-a.ome.zarr', {'encodingFormat': 'application/x-zarr'}),
+                ('sub-1/sub-1.nwb.ome.zarr', {'encodingFormat': 'application/x-zarr'}),
+                ('sub-1/sub-1.nwb', {}),
+            ],
+            id='data-standards',
+        ),
+    ],
+)
+def test_aggregate_version_assets_summary_parity(draft_version, draft_asset_factory, assets):
+    for path, metadata in assets:
+        asset = draft_asset_factory(status=Asset.Status.VALID, path=path)
+        asset.metadata = {**asset.metadata, **metadata}
+        asset.save()
+        draft_version.assets.add(asset)
+
+    # Invalid assets are excluded from both summaries
+    draft_version.assets.add(
+        draft_asset_factory(
+            status=Asset.Status.INVALID,
+            path='sub-99/sub-99_sample-z.nwb',
+            metadata={
+                'schemaVersion': settings.DANDI_SCHEMA_VERSION,
+                'encodingFormat': 'application/x-nwb',
+                'approach': [_IMAGING],
+                'wasAttributedTo': [_participant('99', '9606')],
+            },
+        )
+    )
+
+    expected = aggregate_assets_summary(
+        iter_full_metadata(
+            draft_version.assets.filter(status=Asset.Status.VALID).order_by('created', 'id')
+        )
+    )
+    assert aggregate_version_assets_summary(draft_version) == expected
+
+
+@pytest.mark.django_db()
+def test_aggregate_version_assets_summary_zarr(
+    draft_version, draft_asset_factory, zarr_archive_factory
+):
+    zarr_archive = zarr_archive_factory(dandiset=draft_version.dandiset)
+    zarr_archive.size = 1234
+    zarr_archive.save()
+    zarr_asset = draft_asset_factory(
+        status=Asset.Status.VALID, path='sample.ome.zarr', blob=None, zarr=zarr_archive
+    )
+    blob_asset = draft_asset_factory(status=Asset.Status.VALID)
+    draft_version.assets.add(zarr_asset, blob_asset)
+
+    assets_summary = aggregate_version_assets_summary(draft_version)
+
+    assert assets_summary['numberOfBytes'] == zarr_archive.size + blob_asset.blob.size
+    assert assets_summary['numberOfFiles'] == 2
+    assert assets_summary == aggregate_assets_summary(
+        iter_full_metadata(draft_version.assets.order_by('created', 'id'))
+    )
+
+
+@pytest.mark.django_db()
+def test_version_assets_summary_incremental(draft_version, draft_asset_factory):
+    # Build the (empty) counters before any assets are added
+    assert version_assets_summary(draft_version) == aggregate_version_assets_summary(draft_version)
+
+    assets = [
+        draft_asset_factory(
+            status=Asset.Status.VALID,
+            path=f'sub-{i}/sub-{i}_sample-{i % 2}.nwb',
+            metadata={
+                'schemaVersion': settings.DANDI_SCHEMA_VERSION,
+                'encodingFormat': 'application/x-nwb',
+                'approach': [[_IMAGING], [_ELECTROPHYSIOLOGY]][i % 2],
+                'wasAttributedTo': [_participant(f'{i}', ['10090', '10116'][i % 2])],
+            },
+        )
+        for i in range(4)
+    ]
+    draft_version.assets.add(*assets)
+    update_version_assets_summary(draft_version, added=assets)
+    assert version_assets_summary(draft_version) == aggregate_version_assets_summary(draft_version)
+
+    # Values which are also contributed by another asset are still rendered, in their first place
+    draft_version.assets.remove(assets[0])
+    update_version_assets_summary(draft_version, removed=[assets[0]])
+    assets_summary = version_assets_summary(draft_version)
+    assert assets_summaries_equal(assets_summary, aggregate_version_assets_summary(draft_version))
+    assert assets_summary['approach'] == [_IMAGING, _ELECTROPHYSIOLOGY]
+
+    # An asset which is no longer valid is no longer counted
+    Asset.objects.filter(id=assets[1].id).update(status=Asset.Status.INVALID)
+    assets[1].status = Asset.Status.INVALID
+    update_asset_status_assets_summaries(assets[1], previous_status=Asset.Status.VALID)
+    assets_summary = version_assets_summary(draft_version)
+    assert assets_summaries_equal(assets_summary, aggregate_version_assets_summary(draft_version))
+    assert assets_summary['numberOfFiles'] == 2
+    assert assets_summary['numberOfSubjects'] == 2
+    assert assets_summary['approach'] == [_IMAGING]
+
+
+@pytest.mark.django_db()
+def test_version_assets_summary_pending_asset(draft_version, draft_asset_factory):
+    version_assets_summary(draft_version)
+
+    # Assets are only counted once they are valid
+    asset = draft_asset_factory(status=Asset.Status.PENDING)
+    draft_version.assets.add(asset)
+    update_version_assets_summary(draft_version, added=[asset])
+    assert version_assets_summary(draft_version)['numberOfFiles'] == 0
+
+    Asset.objects.filter(id=asset.id).update(status=Asset.Status.VALID)
+    asset.status = Asset.Status.VALID
+    update_asset_status_assets_summaries(asset, previous_status=Asset.Status.PENDING)
+    assets_summary = version_assets_summary(draft_version)
+    assert assets_summary['numberOfFiles'] == 1
+    assert assets_summary['numberOfBytes'] == asset.blob.size
+
+
+@pytest.mark.django_db()
+def test_version_assets_summary_rebuilt(draft_version, draft_asset_factory):
+    asset = draft_asset_factory(status=Asset.Status.VALID)
+    draft_version.assets.add(asset)
+
+    # Counters which don't exist yet are built from the assets of the version
+    assert not VersionAssetsSummary.objects.filter(version=draft_version).exists()
+    assert version_assets_summary(draft_version) == aggregate_version_assets_summary(draft_version)
+    assert VersionAssetsSummary.objects.get(version=draft_version).number_of_files == 1
+
+
 @pytest.mark.django_db()
 def test_version_size(
     version,
@@ -400,6 +660,29 @@ def test_version_size(
     assert version.size == 700
 
 
+@pytest.mark.django_db()
+def test_version_asset_count_size_incremental(version, asset_factory, asset_blob_factory):
+    asset1 = asset_factory(path='a/b.txt', blob=asset_blob_factory(size=100))
+    asset2 = asset_factory(path='c.txt', blob=asset_blob_factory(size=200))
+    version.assets.add(asset1, asset2)
+    update_version_asset_paths(version, added=[asset1, asset2])
+    assert (version.asset_count, version.size) == (2, 300)
+
+    # Saving a stale instance must not overwrite the counters
+    stale = Version.objects.get(id=version.id)
+    delete_asset_paths(asset1, version)
+    stale.save()
+    version.refresh_from_db()
+    assert (version.asset_count, version.size) == (1, 200)
+
+    # Drift is corrected by recomputing from the root paths
+    Version.objects.filter(id=version.id).update(asset_count=5, size=5)
+    version.refresh_from_db()
+    assert refresh_version_totals(version) == (5, 5)
+    version.refresh_from_db()
+    assert (version.asset_count, version.size) == (1, 200)
+
+
 @pytest.mark.django_db()
 def test_version_rest_list(api_client, user, version, draft_version_factory):
     api_client.force_authenticate(user=user)
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 import re
+from typing import TYPE_CHECKING
 
+from dandiapi.api.asset_glob import compile_glob
+from dandiapi.api.asset_metadata import full_metadata_many
 from dandiapi.api.asset_paths import search_asset_paths
 from dandiapi.api.services.asset import (
+    NewAsset,
     add_asset_to_version,
+    add_assets_to_version,
     change_asset,
     remove_asset_from_version,
 )
 from dandiapi.api.services.asset.exceptions import DraftDandisetNotModifiableError
 from dandiapi.api.services.embargo.exceptions import DandisetUnembargoInProgressError
+from dandiapi.api.services.version.paths_snapshot import (
+    get_version_paths_snapshot,
+    get_version_paths_snapshot_after,
+)
 from dandiapi.zarr.models import ZarrArchive
 
 try:
@@ -25,17 +35,21 @@ except ImportError:
 
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django_filters import rest_framework as filters
 from drf_yasg.utils import swagger_auto_schema
 from guardian.decorators import permission_required_or_403
+from more_itertools import ichunked
 from rest_framework import serializers, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied
 from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import Cursor
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.viewsets import GenericViewSet, ReadOnlyModelViewSet
 from rest_framework_extensions.mixins import DetailSerializerMixin, NestedViewSetMixin
 
@@ -43,12 +57,14 @@ from dandiapi.api.models import Asset, AssetBlob, Dandiset, Version
 from dandiapi.api.models.asset import validate_asset_path
 from dandiapi.api.models.dandiset import DandisetUserObjectPermission
 from dandiapi.api.permissions import IsApproved
+from dandiapi.api.services.exceptions import DandiError
 from dandiapi.api.views.common import (
     ASSET_ID_PARAM,
     VERSIONS_DANDISET_PK_PARAM,
     VERSIONS_VERSION_PARAM,
 )
-from dandiapi.api.views.pagination import DandiPagination, LazyPagination
+from dandiapi.api.views.pagination import DandiPagination, LazyPagination, PathCursorPagination
+from dandiapi.api.views.renderers import NDJSONRenderer
 from dandiapi.api.views.serializers import (
     AssetDetailSerializer,
     AssetDownloadQueryParameterSerializer,
@@ -57,8 +73,12 @@ from dandiapi.api.views.serializers import (
     AssetPathsSerializer,
     AssetSerializer,
     AssetValidationSerializer,
+    get_webknossos_info,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
 
 class AssetFilter(filters.FilterSet):
     path = filters.CharFilter(lookup_expr='istartswith')
@@ -233,6 +253,15 @@ class AssetRequestSerializer(serializers.Serializer):
         return data
 
 
+class AssetBatchRequestSerializer(serializers.Serializer):
+    assets = serializers.ListField(
+        child=serializers.JSONField(),
+        allow_empty=False,
+        max_length=settings.DANDI_ASSET_BATCH_MAX_SIZE,
+        help_text='A list of assets, each in the same format as when creating a single asset.',
+    )
+
+
 class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet):
     pagination_class = DandiPagination
     # Inherited from AssetViewSet -- permission_classes = [IsApproved]
@@ -352,6 +381,97 @@ class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet)
         serializer = AssetDetailSerializer(instance=asset)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @swagger_auto_schema(
+        request_body=AssetBatchRequestSerializer,
+        responses={200: 'A result for each asset, in the same order as the request'},
+        manual_parameters=[VERSIONS_DANDISET_PK_PARAM, VERSIONS_VERSION_PARAM],
+        operation_summary='Create many assets.',
+        operation_description='Creates many assets and adds them to a specified version.\
+                               User must be an owner of the specified dandiset.\
+                               New assets can only be attached to draft versions.\
+                               Each result has the status code and response body that creating\
+                               the asset on its own would have had, except that the metadata\
+                               of created assets is not included.',
+    )
+    @action(detail=False, methods=['POST'])
+    @method_decorator(
+        permission_required_or_403('owner', (Dandiset, 'pk', 'versions__dandiset__pk'))
+    )
+    def batch(self, request, versions__dandiset__pk, versions__version):
+        version: Version = get_object_or_404(
+            Version.objects.select_related('dandiset'),
+            dandiset=versions__dandiset__pk,
+            version=versions__version,
+        )
+
+        if version.dandiset.unembargo_in_progress:
+            raise DandisetUnembargoInProgressError
+
+        batch_serializer = AssetBatchRequestSerializer(data=self.request.data)
+        batch_serializer.is_valid(raise_exception=True)
+
+        # Validate each asset on its own, so that an invalid asset doesn't fail the whole batch
+        results: list[dict | None] = []
+        validated: list[dict] = []
+        for data in batch_serializer.validated_data['assets']:
+            serializer = AssetRequestSerializer(data=data)
+            if serializer.is_valid():
+                results.append(None)
+                validated.append(serializer.validated_data)
+            else:
+                results.append({'status': status.HTTP_400_BAD_REQUEST, 'detail': serializer.errors})
+
+        # Fetch all blobs and zarr archives at once
+        blobs = AssetBlob.objects.in_bulk(
+            [data['blob_id'] for data in validated if 'blob_id' in data], field_name='blob_id'
+        )
+        zarr_archives = ZarrArchive.objects.select_related('dandiset').in_bulk(
+            [data['zarr_id'] for data in validated if 'zarr_id' in data], field_name='zarr_id'
+        )
+
+        indexes: list[int] = []
+        new_assets: list[NewAsset] = []
+        pending = iter(validated)
+        for index, result in enumerate(results):
+            if result is not None:
+                continue
+            data = next(pending)
+            asset_blob = blobs.get(data['blob_id']) if 'blob_id' in data else None
+            zarr_archive = zarr_archives.get(data['zarr_id']) if 'zarr_id' in data else None
+            if asset_blob is None and zarr_archive is None:
+                results[index] = {'status': status.HTTP_404_NOT_FOUND, 'detail': 'Not found.'}
+                continue
+
+            indexes.append(index)
+            new_assets.append(
+                NewAsset(
+                    metadata=data['metadata'], asset_blob=asset_blob, zarr_archive=zarr_archive
+                )
+            )
+
+        created = add_assets_to_version(user=request.user, version=version, new_assets=new_assets)
+        for index, asset in zip(indexes, created, strict=True):
+            results[index] = self._batch_result(asset)
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _batch_result(asset: Asset | Exception) -> dict:
+        """Return the status and body that creating the asset on its own would have had."""
+        if isinstance(asset, Asset):
+            return {
+                'status': status.HTTP_200_OK,
+                'asset': AssetSerializer(instance=asset, metadata=False).data,
+            }
+        if isinstance(asset, DandiError):
+            return {
+                'status': asset.http_status_code or status.HTTP_400_BAD_REQUEST,
+                'detail': asset.message,
+            }
+        if isinstance(asset, ValidationError):
+            return {'status': status.HTTP_400_BAD_REQUEST, 'detail': asset.messages}
+        raise asset
+
     @swagger_auto_schema(
         request_body=AssetRequestSerializer,
         responses={200: AssetDetailSerializer},
@@ -425,6 +545,14 @@ class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet)
 
     @swagger_auto_schema(query_serializer=AssetListSerializer, responses={200: AssetSerializer})
     def list(self, request, *args, **kwargs):
+        """
+        List the assets of a version.
+
+        Results are paginated by page number. Alternatively, `after` pages through the assets in
+        path order with a cursor, which stays fast for large versions. With `format=ndjson`, all
+        matching assets (after `after`, if given) are streamed in a single response, as newline
+        delimited JSON.
+        """
         # Manually call this to ensure user is authorized
         self.raise_if_unauthorized()
 
@@ -443,12 +571,28 @@ class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet)
         # Must do glob pattern matching before pagination
         glob_pattern: str | None = serializer.validated_data.get('glob')
         if glob_pattern is not None:
-            # Escape special characters in the glob pattern. This is a security precaution taken
-            # since we are using postgres' regex search. A malicious user who knows this could
-            # include a regex as part of the glob expression, which postgres would happily parse
-            # and use if it's not escaped.
-            glob_pattern = f'^{re.escape(glob_pattern)}$'
-            asset_queryset = asset_queryset.filter(path__iregex=glob_pattern.replace('\\*', '.*'))
+            # The literal prefix of the pattern is matched using an index, and any remaining
+            # wildcards are only evaluated against the assets with that prefix
+            asset_queryset = compile_glob(glob_pattern).filter(asset_queryset)
+
+        include_metadata = serializer.validated_data['metadata']
+        after: str | None = serializer.validated_data.get('after')
+        if after is not None:
+            if 'order' in request.query_params:
+                raise serializers.ValidationError({'after': 'Cannot be combined with order.'})
+
+            # Both conditions must be in one filter, so that they apply to the same path
+            asset_queryset = asset_queryset.filter(
+                leaf_paths__version=version,
+                leaf_paths__path__gt=self._resolve_after_path(version, after),
+            ).order_by('leaf_paths__path')
+
+        # Stream every remaining asset in one response, from a server side cursor
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return self._stream_ndjson(asset_queryset, include_metadata=include_metadata)
+
+        if after is not None:
+            return self._list_after(request, asset_queryset, include_metadata=include_metadata)
 
         # Retrieve just the first N asset IDs, and use them for pagination
         # Use custom pagination class to reduce unnecessary counts of assets
@@ -470,12 +614,90 @@ class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet)
         )
 
         # Must apply this to the main queryset, since it affects the data returned
-        include_metadata = serializer.validated_data['metadata']
         if not include_metadata:
             queryset = queryset.defer('metadata')
         # Paginate and return
-        serializer = self.get_serializer(queryset, many=True, metadata=include_metadata)
-        return paginator.get_paginated_response(serializer.data)
+        data = self._serialize_assets(queryset, include_metadata=include_metadata)
+        return paginator.get_paginated_response(data)
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == 'list':
+            renderers.append(NDJSONRenderer())
+        return renderers
+
+    @staticmethod
+    def _resolve_after_path(version: Version, after: str) -> str:
+        """Return the path to list assets after, given either a path or an asset ID."""
+        if not re.fullmatch(Asset.UUID_REGEX, after):
+            return after
+
+        path = version.assets.filter(asset_id=after).values_list('path', flat=True).first()
+        if path is None:
+            raise serializers.ValidationError(
+                {'after': 'No asset with this ID exists in this version.'}
+            )
+        return path
+
+    def _list_after(self, request, asset_queryset, *, include_metadata: bool) -> Response:
+        """
+        Return the page of assets following the `after` cursor, in path order.
+
+        Assets are ordered by their path in this version's asset path index, so each page is a
+        range scan of that index instead of skipping over all of the previous pages.
+        """
+        paginator = LazyPagination()
+        page_size = paginator.get_page_size(request)
+        page = list(asset_queryset.values_list('id', 'path')[: page_size + 1])
+        has_next = len(page) > page_size
+        page = page[:page_size]
+
+        queryset = Asset.objects.filter(id__in=[asset_id for asset_id, _ in page])
+        queryset = queryset.select_related('blob', 'zarr').order_by('path')
+        if not include_metadata:
+            queryset = queryset.defer('metadata')
+        data = self._serialize_assets(queryset, include_metadata=include_metadata)
+
+        next_link = (
+            replace_query_param(request.build_absolute_uri(), 'after', page[-1][1])
+            if has_next
+            else None
+        )
+        return Response(
+            OrderedDict(
+                [
+                    ('count', None),
+                    ('next', next_link),
+                    ('previous', None),
+                    ('results', data),
+                ]
+            )
+        )
+
+    def _serialize_assets(self, assets: Iterable[Asset], *, include_metadata: bool) -> list:
+        assets = list(assets)
+        context = self.get_serializer_context()
+        if include_metadata:
+            # Build the full metadata of the whole page at once
+            context['full_metadata'] = {
+                asset.id: metadata
+                for asset, metadata in zip(assets, full_metadata_many(assets), strict=True)
+            }
+        return self.get_serializer(
+            assets, many=True, metadata=include_metadata, context=context
+        ).data
+
+    def _stream_ndjson(self, asset_queryset, *, include_metadata: bool) -> StreamingHttpResponse:
+        queryset = asset_queryset.select_related('blob', 'zarr')
+        if not include_metadata:
+            queryset = queryset.defer('metadata')
+
+        def lines():
+            for chunk in ichunked(queryset.iterator(chunk_size=1_000), 1_000):
+                for data in self._serialize_assets(chunk, include_metadata=include_metadata):
+                    yield NDJSONRenderer.render_line(data)
+
+        return StreamingHttpResponse(lines(), content_type=NDJSONRenderer.media_type)
 
     @swagger_auto_schema(
         query_serializer=AssetPathsQueryParameterSerializer,
@@ -488,10 +710,35 @@ class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet)
 
         The specified path must be a folder; it either must end in a slash or
         (to refer to the root folder) must be the empty string.
+
+        Results are paginated with an opaque `cursor`, and the count is only returned on the
+        first page. Page number pagination is still used if the `page` parameter is provided.
+        Folders of published versions are served from a precomputed snapshot where possible, with
+        the same pagination.
+
+        If `depth` or `recursive` is provided, all paths up to that many levels below the
+        specified path are listed (including their aggregates), ordered by path. This allows an
+        entire subtree to be walked without a request per folder.
         """
         query_serializer = AssetPathsQueryParameterSerializer(data=self.request.query_params)
         query_serializer.is_valid(raise_exception=True)
 
+        # Direct children in published versions are served from a precomputed snapshot, if one
+        # exists. Only open dandisets can be published, so no permission check is necessary.
+        if (
+            versions__version != 'draft'
+            and query_serializer.validated_data['depth'] == 1
+            and not query_serializer.validated_data['recursive']
+        ):
+            response = self._paths_from_snapshot(
+                request,
+                versions__dandiset__pk,
+                versions__version,
+                query_serializer.validated_data['path_prefix'],
+            )
+            if response is not None:
+                return response
+
         # Permission check
         self.raise_if_unauthorized()
 
@@ -504,17 +751,130 @@ class NestedAssetViewSet(NestedViewSetMixin, AssetViewSet, ReadOnlyModelViewSet)
 
         # Fetch child paths
         path: str = query_serializer.validated_data['path_prefix']
-        children_paths = search_asset_paths(path, version)
+        depth: int | None = (
+            None
+            if query_serializer.validated_data['recursive']
+            else query_serializer.validated_data['depth']
+        )
+        children_paths = search_asset_paths(path, version, depth=depth)
         if children_paths is None:
             raise NotFound('Specified path not found.')
 
-        # Paginate and return
-        page = self.paginate_queryset(children_paths)
+        # Paginate and return. Cursor pagination avoids both OFFSET and COUNT on later pages,
+        # which are slow for folders with many children.
+        paginator = self.paginator if 'page' in request.query_params else PathCursorPagination()
+        page = paginator.paginate_queryset(children_paths, request, view=self)
+        paths = list(children_paths) if page is None else page
+
+        # Fetch the webknossos info of every asset on the page at once
+        context = {
+            'webknossos_info': get_webknossos_info(
+                [path.asset_id for path in paths if path.asset_id is not None]
+            )
+        }
+        serializer = AssetPathsSerializer(paths, many=True, context=context)
         if page is not None:
-            serializer = AssetPathsSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return paginator.get_paginated_response(serializer.data)
 
-        serializer = AssetPathsSerializer(children_paths, many=True)
         return Response(serializer.data)
 
+    def _paths_from_snapshot(
+        self, request, dandiset_id: str, version: str, path: str
+    ) -> Response | None:
+        """
+        Return a page of a published folder listing from its snapshot, with a single query.
+
+        Pages are linked like those listed from the asset paths: by page number if the `page`
+        parameter is provided, and by the cursors of `PathCursorPagination` otherwise.
+        """
+        if 'page' in request.query_params:
+            return self._paths_page_from_snapshot(request, dandiset_id, version, path)
+
+        paginator = PathCursorPagination()
+        paginator.base_url = request.build_absolute_uri()
+        cursor = paginator.decode_cursor(request)
+        # Cursors to previous pages are left to the asset paths
+        if cursor is not None and (cursor.reverse or cursor.offset):
+            return None
+        try:
+            snapshot = get_version_paths_snapshot_after(
+                int(dandiset_id),
+                version,
+                path,
+                after=cursor and cursor.position,
+                limit=paginator.get_page_size(request),
+            )
+        except ValueError:
+            return None
+        if snapshot is None:
+            return None
+
+        # Paths are unique, so like `PathCursorPagination`, the cursors never need an offset
+        count, results, has_next = snapshot
+        next_link = (
+            paginator.encode_cursor(Cursor(offset=0, reverse=False, position=results[-1]['path']))
+            if has_next
+            else None
+        )
+        previous_link = (
+            paginator.encode_cursor(Cursor(offset=0, reverse=True, position=results[0]['path']))
+            if cursor is not None
+            else None
+        )
+
+        return Response(
+            OrderedDict(
+                [
+                    ('count', count if cursor is None else None),
+                    ('next', next_link),
+                    ('previous', previous_link),
+                    ('results', results),
+                ]
+            )
+        )
+
+    def _paths_page_from_snapshot(
+        self, request, dandiset_id: str, version: str, path: str
+    ) -> Response | None:
+        paginator = DandiPagination()
+        page_size = paginator.get_page_size(request)
+        try:
+            page_number = int(request.query_params.get(paginator.page_query_param, 1))
+            snapshot = get_version_paths_snapshot(
+                int(dandiset_id),
+                version,
+                path,
+                offset=(page_number - 1) * page_size,
+                limit=page_size,
+            )
+        except ValueError:
+            return None
+        if snapshot is None:
+            return None
+
+        count, results = snapshot
+        url = request.build_absolute_uri()
+        next_link = (
+            replace_query_param(url, paginator.page_query_param, page_number + 1)
+            if page_number * page_size < count
+            else None
+        )
+        if page_number == 1:
+            previous_link = None
+        elif page_number == 2:  # noqa: PLR2004
+            previous_link = remove_query_param(url, paginator.page_query_param)
+        else:
+            previous_link = replace_query_param(url, paginator.page_query_param, page_number - 1)
+
+        return Response(
+            OrderedDict(
+                [
+                    ('count', count),
+                    ('next', next_link),
+                    ('previous', previous_link),
+                    ('results', results),
+                ]
+            )
+        )
+
     # TODO: add create to forge an asset from a validation
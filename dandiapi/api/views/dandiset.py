@@ -6,8 +6,7 @@ from typing import TYPE_CHECKING
 from allauth.socialaccount.models import SocialAccount
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Count, Max, OuterRef, QuerySet, Subquery, Sum
-from django.db.models.functions import Coalesce
+from django.db.models import Count, Max, OuterRef, QuerySet, Subquery
 from django.db.models.query_utils import Q
 from django.http import Http404
 from django.utils.decorators import method_decorator
@@ -23,7 +22,6 @@ from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from dandiapi.api.asset_paths import get_root_paths_many
 from dandiapi.api.mail import send_ownership_change_emails
 from dandiapi.api.models import Dandiset, Version
 from dandiapi.api.permissions import IsApproved
@@ -93,14 +91,7 @@ class DandisetFilterBackend(filters.OrderingFilter):
                 latest_version = Version.objects.filter(dandiset=OuterRef('pk')).order_by(
                     '-created'
                 )[:1]
-                queryset = queryset.annotate(
-                    size=Subquery(
-                        latest_version.annotate(
-                            size=Coalesce(Sum('assets__blob__size'), 0)
-                            + Coalesce(Sum('assets__zarr__size'), 0)
-                        ).values('size')
-                    )
-                )
+                queryset = queryset.annotate(size=Subquery(latest_version.values('size')))
                 return queryset.order_by(ordering)
         return queryset
 
@@ -149,11 +140,9 @@ class DandisetViewSet(ReadOnlyModelViewSet):
                 )
             if not show_empty:
                 # Only include dandisets that have assets in their most recent version.
-                most_recent_version = (
-                    Version.objects.filter(dandiset=OuterRef('pk'))
-                    .order_by('-created')
-                    .annotate(asset_count=Count('assets'))[:1]
-                )
+                most_recent_version = Version.objects.filter(dandiset=OuterRef('pk')).order_by(
+                    '-created'
+                )[:1]
                 queryset = queryset.annotate(
                     asset_count=Subquery(most_recent_version.values('asset_count'))
                 )
@@ -198,30 +187,12 @@ class DandisetViewSet(ReadOnlyModelViewSet):
             .order_by('-version', '-modified')
         )
 
-        # This query sums the size and file count for root paths, and groups by the version_id,
-        # ensuring that the queryset is unique w.r.t the version_id. For some reason, the
-        # `order_by` clause is necessary to ensure this grouping
-        version_stats = {
-            entry['version_id']: entry
-            for entry in get_root_paths_many(versions=relevant_versions)
-            .values('version_id')
-            .annotate(total_size=Sum('aggregate_size'), num_assets=Sum('aggregate_files'))
-            .order_by()
-        }
-
-        def annotate_version(version: Version):
-            """Annotate a version with its aggregate stats."""
-            stats = version_stats.get(version.id, {'total_size': 0, 'num_assets': 0})
-            version.total_size = stats['total_size']
-            version.num_assets = stats['num_assets']
-
         # Create a map from dandiset IDs to their draft and published versions
         dandisets_to_versions = {}
 
-        # Annotate and store all draft versions
+        # Store all draft versions
         drafts = relevant_versions.filter(version='draft')
         for version in drafts:
-            annotate_version(version)
             dandisets_to_versions[version.dandiset_id] = {
                 'published': None,
                 'draft': version,
@@ -238,7 +209,6 @@ class DandisetViewSet(ReadOnlyModelViewSet):
             )
         )
         for version in latest_published:
-            annotate_version(version)
             dandisets_to_versions[version.dandiset_id]['published'] = version
 
         return dandisets_to_versions
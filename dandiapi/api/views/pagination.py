@@ -4,7 +4,7 @@ from collections import OrderedDict
 
 from django.core.paginator import Page, Paginator
 from django.utils.functional import cached_property
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 
@@ -105,3 +105,39 @@ class LazyPagination(PageNumberPagination):
         )
 
         return Response(page_dict)
+
+
+class PathCursorPagination(CursorPagination):
+    """
+    A keyset pagination over `path`, which never uses OFFSET.
+
+    Like `LazyPagination`, the count of the queryset is only included on the first page, which is
+    the page requested without a cursor.
+    """
+
+    ordering = 'path'
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+
+    @cached_property
+    def page_size_query_description(self):
+        return f'{super().page_size_query_description[:-1]} (maximum {self.max_page_size}).'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = (
+            queryset.count() if request.query_params.get(self.cursor_query_param) is None else None
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data) -> Response:
+        page_dict = OrderedDict(
+            [
+                ('count', self.count),
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]
+        )
+
+        return Response(page_dict)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Render newline delimited JSON, with one line per result.
+
+    Views which support this format stream their response directly, so this is only used to
+    render ordinary responses (e.g. errors) when `?format=ndjson` is requested.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    @staticmethod
+    def render_line(data) -> str:
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        results = data.get('results', [data]) if isinstance(data, dict) else data
+        if not isinstance(results, list):
+            results = [results]
+        return ''.join(self.render_line(result) for result in results).encode()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from typing import TYPE_CHECKING, Any
 
 import requests
@@ -11,11 +12,21 @@ from django.db.models.query_utils import Q
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 
-from dandiapi.api.models import Asset, AssetBlob, AssetPath, Dandiset, Upload, Version
+from dandiapi.api.models import (
+    Asset,
+    AssetBlob,
+    AssetPath,
+    Dandiset,
+    Upload,
+    Version,
+    WebKnossosAnnotation,
+    WebKnossosDataLayer,
+)
 from dandiapi.search.models import AssetSearch
 
 if TYPE_CHECKING:
     from collections import OrderedDict
+    from collections.abc import Iterable
 
 
 def extract_contact_person(version: Version) -> str:
@@ -121,10 +132,6 @@ class DandisetVersionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created']
 
-    # Override the model methods with fields populated from a query
-    asset_count = serializers.IntegerField(source='num_assets')
-    size = serializers.IntegerField(source='total_size')
-
 
 class DandisetListSerializer(DandisetSerializer):
     """The dandiset serializer to be used in the listing endpoint."""
@@ -335,6 +342,24 @@ class AssetDownloadQueryParameterSerializer(serializers.Serializer):
     content_disposition = serializers.ChoiceField(['attachment', 'inline'], default='attachment')
 
 
+class FullMetadataField(serializers.JSONField):
+    """
+    The full metadata of an asset.
+
+    If the serializer context contains `full_metadata` (a map of asset ID to full metadata, e.g.
+    from `full_metadata_many`), it is used instead of computing it for each asset.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(source='full_metadata', **kwargs)
+
+    def get_attribute(self, instance):
+        full_metadata = self.context.get('full_metadata')
+        if full_metadata is not None and instance.id in full_metadata:
+            return full_metadata[instance.id]
+        return super().get_attribute(instance)
+
+
 class AssetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Asset
@@ -352,7 +377,7 @@ class AssetSerializer(serializers.ModelSerializer):
 
     blob = serializers.SlugRelatedField(slug_field='blob_id', read_only=True)
     zarr = serializers.SlugRelatedField(slug_field='zarr_id', read_only=True)
-    metadata = serializers.JSONField(source='full_metadata')
+    metadata = FullMetadataField()
 
     def __init__(self, *args, metadata=True, **kwargs):
         # Instantiate the superclass normally
@@ -369,12 +394,44 @@ class AssetDetailSerializer(AssetSerializer):
 
 
 class AssetListSerializer(serializers.Serializer):
-    glob = serializers.CharField(required=False)
+    glob = serializers.CharField(
+        required=False,
+        help_text=(
+            'Only list assets whose path matches this case-insensitive glob. `*` matches any '
+            'characters, including `/`. A `**` path segment (e.g. `a/**/b.txt`) matches zero or '
+            'more folders.'
+        ),
+    )
     metadata = serializers.BooleanField(required=False, default=False)
+    after = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text=(
+            'List assets in path order, starting after this path or asset ID. '
+            'Use an empty value to start from the beginning, and follow the `next` link.'
+        ),
+    )
 
 
 class AssetPathsQueryParameterSerializer(serializers.Serializer):
     path_prefix = serializers.CharField(default='')
+    cursor = serializers.CharField(
+        required=False, help_text='The pagination cursor value, taken from the `next` link.'
+    )
+    depth = serializers.IntegerField(
+        min_value=1,
+        default=1,
+        help_text='The number of levels below path_prefix to list. Defaults to direct children.',
+    )
+    recursive = serializers.BooleanField(
+        default=False, help_text='List the entire subtree below path_prefix, regardless of depth.'
+    )
+
+    def validate(self, data):
+        if data['recursive'] and 'depth' in self.initial_data:
+            raise serializers.ValidationError('Only one of depth or recursive may be specified.')
+
+        return data
 
 
 class PaginationQuerySerializer(serializers.Serializer):
@@ -382,6 +439,50 @@ class PaginationQuerySerializer(serializers.Serializer):
     page_size = serializers.IntegerField(default=100)
 
 
+def _webknossos_dataset_info(datalayer: WebKnossosDataLayer, annotations) -> dict:
+    return {
+        "webknossos_url": datalayer.get_webknossos_url(),
+        "webknossos_name": datalayer.webknossos_dataset.webknossos_dataset_name,
+        "webknossos_annotations": [
+            {
+                "webknossos_annotation_name": annotation.webknossos_annotation_name,
+                "webknossos_annotation_url": annotation.get_webknossos_url(),
+                "webknossos_annotation_author": annotation.get_author_full_name()
+            }
+            for annotation in annotations
+        ]
+    }
+
+
+def get_webknossos_info(asset_ids: Iterable[int]) -> dict[int, list[dict]]:
+    """
+    Return the webknossos info of many assets, keyed by asset ID, using two queries.
+
+    This is passed to `AssetFileSerializer` as the `webknossos_info` context, so that serializing
+    a page of assets doesn't query the datasets and annotations of each asset individually.
+    """
+    datalayers = list(
+        WebKnossosDataLayer.objects.filter(asset_id__in=asset_ids)
+        .select_related('webknossos_dataset')
+        .order_by('id')
+    )
+    if not datalayers:
+        return {}
+
+    annotations = defaultdict(list)
+    for annotation in WebKnossosAnnotation.objects.filter(
+        webknossos_dataset_id__in={datalayer.webknossos_dataset_id for datalayer in datalayers}
+    ).order_by('id'):
+        annotations[annotation.webknossos_dataset_id].append(annotation)
+
+    info = defaultdict(list)
+    for datalayer in datalayers:
+        info[datalayer.asset_id].append(
+            _webknossos_dataset_info(datalayer, annotations[datalayer.webknossos_dataset_id])
+        )
+    return dict(info)
+
+
 class AssetFileSerializer(AssetSerializer):
     webknossos_info = serializers.SerializerMethodField()
 
@@ -391,20 +492,15 @@ class AssetFileSerializer(AssetSerializer):
     url = serializers.URLField(source='s3_url')
 
     def get_webknossos_info(self, obj):
+        # Use the info fetched for the whole page by `get_webknossos_info`, if it was provided
+        if 'webknossos_info' in self.context:
+            return self.context['webknossos_info'].get(obj.id, [])
+
         return [
-            {
-                "webknossos_url": dataset.get_webknossos_url(),
-                "webknossos_name": dataset.webknossos_dataset.webknossos_dataset_name,
-                "webknossos_annotations": [
-                    {
-                        "webknossos_annotation_name": annotation.webknossos_annotation_name,
-                        "webknossos_annotation_url": annotation.get_webknossos_url(),
-                        "webknossos_annotation_author": annotation.get_author_full_name()
-                    }
-                    for annotation in dataset.webknossos_dataset.webknossos_annotations.all()
-                ]
-            }
-            for dataset in obj.webknossos_datasets.all()
+            _webknossos_dataset_info(
+                datalayer, datalayer.webknossos_dataset.webknossos_annotations.all()
+            )
+            for datalayer in obj.webknossos_datasets.all()
         ]
 
 
@@ -100,6 +100,12 @@ class DandiMixin(ConfigMixin):
     # Mainly applies to unembargo
     DANDI_MULTIPART_COPY_MAX_WORKERS = values.IntegerValue(environ=True, default=50)
 
+    # The number of top-level directories of a zarr archive which are checksummed concurrently
+    DANDI_ZARR_INGEST_MAX_WORKERS = values.IntegerValue(environ=True, default=16)
+    # The number of modified directories of a zarr archive above which it is ingested from
+    # scratch, rather than by listing each modified directory again
+    DANDI_ZARR_INCREMENTAL_INGEST_MAX_DIRECTORIES = values.IntegerValue(environ=True, default=5_000)
+
     # This is where the schema version should be set.
     # It can optionally be overwritten with the environment variable, but that should only be
     # considered a temporary fix.
@@ -117,6 +123,9 @@ class DandiMixin(ConfigMixin):
 
     DANDI_VALIDATION_JOB_INTERVAL = values.IntegerValue(environ=True, default=60)
 
+    # The maximum number of assets which can be created in a single batch request
+    DANDI_ASSET_BATCH_MAX_SIZE = values.IntegerValue(environ=True, default=1_000)
+
     # The CloudAMQP connection was dying, using the heartbeat should keep it alive
     CELERY_BROKER_HEARTBEAT = 20
     # Retry connections in case rabbit isn't immediately running
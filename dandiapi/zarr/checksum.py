@@ -0,0 +1,331 @@
+"""
+Compute the checksum of a zarr archive, reusing the checksums of its unmodified directories.
+
+The checksum of a directory only depends on the files directly inside it and on the checksums
+of its subdirectories. The checksum of every directory is saved as a `ZarrDirectoryChecksum`, so
+that after files are uploaded or deleted, only the modified directories and their ancestors are
+listed and checksummed again.
+
+The first ingestion of a zarr archive (or a forced one) checksums every top-level directory
+independently, in parallel. The checksums of a top-level directory and its subdirectories are
+saved as soon as they are known, so an interrupted ingestion resumes from the top-level
+directories it had not finished yet.
+
+The files which are listed along the way are saved as well, as an index of `ZarrFile`s. The files
+below a directory are inserted one page of the listing at a time, rather than held in memory, by
+the thread running the ingestion rather than by the threads listing them.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import posixpath
+import queue
+import threading
+from typing import TYPE_CHECKING
+
+from botocore.config import Config
+from django.conf import settings
+from django.db.models import Q
+from zarr_checksum.checksum import ZarrChecksum, ZarrChecksumManifest, ZarrDirectoryDigest
+from zarr_checksum.tree import ZarrChecksumTree
+
+from dandiapi.api.storage import get_boto_client
+from dandiapi.zarr.models import ZarrDirectoryChecksum, ZarrFile
+
+if TYPE_CHECKING:
+    from dandiapi.zarr.models import ZarrArchive
+
+logger = logging.getLogger(__name__)
+
+ROOT = ''
+
+
+class ChecksumCancelledError(Exception):
+    pass
+
+
+@dataclass
+class ZarrChecksumUpdate:
+    """The checksum of a zarr archive, and the directory checksums and files to save with it."""
+
+    digest: ZarrDirectoryDigest
+    directories: dict[str, str] = field(default_factory=dict)
+    removed: list[str] = field(default_factory=list)
+    # The directories whose files were listed again
+    listed: list[str] = field(default_factory=list)
+    files: list[ZarrFile] = field(default_factory=list)
+
+    def add_subtree(self, path: str, subtree: dict[str, str]):
+        """Add the checksums of a directory subtree which was listed (and indexed) entirely."""
+        self.directories.update(subtree)
+
+    def save(self, zarr: ZarrArchive):
+        """Save the directory checksums and files, in the same transaction as the zarr."""
+        ZarrDirectoryChecksum.objects.bulk_create(
+            [
+                ZarrDirectoryChecksum(zarr=zarr, path=path, digest=digest)
+                for path, digest in self.directories.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['zarr', 'path'],
+            update_fields=['digest'],
+            batch_size=5_000,
+        )
+        for path in self.removed:
+            zarr.directory_checksums.filter(Q(path=path) | Q(path__startswith=f'{path}/')).delete()
+
+        # Replace the indexed files directly inside every directory which was listed
+        zarr.indexed_files.filter(directory__in=self.listed).delete()
+        for path in self.removed:
+            zarr.indexed_files.filter(path__startswith=f'{path}/').delete()
+        ZarrFile.objects.bulk_create(self.files, batch_size=5_000)
+
+        zarr.modified_directories.all().delete()
+
+
+def _file_checksum(obj: dict, prefix: str) -> ZarrChecksum:
+    return ZarrChecksum(
+        name=obj['Key'][len(prefix) :], size=obj['Size'], digest=obj['ETag'].strip('"')
+    )
+
+
+def _indexed_file(zarr: ZarrArchive, obj: dict, root: str) -> ZarrFile:
+    path = obj['Key'][len(root) :]
+    return ZarrFile(
+        zarr=zarr,
+        path=path,
+        directory=posixpath.dirname(path),
+        size=obj['Size'],
+        etag=obj['ETag'].strip('"'),
+        last_modified=obj['LastModified'],
+    )
+
+
+def _list_directory(client, bucket: str, prefix: str, path: str) -> tuple[list[dict], list[str]]:
+    """Return the objects and the paths of the subdirectories directly inside a directory."""
+    objects = []
+    directories = []
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/'):
+        objects.extend(page.get('Contents', []))
+        directories.extend(
+            posixpath.join(path, common_prefix['Prefix'][len(prefix) : -1])
+            for common_prefix in page.get('CommonPrefixes', [])
+        )
+
+    return objects, directories
+
+
+def _queue_page(pages: queue.Queue, objects: list[dict], cancelled: threading.Event):
+    # Wait for the page to be taken, unless the other listings are cancelled in the meantime
+    while not cancelled.is_set():
+        try:
+            pages.put(objects, timeout=1)
+        except queue.Full:
+            continue
+        return
+    raise ChecksumCancelledError
+
+
+def _subtree_digests(  # noqa: PLR0913
+    client, bucket: str, root: str, path: str, pages: queue.Queue, cancelled: threading.Event
+) -> dict[str, str]:
+    """
+    Compute the checksums of a directory and of all of its subdirectories.
+
+    Every page of files which is listed is queued, to be indexed by the calling thread.
+    """
+    tree = ZarrChecksumTree()
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=f'{root}{path}/'):
+        if cancelled.is_set():
+            raise ChecksumCancelledError
+        objects = page.get('Contents', [])
+        for obj in objects:
+            tree.add_leaf(
+                path=Path(obj['Key'][len(root) :]),
+                size=obj['Size'],
+                digest=obj['ETag'].strip('"'),
+            )
+        _queue_page(pages, objects, cancelled)
+
+    # Process the tree like `ZarrChecksumTree.process`, keeping the checksum of every directory
+    digests = {}
+    while not tree.empty:
+        node = tree.pop_deepest()
+        if node.path == Path():
+            break
+
+        digest = node.checksums.generate_digest()
+        digests[str(node.path)] = digest.digest
+        tree.add_node(path=node.path, size=digest.size, digest=digest.digest)
+
+    return digests
+
+
+def _compute_subtrees(client, bucket: str, zarr: ZarrArchive, paths: list[str], on_result):
+    """
+    Compute the checksums of many directory subtrees in parallel.
+
+    The subtrees are listed by worker threads, but their files are indexed by the calling thread,
+    on its own database connection, one page at a time. The results of a subtree are only passed
+    to `on_result` once all of its files are indexed.
+    """
+    root = zarr.s3_path('')
+    for path in paths:
+        # Replace any files indexed by an interrupted ingestion, or by the last one
+        zarr.indexed_files.filter(path__startswith=f'{path}/').delete()
+
+    def index_pages():
+        while True:
+            try:
+                objects = pages.get_nowait()
+            except queue.Empty:
+                return
+            ZarrFile.objects.bulk_create([_indexed_file(zarr, obj, root) for obj in objects])
+
+    cancelled = threading.Event()
+    # Bounded, so that the listings don't get far ahead of the indexing
+    pages: queue.Queue = queue.Queue(maxsize=settings.DANDI_ZARR_INGEST_MAX_WORKERS)
+    executor = ThreadPoolExecutor(max_workers=settings.DANDI_ZARR_INGEST_MAX_WORKERS)
+    try:
+        futures = {
+            executor.submit(_subtree_digests, client, bucket, root, path, pages, cancelled): path
+            for path in paths
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            # The pages of a finished subtree were all queued before it finished
+            index_pages()
+            for future in done:
+                on_result(futures[future], future.result())
+    finally:
+        # Stop the remaining listings early if any of them failed
+        cancelled.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _manifest_digest(files: list[ZarrChecksum], directories: dict[str, str]) -> ZarrDirectoryDigest:
+    return ZarrChecksumManifest(
+        files=files,
+        directories=[
+            ZarrChecksum(
+                name=posixpath.basename(path),
+                size=ZarrDirectoryDigest.parse(digest).size,
+                digest=digest,
+            )
+            for path, digest in directories.items()
+        ],
+    ).generate_digest()
+
+
+def _get_client(zarr: ZarrArchive):
+    return get_boto_client(
+        zarr.storage, config=Config(max_pool_connections=settings.DANDI_ZARR_INGEST_MAX_WORKERS)
+    )
+
+
+def compute_zarr_archive_checksum(zarr: ZarrArchive) -> ZarrChecksumUpdate:
+    """
+    Compute the checksum of every directory of a zarr archive, resuming from its checkpoints.
+
+    Checkpoints are saved outside of any transaction, so that they outlive a killed task.
+    """
+    client = _get_client(zarr)
+    bucket = zarr.storage.bucket_name
+    root = zarr.s3_path('')
+
+    objects, directories = _list_directory(client, bucket, root, ROOT)
+    digests = dict(
+        zarr.directory_checksums.filter(path__in=directories).values_list('path', 'digest')
+    )
+    remaining = [directory for directory in directories if directory not in digests]
+    logger.info(
+        'Checksumming %d of %d top-level directories of zarr %s',
+        len(remaining),
+        len(directories),
+        zarr.zarr_id,
+    )
+
+    def save_checkpoint(path: str, subtree: dict[str, str]):
+        # The files of the subtree are already indexed
+        ZarrDirectoryChecksum.objects.bulk_create(
+            [
+                ZarrDirectoryChecksum(zarr=zarr, path=directory, digest=digest)
+                for directory, digest in subtree.items()
+            ],
+            batch_size=5_000,
+        )
+        digests[path] = subtree[path]
+
+    _compute_subtrees(client, bucket, zarr, remaining, save_checkpoint)
+
+    digest = _manifest_digest([_file_checksum(obj, root) for obj in objects], digests)
+    return ZarrChecksumUpdate(
+        digest=digest,
+        directories={ROOT: digest.digest},
+        listed=[ROOT],
+        files=[_indexed_file(zarr, obj, root) for obj in objects],
+    )
+
+
+def update_zarr_archive_checksum(zarr: ZarrArchive) -> ZarrChecksumUpdate:
+    """
+    Compute the checksum of a zarr archive from the checksums saved by its last ingestion.
+
+    Only the modified directories and their ancestors are listed again, one at a time. Apart from
+    the files of new directories, which are indexed as they are listed, nothing is saved, so an
+    interrupted update must start over; the ingestion task computes the checksum from scratch
+    instead, with checkpoints, if this would list too many directories.
+    """
+    client = _get_client(zarr)
+    bucket = zarr.storage.bucket_name
+    root = zarr.s3_path('')
+
+    # Every ancestor of a modified directory is modified as well
+    modified = {ROOT}
+    for modified_path in zarr.modified_directories.values_list('path', flat=True).iterator():
+        path = modified_path
+        while path not in modified:
+            modified.add(path)
+            path = posixpath.dirname(path)
+    logger.info('Checksumming %d modified directories of zarr %s', len(modified), zarr.zarr_id)
+
+    update = ZarrChecksumUpdate(digest=ZarrDirectoryDigest.parse(None))
+    # Deepest first, so that the subdirectories of a directory are always checksummed before it
+    for path in sorted(modified, key=lambda path: path.count('/') + bool(path), reverse=True):
+        prefix = f'{root}{path}/' if path else root
+        objects, directories = _list_directory(client, bucket, prefix, path)
+        if path != ROOT and not (objects or directories):
+            update.removed.append(path)
+            continue
+        update.listed.append(path)
+        update.files.extend(_indexed_file(zarr, obj, root) for obj in objects)
+
+        digests = {
+            directory: update.directories[directory]
+            for directory in directories
+            if directory in update.directories
+        }
+        digests.update(
+            zarr.directory_checksums.filter(
+                path__in=[directory for directory in directories if directory not in digests]
+            ).values_list('path', 'digest')
+        )
+
+        # Subdirectories without a saved checksum are checksummed entirely
+        missing = [directory for directory in directories if directory not in digests]
+        if missing:
+            _compute_subtrees(client, bucket, zarr, missing, update.add_subtree)
+            digests.update({directory: update.directories[directory] for directory in missing})
+
+        digest = _manifest_digest([_file_checksum(obj, prefix) for obj in objects], digests)
+        update.directories[path] = digest.digest
+
+    update.digest = ZarrDirectoryDigest.parse(update.directories[ROOT])
+    return update
@@ -0,0 +1,138 @@
+"""
+List the files of a zarr archive from its file index, like `list_objects_v2` would.
+
+With a delimiter, the files below the prefix are grouped into common prefixes. Rather than
+reading every file below the prefix, the index is skipped ahead past each common prefix, so a
+page of results only takes as many index lookups as it has entries.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.db import connection
+from zarr_checksum.checksum import ZarrDirectoryDigest
+
+from dandiapi.zarr.models import ZarrFile
+
+if TYPE_CHECKING:
+    from dandiapi.zarr.models import ZarrArchive
+
+ZARR_FILE_TABLE = ZarrFile._meta.db_table
+
+# The greatest character, so that appending it to a common prefix sorts after all of its files
+_MAX_CHAR = '\U0010ffff'
+
+_DELIMITED_LISTING_SQL = f"""
+WITH RECURSIVE entries (path) AS (
+    (
+        SELECT path FROM {ZARR_FILE_TABLE}
+        WHERE zarr_id = %(zarr_id)s AND path >= %(prefix)s AND path > %(after)s
+        ORDER BY path
+        LIMIT 1
+    )
+    UNION ALL
+    SELECT next.path
+    FROM entries
+    CROSS JOIN LATERAL (
+        SELECT path FROM {ZARR_FILE_TABLE}
+        WHERE zarr_id = %(zarr_id)s AND path > (
+            -- Skip past every file of a common prefix
+            CASE WHEN strpos(substr(entries.path, %(prefix_length)s + 1), '/') > 0
+            THEN left(
+                entries.path,
+                %(prefix_length)s + strpos(substr(entries.path, %(prefix_length)s + 1), '/')
+            ) || chr(1114111)
+            ELSE entries.path
+            END
+        )
+        ORDER BY path
+        LIMIT 1
+    ) AS next
+    WHERE left(entries.path, %(prefix_length)s) = %(prefix)s
+)
+SELECT path FROM entries
+WHERE left(path, %(prefix_length)s) = %(prefix)s
+LIMIT %(limit)s
+"""  # noqa: S608
+
+
+def _file_result(file: dict) -> dict:
+    return {
+        'Key': file['path'],
+        'LastModified': file['last_modified'],
+        'ETag': file['etag'],
+        'Size': file['size'],
+    }
+
+
+def delimited_start_after(after: str) -> str:
+    """Return the key to start after, so that a common prefix isn't listed again."""
+    return f'{after}{_MAX_CHAR}' if after.endswith('/') else after
+
+
+def list_indexed_files(
+    zarr_archive: ZarrArchive, *, prefix: str, after: str, limit: int
+) -> tuple[list[dict], bool]:
+    """Return a page of the files with a prefix, and whether there are more."""
+    files = zarr_archive.indexed_files.filter(path__startswith=prefix)
+    if after:
+        files = files.filter(path__gt=after)
+    page = list(files.order_by('path').values('path', 'last_modified', 'etag', 'size')[: limit + 1])
+    return [_file_result(file) for file in page[:limit]], len(page) > limit
+
+
+def list_indexed_entries(
+    zarr_archive: ZarrArchive, *, prefix: str, after: str, limit: int
+) -> tuple[list[dict], list[dict], bool]:
+    """
+    Return a page of the files and common prefixes directly under a prefix.
+
+    Common prefixes include the total size and number of files below them, from the directory
+    checksums. Files and common prefixes both count towards the limit, and whether there are
+    more is returned as well.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _DELIMITED_LISTING_SQL,
+            {
+                'zarr_id': zarr_archive.id,
+                'prefix': prefix,
+                'prefix_length': len(prefix),
+                'after': delimited_start_after(after),
+                'limit': limit + 1,
+            },
+        )
+        page = [path for (path,) in cursor.fetchall()]
+
+    # The path of each common prefix is that of the first file below it
+    paths = []
+    directories = []
+    for path in page[:limit]:
+        end = path.find('/', len(prefix))
+        if end == -1:
+            paths.append(path)
+        else:
+            directories.append(path[:end])
+
+    files = zarr_archive.indexed_files.filter(path__in=paths).order_by('path')
+    digests = dict(
+        zarr_archive.directory_checksums.filter(path__in=directories).values_list('path', 'digest')
+    )
+
+    prefixes = []
+    for directory in directories:
+        digest = ZarrDirectoryDigest.parse(digests[directory]) if directory in digests else None
+        prefixes.append(
+            {
+                'Prefix': f'{directory}/',
+                'Size': digest and digest.size,
+                'Count': digest and digest.count,
+            }
+        )
+
+    return (
+        [_file_result(file) for file in files.values('path', 'last_modified', 'etag', 'size')],
+        prefixes,
+        len(page) > limit,
+    )
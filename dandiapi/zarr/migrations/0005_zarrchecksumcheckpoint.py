@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('zarr', '0004_zarrarchive_embargoed_delete_embargoedzarrarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZarrChecksumCheckpoint',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('path', models.CharField(max_length=512)),
+                ('digest', models.CharField(max_length=512)),
+                (
+                    'zarr',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='checksum_checkpoints',
+                        to='zarr.zarrarchive',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='zarrchecksumcheckpoint',
+            constraint=models.UniqueConstraint(
+                fields=('zarr', 'path'), name='zarr-zarrchecksumcheckpoint-unique-path'
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('zarr', '0005_zarrchecksumcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='zarrchecksumcheckpoint',
+            name='zarr-zarrchecksumcheckpoint-unique-path',
+        ),
+        migrations.RenameModel(
+            old_name='ZarrChecksumCheckpoint',
+            new_name='ZarrDirectoryChecksum',
+        ),
+        migrations.AlterField(
+            model_name='zarrdirectorychecksum',
+            name='path',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='zarrdirectorychecksum',
+            name='zarr',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='directory_checksums',
+                to='zarr.zarrarchive',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='zarrdirectorychecksum',
+            constraint=models.UniqueConstraint(
+                fields=('zarr', 'path'), name='zarr-zarrdirectorychecksum-unique-path'
+            ),
+        ),
+        migrations.CreateModel(
+            name='ZarrModifiedDirectory',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('path', models.TextField(blank=True)),
+                (
+                    'zarr',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='modified_directories',
+                        to='zarr.zarrarchive',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='zarrmodifieddirectory',
+            constraint=models.UniqueConstraint(
+                fields=('zarr', 'path'), name='zarr-zarrmodifieddirectory-unique-path'
+            ),
+        ),
+    ]
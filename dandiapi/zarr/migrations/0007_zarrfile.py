@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('zarr', '0006_zarrdirectorychecksum_zarrmodifieddirectory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZarrFile',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('path', models.TextField(db_collation='C')),
+                ('size', models.BigIntegerField()),
+                ('etag', models.CharField(max_length=64)),
+                ('last_modified', models.DateTimeField()),
+                (
+                    'zarr',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='indexed_files',
+                        to='zarr.zarrarchive',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='zarrfile',
+            constraint=models.UniqueConstraint(
+                fields=('zarr', 'path'), name='zarr-zarrfile-unique-path'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='zarrdirectorychecksum',
+            name='path',
+            field=models.TextField(blank=True, db_collation='C'),
+        ),
+        # Zarrs ingested so far have no file index, so the next ingestion must start over
+        migrations.RunSQL(
+            sql='DELETE FROM zarr_zarrdirectorychecksum',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('zarr', '0007_zarrfile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zarrfile',
+            name='directory',
+            field=models.TextField(blank=True, db_collation='C', default=''),
+            preserve_default=False,
+        ),
+        # Files at the root of a zarr archive keep the empty directory
+        migrations.RunSQL(
+            sql=(
+                'UPDATE zarr_zarrfile '
+                "SET directory = regexp_replace(path, '/[^/]*$', '') "
+                "WHERE path LIKE '%/%'"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='zarrfile',
+            index=models.Index(fields=['zarr', 'directory'], name='zarr-file-directory'),
+        ),
+    ]
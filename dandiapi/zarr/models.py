@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import logging
-from urllib.parse import urlparse, urlunparse
+import posixpath
+from typing import TYPE_CHECKING
 from uuid import uuid4
 
 from django.conf import settings
@@ -12,6 +13,9 @@ from rest_framework.exceptions import ValidationError
 from dandiapi.api.models import Dandiset
 from dandiapi.api.storage import get_storage
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
 logger = logging.getLogger(name=__name__)
 
 
@@ -77,10 +81,15 @@ class ZarrArchive(TimeStampedModel):
 
     @property
     def s3_url(self):
-        signed_url = self.storage.url(self.s3_path(''))
-        # Strip off the query parameters from the presigning, as they are different every time
-        parsed = urlparse(signed_url)
-        return urlunparse((parsed[0], parsed[1], parsed[2], '', '', ''))
+        return self.storage.unsigned_object_url(self.s3_path(''))
+
+    @property
+    def indexed(self) -> bool:
+        """Whether the files of this zarr archive can be listed from its file index."""
+        return (
+            self.status == ZarrArchiveStatus.COMPLETE
+            and self.directory_checksums.filter(path='').exists()
+        )
 
     def s3_path(self, zarr_path: str) -> str:
         """Generate a full S3 object path from a path in this zarr_archive."""
@@ -92,6 +101,14 @@ class ZarrArchive(TimeStampedModel):
             for o in path_md5s
         ]
 
+    def mark_modified(self, paths: Iterable[str]):
+        """Record the directories of modified files, so that they are checksummed again."""
+        directories = {posixpath.dirname(path) for path in paths}
+        ZarrModifiedDirectory.objects.bulk_create(
+            [ZarrModifiedDirectory(zarr=self, path=directory) for directory in directories],
+            ignore_conflicts=True,
+        )
+
     def mark_pending(self):
         self.checksum = None
         self.status = ZarrArchiveStatus.PENDING
@@ -104,7 +121,88 @@ class ZarrArchive(TimeStampedModel):
                 raise ValidationError(f'File {self.s3_path(path)} does not exist.')
         for path in paths:
             self.storage.delete(self.s3_path(path))
+        self.mark_modified(paths)
 
         # Files deleted, mark pending
         self.mark_pending()
         self.save()
+
+
+class ZarrDirectoryChecksum(models.Model):
+    """
+    The checksum of a directory of a zarr archive, as of its last ingestion.
+
+    The root directory has an empty path, and is only saved once an ingestion completes. Until
+    then, the saved top-level directories serve as checkpoints of the ingestion.
+    """
+
+    zarr = models.ForeignKey(
+        ZarrArchive, related_name='directory_checksums', on_delete=models.CASCADE
+    )
+    # Use the C collation, so that prefix queries can be served by the unique index
+    path = models.TextField(blank=True, db_collation='C')
+    digest = models.CharField(max_length=512)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s-%(class)s-unique-path',
+                fields=['zarr', 'path'],
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.zarr_id}:{self.path}/'
+
+
+class ZarrModifiedDirectory(models.Model):
+    """A directory of a zarr archive in which files were uploaded or deleted since ingestion."""
+
+    zarr = models.ForeignKey(
+        ZarrArchive, related_name='modified_directories', on_delete=models.CASCADE
+    )
+    path = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s-%(class)s-unique-path',
+                fields=['zarr', 'path'],
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.zarr_id}:{self.path}/'
+
+
+class ZarrFile(models.Model):
+    """
+    A file of a zarr archive, as of its last ingestion.
+
+    The files of a zarr archive are indexed along with its directory checksums, so the index is
+    complete if and only if the checksum of the root directory is saved.
+    """
+
+    zarr = models.ForeignKey(ZarrArchive, related_name='indexed_files', on_delete=models.CASCADE)
+    # Use the C collation, so that files are ordered like S3 keys
+    path = models.TextField(db_collation='C')
+    # The directory directly containing the file, so that its files can be replaced without
+    # scanning the files of its subdirectories
+    directory = models.TextField(blank=True, db_collation='C')
+    size = models.BigIntegerField()
+    etag = models.CharField(max_length=64)
+    last_modified = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='%(app_label)s-%(class)s-unique-path',
+                fields=['zarr', 'path'],
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['zarr', 'directory'], name='zarr-file-directory'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.zarr_id}:{self.path}'
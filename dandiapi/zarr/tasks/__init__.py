@@ -1,33 +1,75 @@
 from __future__ import annotations
 
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
 from celery.utils.log import get_task_logger
+from django.conf import settings
 from django.db import transaction
-from zarr_checksum import compute_zarr_checksum
-from zarr_checksum.generators import S3ClientOptions, yield_files_s3
 
 from dandiapi.api.asset_paths import add_zarr_paths, delete_zarr_paths
-from dandiapi.api.storage import get_storage_params
+from dandiapi.api.services.metadata.assets_summary import update_zarr_assets_summaries
+from dandiapi.zarr.checksum import (
+    ROOT,
+    compute_zarr_archive_checksum,
+    update_zarr_archive_checksum,
+)
 from dandiapi.zarr.models import ZarrArchive, ZarrArchiveStatus
 
 logger = get_task_logger(__name__)
 
 
-@shared_task(queue='ingest_zarr_archive', time_limit=3600)
-def ingest_zarr_archive(zarr_id: str, *, force: bool = False):
+@shared_task(
+    bind=True,
+    queue='ingest_zarr_archive',
+    soft_time_limit=3600,
+    time_limit=3900,
+    # Each attempt resumes from the checkpoints of the previous ones
+    autoretry_for=(SoftTimeLimitExceeded,),
+    max_retries=10,
+)
+def ingest_zarr_archive(self, zarr_id: str, *, force: bool = False):
     # Ensure zarr is in pending state before proceeding
     with transaction.atomic():
         zarr: ZarrArchive = ZarrArchive.objects.select_for_update().get(zarr_id=zarr_id)
-        if not force and zarr.status != ZarrArchiveStatus.UPLOADED:
-            logger.info('Zarrs must be in an UPLOADED state to begin ingestion. Exiting...')
-            return
+        resuming = zarr.status == ZarrArchiveStatus.INGESTING and (
+            force or self.request.retries > 0
+        )
+        if not resuming:
+            if not force and zarr.status != ZarrArchiveStatus.UPLOADED:
+                logger.info('Zarrs must be in an UPLOADED state to begin ingestion. Exiting...')
+                return
+
+            # Set as ingesting
+            zarr.status = ZarrArchiveStatus.INGESTING
+            zarr.checksum = None
+            zarr.save(update_fields=['status', 'checksum'])
 
-        # Set as ingesting
-        zarr.status = ZarrArchiveStatus.INGESTING
-        zarr.checksum = None
-        zarr.save(update_fields=['status', 'checksum'])
+        # Unless the last ingestion completed, its directory checksums are only checkpoints.
+        # Otherwise, they're updated incrementally, but that isn't checkpointed, so an interrupted
+        # update, or one which would list too many directories, is replaced by a full ingestion.
+        complete = zarr.directory_checksums.filter(path=ROOT).exists()
+        if resuming:
+            from_scratch = complete
+        else:
+            from_scratch = (
+                force
+                or not complete
+                or zarr.modified_directories.count()
+                > settings.DANDI_ZARR_INCREMENTAL_INGEST_MAX_DIRECTORIES
+            )
+        if from_scratch:
+            zarr.directory_checksums.all().delete()
+            zarr.indexed_files.all().delete()
+
+    # Uploads are rejected while ingesting, so the checksum is computed without holding the lock
+    if zarr.directory_checksums.filter(path=ROOT).exists():
+        logger.info('Updating checksum for zarr %s...', zarr.zarr_id)
+        update = update_zarr_archive_checksum(zarr)
+    else:
+        logger.info('Computing checksum for zarr %s...', zarr.zarr_id)
+        update = compute_zarr_archive_checksum(zarr)
 
-    # Zarr is in correct state, lock until ingestion finishes
+    # Only lock the zarr to save the result
     with transaction.atomic():
         zarr = ZarrArchive.objects.select_for_update().get(
             zarr_id=zarr_id, status=ZarrArchiveStatus.INGESTING
@@ -36,31 +78,18 @@ def ingest_zarr_archive(zarr_id: str, *, force: bool = False):
         # Remove all asset paths associated with this zarr before ingest
         delete_zarr_paths(zarr)
 
-        # Instantiate updater and add files as they come in
-        logger.info('Computing checksum for zarr %s...', zarr.zarr_id)
-        storage_params = get_storage_params(zarr.storage)
-        checksum = compute_zarr_checksum(
-            yield_files_s3(
-                bucket=zarr.storage.bucket_name,
-                prefix=zarr.s3_path(''),
-                client_options=S3ClientOptions(
-                    endpoint_url=storage_params['endpoint_url'],
-                    aws_access_key_id=storage_params['access_key'],
-                    aws_secret_access_key=storage_params['secret_key'],
-                    region_name='us-east-2',
-                ),
-            )
-        )
-
         # Set zarr fields
-        zarr.checksum = checksum.digest
-        zarr.file_count = checksum.count
-        zarr.size = checksum.size
+        previous_size = zarr.size
+        zarr.checksum = update.digest.digest
+        zarr.file_count = update.digest.count
+        zarr.size = update.digest.size
         zarr.status = ZarrArchiveStatus.COMPLETE
         zarr.save()
+        update.save(zarr)
 
         # Add asset paths after ingest is finished
         add_zarr_paths(zarr)
+        update_zarr_assets_summaries(zarr, previous_size=previous_size)
 
 
 def ingest_dandiset_zarrs(dandiset_id: int, **kwargs):
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from django.conf import settings
+from django.utils import timezone
 from guardian.shortcuts import assign_perm
 import pytest
-from zarr_checksum.checksum import EMPTY_CHECKSUM
+from zarr_checksum import compute_zarr_checksum
+from zarr_checksum.checksum import EMPTY_CHECKSUM, ZarrDirectoryDigest
 
 from dandiapi.api.models import AssetPath
 from dandiapi.api.services.asset import add_asset_to_version
@@ -55,6 +57,162 @@ def test_ingest_zarr_archive_empty(zarr_archive_factory):
     assert zarr.status == ZarrArchiveStatus.COMPLETE
 
 
+@pytest.mark.django_db(transaction=True)
+def test_ingest_zarr_archive_nested(zarr_archive_factory, zarr_file_factory):
+    zarr: ZarrArchive = zarr_archive_factory(status=ZarrArchiveStatus.UPLOADED)
+    files = [
+        zarr_file_factory(zarr_archive=zarr, path=path)
+        for path in ['.zattrs', 'a/.zarray', 'a/0/0', 'a/0/1', 'a/1/0', 'b/c/d/0', 'e']
+    ]
+
+    ingest_zarr_archive(str(zarr.zarr_id))
+
+    # The checksum is the same as if every file was added to a single tree
+    zarr.refresh_from_db()
+    assert zarr.checksum == compute_zarr_checksum(iter(files)).digest
+    assert zarr.file_count == len(files)
+    assert zarr.status == ZarrArchiveStatus.COMPLETE
+
+    # The checksum of every directory is saved
+    directory_checksums = dict(zarr.directory_checksums.values_list('path', 'digest'))
+    assert sorted(directory_checksums) == ['', 'a', 'a/0', 'a/1', 'b', 'b/c', 'b/c/d']
+    assert directory_checksums[''] == zarr.checksum
+
+    # Every file is indexed, along with its directory
+    assert list(zarr.indexed_files.order_by('path').values_list('path', 'size')) == sorted(
+        (str(file.path), file.size) for file in files
+    )
+    indexed_directory = zarr.indexed_files.filter(directory='a/0').order_by('path')
+    assert list(indexed_directory.values_list('path', flat=True)) == ['a/0/0', 'a/0/1']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_zarr_archive_resume(zarr_archive_factory, zarr_file_factory):
+    zarr: ZarrArchive = zarr_archive_factory(status=ZarrArchiveStatus.INGESTING)
+    zarr_file_factory(zarr_archive=zarr, path='a/0', size=100)
+    zarr_file_factory(zarr_archive=zarr, path='b/0', size=100)
+
+    # Simulate an interrupted ingestion, which had already checksummed the "a" directory
+    checkpoint = ZarrDirectoryDigest(md5='0' * 32, count=5, size=500)
+    zarr.directory_checksums.create(path='a', digest=checkpoint.digest)
+    # and had indexed a file of the "b" directory which has since been deleted
+    zarr.indexed_files.create(
+        path='b/1', directory='b', size=100, etag='0' * 32, last_modified=timezone.now()
+    )
+
+    ingest_zarr_archive(str(zarr.zarr_id), force=True)
+
+    # The "a" directory is not listed again
+    zarr.refresh_from_db()
+    assert zarr.status == ZarrArchiveStatus.COMPLETE
+    assert zarr.file_count == 6
+    assert zarr.size == 600
+    # The files of the "b" directory are indexed again
+    assert list(
+        zarr.indexed_files.filter(path__startswith='b/').values_list('path', flat=True)
+    ) == ['b/0']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_zarr_archive_stale_checkpoints(zarr_archive_factory, zarr_file_factory):
+    zarr: ZarrArchive = zarr_archive_factory(status=ZarrArchiveStatus.UPLOADED)
+    files = [zarr_file_factory(zarr_archive=zarr, path='a/0')]
+    zarr.directory_checksums.create(
+        path='a', digest=ZarrDirectoryDigest(md5='0' * 32, count=5, size=500).digest
+    )
+
+    # A new ingestion doesn't resume from the checkpoints of a previous one
+    ingest_zarr_archive(str(zarr.zarr_id))
+    zarr.refresh_from_db()
+    assert zarr.checksum == compute_zarr_checksum(iter(files)).digest
+    assert zarr.file_count == 1
+
+
+def _reupload(zarr: ZarrArchive):
+    zarr.mark_pending()
+    zarr.status = ZarrArchiveStatus.UPLOADED
+    zarr.save()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_zarr_archive_incremental(zarr_archive_factory, zarr_file_factory):
+    zarr: ZarrArchive = zarr_archive_factory(status=ZarrArchiveStatus.UPLOADED)
+    files = [
+        zarr_file_factory(zarr_archive=zarr, path=path)
+        for path in ['.zattrs', 'a/0/0', 'a/1/0', 'b/0/0']
+    ]
+    ingest_zarr_archive(str(zarr.zarr_id))
+
+    # Upload files to some directories, including a new one
+    new_paths = ['a/1/1', 'a/2/0', 'c']
+    files += [zarr_file_factory(zarr_archive=zarr, path=path) for path in new_paths]
+    zarr.mark_modified(new_paths)
+    _reupload(zarr)
+
+    # Directories which weren't modified aren't listed again
+    zarr.directory_checksums.filter(path='b').update(
+        digest=ZarrDirectoryDigest(md5='0' * 32, count=5, size=500).digest
+    )
+    ingest_zarr_archive(str(zarr.zarr_id))
+    zarr.refresh_from_db()
+    assert zarr.file_count == len(files) - 1 + 5
+    assert not zarr.modified_directories.exists()
+    assert sorted(zarr.indexed_files.values_list('path', flat=True)) == sorted(
+        str(file.path) for file in files
+    )
+
+    # A forced ingestion checksums every directory again
+    _reupload(zarr)
+    ingest_zarr_archive(str(zarr.zarr_id), force=True)
+    zarr.refresh_from_db()
+    assert zarr.checksum == compute_zarr_checksum(iter(files)).digest
+    assert zarr.file_count == len(files)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_zarr_archive_incremental_too_many_directories(
+    zarr_archive_factory, zarr_file_factory, monkeypatch
+):
+    monkeypatch.setattr(settings, 'DANDI_ZARR_INCREMENTAL_INGEST_MAX_DIRECTORIES', 1)
+    zarr: ZarrArchive = zarr_archive_factory(status=ZarrArchiveStatus.UPLOADED)
+    files = [zarr_file_factory(zarr_archive=zarr, path=path) for path in ['a/0', 'b/0', 'c/0']]
+    ingest_zarr_archive(str(zarr.zarr_id))
+
+    new_paths = ['a/1', 'b/1']
+    files += [zarr_file_factory(zarr_archive=zarr, path=path) for path in new_paths]
+    zarr.mark_modified(new_paths)
+    _reupload(zarr)
+
+    # Every directory is checksummed again, as if the ingestion was forced
+    zarr.directory_checksums.filter(path='c').update(
+        digest=ZarrDirectoryDigest(md5='0' * 32, count=5, size=500).digest
+    )
+    ingest_zarr_archive(str(zarr.zarr_id))
+    zarr.refresh_from_db()
+    assert zarr.checksum == compute_zarr_checksum(iter(files)).digest
+    assert not zarr.modified_directories.exists()
+    assert zarr.indexed_files.count() == len(files)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_zarr_archive_incremental_delete(zarr_archive_factory, zarr_file_factory):
+    zarr: ZarrArchive = zarr_archive_factory(status=ZarrArchiveStatus.UPLOADED)
+    files = [zarr_file_factory(zarr_archive=zarr, path=path) for path in ['a/0', 'a/1', 'b/c/0']]
+    ingest_zarr_archive(str(zarr.zarr_id))
+
+    # Delete a file, and the only file of a directory
+    zarr.delete_files(['a/1', 'b/c/0'])
+    zarr.status = ZarrArchiveStatus.UPLOADED
+    zarr.save()
+    ingest_zarr_archive(str(zarr.zarr_id))
+
+    zarr.refresh_from_db()
+    assert zarr.checksum == compute_zarr_checksum(iter(files[:1])).digest
+    assert zarr.file_count == 1
+    assert sorted(zarr.directory_checksums.values_list('path', flat=True)) == ['', 'a']
+    assert list(zarr.indexed_files.values_list('path', flat=True)) == ['a/0']
+
+
 @pytest.mark.django_db(transaction=True)
 def test_ingest_zarr_archive_force(zarr_archive_factory, zarr_file_factory):
     zarr: ZarrArchive = zarr_archive_factory()
@@ -413,8 +413,9 @@ def test_zarr_rest_delete_missing_file(
 
 
 @pytest.mark.django_db()
+@pytest.mark.parametrize('ingested', [False, True], ids=['s3', 'index'])
 def test_zarr_file_list(
-    authenticated_api_client, storage, zarr_archive: ZarrArchive, zarr_file_factory
+    authenticated_api_client, storage, zarr_archive: ZarrArchive, zarr_file_factory, ingested
 ):
     # Pretend like ZarrArchive was defined with the given storage
     ZarrArchive.storage = storage
@@ -430,6 +431,14 @@ def test_zarr_file_list(
     for file in files:
         zarr_file_factory(zarr_archive=zarr_archive, path=file)
 
+    # Once ingested, files are listed from the index rather than from S3
+    if ingested:
+        zarr_archive.status = ZarrArchiveStatus.UPLOADED
+        zarr_archive.save()
+        ingest_zarr_archive(zarr_archive.zarr_id)
+        zarr_archive.refresh_from_db()
+    assert zarr_archive.indexed == ingested
+
     # Check base listing
     resp = authenticated_api_client.get(f'/api/zarr/{zarr_archive.zarr_id}/files/')
     assert [x['Key'] for x in resp.json()['results']] == sorted(files)
@@ -458,6 +467,7 @@ def test_zarr_file_list(
         {'prefix': 'foo/', 'after': 'foo/bar/a.txt', 'limit': 1},
     )
     assert [x['Key'] for x in resp.json()['results']] == ['foo/bar/b.txt']
+    assert 'after=foo%2Fbar%2Fb.txt' in resp.json()['next']
 
     # Check download flag
     resp = authenticated_api_client.get(
@@ -470,6 +480,58 @@ def test_zarr_file_list(
     )
 
 
+@pytest.mark.django_db()
+@pytest.mark.parametrize('ingested', [False, True], ids=['s3', 'index'])
+def test_zarr_file_list_delimiter(
+    authenticated_api_client, storage, zarr_archive: ZarrArchive, zarr_file_factory, ingested
+):
+    # Pretend like ZarrArchive was defined with the given storage
+    ZarrArchive.storage = storage
+
+    files = ['.zattrs', 'bar/a.txt', 'bar/b.txt', 'foo/bar/a.txt', 'foo/bar/b.txt', 'foo/baz.txt']
+    for file in files:
+        zarr_file_factory(zarr_archive=zarr_archive, path=file, size=100)
+    if ingested:
+        zarr_archive.status = ZarrArchiveStatus.UPLOADED
+        zarr_archive.save()
+        ingest_zarr_archive(zarr_archive.zarr_id)
+
+    def list_files(**params):
+        resp = authenticated_api_client.get(
+            f'/api/zarr/{zarr_archive.zarr_id}/files/', {'delimiter': '/', **params}
+        )
+        assert resp.status_code == 200
+        return resp.json()
+
+    # Common prefixes are only aggregated once ingested
+    def prefix(path, size, count):
+        if not ingested:
+            size = count = None
+        return {'Prefix': path, 'Size': size, 'Count': count}
+
+    # List the top level
+    listing = list_files()
+    assert [x['Key'] for x in listing['results']] == ['.zattrs']
+    assert listing['prefixes'] == [prefix('bar/', 200, 2), prefix('foo/', 300, 3)]
+    assert listing['next'] is None
+
+    # List a directory
+    listing = list_files(prefix='foo/')
+    assert [x['Key'] for x in listing['results']] == ['foo/baz.txt']
+    assert listing['prefixes'] == [prefix('foo/bar/', 200, 2)]
+
+    # Files and common prefixes both count towards the limit
+    listing = list_files(limit=2)
+    assert [x['Key'] for x in listing['results']] == ['.zattrs']
+    assert listing['prefixes'] == [prefix('bar/', 200, 2)]
+    assert 'after=bar%2F' in listing['next']
+
+    # Listing after a common prefix skips all of its files
+    listing = list_files(after='bar/')
+    assert listing['results'] == []
+    assert listing['prefixes'] == [prefix('foo/', 300, 3)]
+
+
 @pytest.mark.django_db()
 def test_zarr_explore_head(authenticated_api_client, storage, zarr_archive: ZarrArchive):
     # Pretend like ZarrArchive was defined with the given storage
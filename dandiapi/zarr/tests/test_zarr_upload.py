@@ -49,6 +49,9 @@ def test_zarr_rest_upload_start(
     assert resp.status_code == 200
     assert resp.json() == [HTTP_URL_RE]
 
+    # Assert the modified directory is only recorded once
+    assert list(zarr_archive.modified_directories.values_list('path', flat=True)) == ['foo']
+
 
 @pytest.mark.django_db
 def test_zarr_rest_upload_start_not_an_owner(authenticated_api_client, zarr_archive: ZarrArchive):
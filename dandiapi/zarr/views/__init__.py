@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import cache
 import logging
 from typing import TYPE_CHECKING
 
@@ -18,8 +19,14 @@ from rest_framework.viewsets import ReadOnlyModelViewSet
 from dandiapi.api.permissions import IsApproved
 from dandiapi.api.models.dandiset import Dandiset, DandisetUserObjectPermission
 from dandiapi.api.services import audit
+from dandiapi.api.services.metadata.assets_summary import update_zarr_assets_summaries
 from dandiapi.api.storage import get_boto_client
 from dandiapi.api.views.pagination import DandiPagination
+from dandiapi.zarr.listing import (
+    delimited_start_after,
+    list_indexed_entries,
+    list_indexed_files,
+)
 from dandiapi.zarr.models import ZarrArchive, ZarrArchiveStatus
 from dandiapi.zarr.tasks import ingest_zarr_archive
 
@@ -29,6 +36,12 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+@cache
+def _get_listing_client():
+    # Creating a client is slow, while using one from many threads is safe
+    return get_boto_client()
+
+
 class ZarrFileCreationSerializer(serializers.Serializer):
     path = serializers.CharField()
     base64md5 = serializers.CharField()
@@ -73,6 +86,7 @@ class ZarrExploreInputSerializer(serializers.Serializer):
     prefix = serializers.CharField(default='')
     limit = serializers.IntegerField(min_value=0, max_value=1000, default=1000)
     download = serializers.BooleanField(default=False)
+    delimiter = serializers.ChoiceField(choices=['/'], required=False)
 
 
 class ZarrExploreOutputSerializer(serializers.Serializer):
@@ -82,8 +96,16 @@ class ZarrExploreOutputSerializer(serializers.Serializer):
         ETag = serializers.CharField()
         Size = serializers.IntegerField(min_value=0)
 
+    class PrefixesSerializer(serializers.Serializer):
+        Prefix = serializers.CharField()
+        # Only known once the zarr has been ingested
+        Size = serializers.IntegerField(min_value=0, allow_null=True)
+        Count = serializers.IntegerField(min_value=0, allow_null=True)
+
     next = serializers.CharField(default=None)
     results = serializers.ListField(child=ResultsSerializer())
+    # Only listed with a delimiter
+    prefixes = serializers.ListField(child=PrefixesSerializer(), required=False)
 
 
 class ZarrListQuerySerializer(serializers.Serializer):
@@ -247,41 +269,66 @@ class ZarrViewSet(ReadOnlyModelViewSet):
         if download:
             return HttpResponseRedirect(zarr_archive.storage.url(zarr_archive.s3_path(raw_prefix)))
 
-        # Retrieve file listing
-        client = get_boto_client()
-        listing = client.list_objects_v2(
-            Bucket=zarr_archive.storage.bucket_name,
-            Prefix=full_prefix,
-            StartAfter=after,
-            MaxKeys=limit,
-        )
+        # With a delimiter, the prefix and after params are not stripped of their trailing slash
+        delimiter = serializer.validated_data.get('delimiter')
+        prefixes = []
 
-        # Map/filter listing
-        results = [
-            {
-                'Key': obj['Key'].removeprefix(base_path),
-                'LastModified': obj['LastModified'],
-                'ETag': obj['ETag'].strip('"'),
-                'Size': obj['Size'],
-            }
-            for obj in listing.get('Contents', [])
-        ]
+        # Retrieve file listing, from the index unless the zarr has changed since its ingestion
+        if zarr_archive.indexed and delimiter:
+            results, prefixes, truncated = list_indexed_entries(
+                zarr_archive, prefix=raw_prefix, after=raw_after, limit=limit
+            )
+        elif zarr_archive.indexed:
+            results, truncated = list_indexed_files(
+                zarr_archive,
+                prefix=raw_prefix.rstrip('/'),
+                after=raw_after.rstrip('/'),
+                limit=limit,
+            )
+        else:
+            params = {'Prefix': full_prefix, 'StartAfter': after}
+            if delimiter:
+                params = {
+                    'Prefix': base_path + raw_prefix,
+                    'StartAfter': base_path + delimited_start_after(raw_after) if raw_after else '',
+                    'Delimiter': delimiter,
+                }
+            listing = _get_listing_client().list_objects_v2(
+                Bucket=zarr_archive.storage.bucket_name, MaxKeys=limit, **params
+            )
 
-        # Create next listing if necessary
+            # Map/filter listing
+            results = [
+                {
+                    'Key': obj['Key'].removeprefix(base_path),
+                    'LastModified': obj['LastModified'],
+                    'ETag': obj['ETag'].strip('"'),
+                    'Size': obj['Size'],
+                }
+                for obj in listing.get('Contents', [])
+            ]
+            prefixes = [
+                {
+                    'Prefix': common_prefix['Prefix'].removeprefix(base_path),
+                    'Size': None,
+                    'Count': None,
+                }
+                for common_prefix in listing.get('CommonPrefixes', [])
+            ]
+            truncated = listing['IsTruncated']
+
+        # Create next listing if necessary, after the last file or common prefix
         next_link = None
-        if listing['IsTruncated']:
+        if truncated:
             url = self.request.build_absolute_uri()
-            next_link = replace_query_param(url, 'after', results[-1]['Key'])
+            keys = [result['Key'] for result in results] + [p['Prefix'] for p in prefixes]
+            next_link = replace_query_param(url, 'after', max(keys))
 
         # Construct serializer and return
-        return Response(
-            ZarrExploreOutputSerializer(
-                instance={
-                    'next': next_link,
-                    'results': results,
-                }
-            ).data
-        )
+        instance = {'next': next_link, 'results': results}
+        if delimiter:
+            instance['prefixes'] = prefixes
+        return Response(ZarrExploreOutputSerializer(instance=instance).data)
 
     @swagger_auto_schema(
         request_body=ZarrFileCreationSerializer(),
@@ -312,10 +359,13 @@ class ZarrViewSet(ReadOnlyModelViewSet):
             # Generate presigned urls
             logger.info('Beginning upload to zarr archive %s', zarr_archive.zarr_id)
             urls = zarr_archive.generate_upload_urls(paths)
+            zarr_archive.mark_modified(p['path'] for p in paths)
 
             # Set status back to pending, since with these URLs the zarr could have been changed
+            previous_size = zarr_archive.size
             zarr_archive.mark_pending()
             zarr_archive.save()
+            update_zarr_assets_summaries(zarr_archive, previous_size=previous_size)
 
             audit.upload_zarr_chunks(
                 dandiset=zarr_archive.dandiset,
@@ -353,7 +403,9 @@ class ZarrViewSet(ReadOnlyModelViewSet):
             serializer = ZarrDeleteFileRequestSerializer(data=request.data, many=True)
             serializer.is_valid(raise_exception=True)
             paths = [file['path'] for file in serializer.validated_data]
+            previous_size = zarr_archive.size
             zarr_archive.delete_files(paths)
+            update_zarr_assets_summaries(zarr_archive, previous_size=previous_size)
 
             audit.delete_zarr_chunks(
                 dandiset=zarr_archive.dandiset,
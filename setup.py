@@ -64,6 +64,8 @@ setup(
         'jsonschema',
         'boto3[s3]',
         'more_itertools',
+        # Writes the Parquet asset manifest
+        'pyarrow',
         'requests',
         's3-log-parse',
         'zarr-checksum>=0.2.8',